@@ -31,6 +31,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     'rest_framework',
     'rest_framework.authtoken',
@@ -42,11 +43,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -75,16 +78,119 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.0/ref/settings/#databases
 
+# Connections are checked out of a pool per worker process and returned
+# at the end of each request. Set DB_POOL_MAX_SIZE=0 to disable the pool,
+# and DB_CONN_MAX_AGE to keep connections per thread instead.
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'core.db.backends.postgresql',
         'HOST': os.environ.get("DB_HOST"),
         'NAME': os.environ.get("DB_NAME"),
         'USER': os.environ.get("DB_USER"),
         'PASSWORD': os.environ.get("DB_PASS"),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 0)),
+        'POOL': {
+            'MAX_SIZE': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+            'TIMEOUT': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+            'HEALTH_CHECK_INTERVAL': int(
+                os.environ.get('DB_POOL_HEALTH_CHECK_INTERVAL', 30)
+            ),
+            'MAX_IDLE': int(os.environ.get('DB_POOL_MAX_IDLE', 300)),
+        },
     }
 }
 
+# Threads running the database work of the async views of each ASGI
+# worker, at most one per pooled connection.
+ASYNC_VIEW_THREADS = int(
+    os.environ.get('ASYNC_VIEW_THREADS')
+    or DATABASES['default']['POOL']['MAX_SIZE']
+    or 10
+)
+
+# Cache
+# https://docs.djangoproject.com/en/4.0/topics/cache/
+
+# Responses are cached in process unless a shared Redis cache is
+# configured, which is required to share invalidation across workers.
+REDIS_URL = os.environ.get('REDIS_URL')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'responses': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+        'KEY_PREFIX': 'responses',
+    } if REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'responses',
+        'OPTIONS': {
+            'MAX_ENTRIES': int(
+                os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 1000)
+            ),
+        },
+    },
+}
+
+if REDIS_URL:
+    CACHES['tokens'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+        'KEY_PREFIX': 'tokens',
+    }
+
+RESPONSE_CACHE_ALIAS = 'responses'
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get('RESPONSE_CACHE_TIMEOUT', 300))
+
+# Authenticated users are cached in process for a short time, and in the
+# shared cache, when there is one, for longer.
+AUTH_TOKEN_CACHE_ALIAS = 'tokens' if REDIS_URL else None
+AUTH_TOKEN_CACHE_TIMEOUT = int(
+    os.environ.get('AUTH_TOKEN_CACHE_TIMEOUT', 300)
+)
+AUTH_TOKEN_CACHE_LOCAL_TIMEOUT = int(
+    os.environ.get('AUTH_TOKEN_CACHE_LOCAL_TIMEOUT', 10)
+)
+AUTH_TOKEN_CACHE_MAX_ENTRIES = int(
+    os.environ.get('AUTH_TOKEN_CACHE_MAX_ENTRIES', 10000)
+)
+
+
+# Request metrics served at /api/metrics. Each process writes its
+# counters to METRICS_DIR to be reported along with the other workers',
+# including the ones of other servers sharing the directory.
+METRICS_DIR = os.environ.get('METRICS_DIR') or None
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 1))
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN') or None
+
+# Profiles of requests staff users ask for, browsed in the admin. Only the
+# newest PROFILE_MAX_REPORTS are kept.
+PROFILE_DIR = os.environ.get('PROFILE_DIR', '/vol/profiles')
+PROFILE_MAX_REPORTS = int(os.environ.get('PROFILE_MAX_REPORTS', 100))
+PROFILE_INTERVAL = float(os.environ.get('PROFILE_INTERVAL', 0.001))
+
+# Queries taking SLOW_QUERY_THRESHOLD_MS or longer are logged to
+# SLOW_QUERY_LOG, read it with the slow_queries command. The plan of
+# SLOW_QUERY_EXPLAIN_RATE of the slow SELECT queries is captured by
+# running them again under EXPLAIN ANALYZE.
+SLOW_QUERY_LOG = os.environ.get('SLOW_QUERY_LOG') or None
+SLOW_QUERY_THRESHOLD_MS = float(
+    os.environ.get('SLOW_QUERY_THRESHOLD_MS', 100)
+)
+SLOW_QUERY_EXPLAIN_RATE = float(
+    os.environ.get('SLOW_QUERY_EXPLAIN_RATE', 0.1)
+)
+SLOW_QUERY_LOG_MAX_BYTES = int(
+    os.environ.get('SLOW_QUERY_LOG_MAX_BYTES', 10 * 1024 * 1024)
+)
+SLOW_QUERY_LOG_BACKUPS = int(os.environ.get('SLOW_QUERY_LOG_BACKUPS', 5))
+
+# Text search configuration of the recipe search vectors. Run the
+# update_search_vectors command after changing it.
+SEARCH_CONFIG = os.environ.get('SEARCH_CONFIG', 'english')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
@@ -126,6 +232,36 @@ MEDIA_URL = '/static/media/'
 STATIC_ROOT = '/vol/web/static'
 MEDIA_ROOT = '/vol/web/media'
 
+# The generate_schema command writes the OpenAPI schema here to be served
+# by the proxy.
+SCHEMA_ROOT = os.path.join(STATIC_ROOT, 'schema')
+
+# Uploaded recipe images are processed by the process_images command into
+# variants fitting the given sizes. Larger images are rejected unread.
+IMAGE_MAX_PIXELS = int(os.environ.get('IMAGE_MAX_PIXELS', 40_000_000))
+IMAGE_VARIANTS = {
+    'thumbnail': 200,
+    'medium': 800,
+    'large': 1600,
+}
+IMAGE_PROCESSING_TIMEOUT = int(
+    os.environ.get('IMAGE_PROCESSING_TIMEOUT', 300)
+)
+IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', 2))
+
+# Multipart uploads are always streamed to temporary files, and large images
+# are uploaded in chunks to a directory outside the served volume.
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+IMAGE_UPLOAD_TEMP_DIR = os.environ.get('IMAGE_UPLOAD_TEMP_DIR',
+                                       '/vol/uploads')
+IMAGE_UPLOAD_CHUNK_SIZE = 1024 * 1024
+IMAGE_UPLOAD_MAX_SIZE = int(
+    os.environ.get('IMAGE_UPLOAD_MAX_SIZE', 50 * 1024 * 1024)
+)
+IMAGE_UPLOAD_EXPIRY = int(os.environ.get('IMAGE_UPLOAD_EXPIRY', 24 * 3600))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.0/ref/settings/#default-auto-field
 
@@ -134,7 +270,18 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = 'core.User'
 
 REST_FRAMEWORK = {
-    'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema'
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_PAGINATION_CLASS': 'recipe.pagination.KeysetPagination',
+    'PAGE_SIZE': int(os.environ.get('API_PAGE_SIZE', 100)),
 }
 
 SPECTACULAR_SETTINGS = {
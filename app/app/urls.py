@@ -1,25 +1,34 @@
-from drf_spectacular.views import (
-    SpectacularAPIView,
-    SpectacularSwaggerView
-)
+from drf_spectacular.views import SpectacularSwaggerView
 from django.contrib import admin
 from django.urls import path, include
 from django.conf.urls.static import static
 from django.conf import settings
 
-from core import views as core_views
+from core import admin as core_admin, views as core_views
 
 
 urlpatterns = [
+    path('admin/profiles/', admin.site.admin_view(core_admin.profile_list),
+         name='admin-profiles'),
+    path('admin/profiles/<str:report_id>/',
+         admin.site.admin_view(core_admin.profile_detail),
+         name='admin-profile'),
+    path('admin/profiles/<str:report_id>/stacks',
+         admin.site.admin_view(core_admin.profile_stacks),
+         name='admin-profile-stacks'),
     path('admin/', admin.site.urls),
     path('api/health-check', core_views.health_check, name='health-check'),
-    path('api/schema/', SpectacularAPIView.as_view(), name='api-schema'),
+    path('api/health-check/database-pools', core_views.database_pools,
+         name='database-pools'),
+    path('api/metrics', core_views.metrics, name='metrics'),
+    path('api/schema/', core_views.SchemaView.as_view(), name='api-schema'),
     path(
         'api/docs/',
         SpectacularSwaggerView.as_view(url_name='api-schema'),
         name='api-docs'
     ),
     path('api/user/', include('user.urls', 'user')),
+    path('api/async/', include('recipe.async_urls', 'recipe-async')),
     path('api/', include('recipe.urls', 'recipe'))
 ]
 
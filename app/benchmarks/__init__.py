@@ -0,0 +1,58 @@
+"""
+Benchmarks for the app.
+
+Each module is run from the ``app`` directory, e.g.
+``python -m benchmarks.bulk_recipes``, and works on a throwaway test
+database created from the configured one.
+"""
+import os
+import statistics
+import time
+from contextlib import contextmanager
+
+import django
+
+
+def setup():
+    """Configure Django for a benchmark script."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+    django.setup()
+
+
+@contextmanager
+def benchmark_database():
+    """Create a test database for the duration of the benchmark."""
+    from django.test.utils import (
+        setup_databases,
+        setup_test_environment,
+        teardown_databases,
+        teardown_test_environment
+    )
+
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        yield
+    finally:
+        teardown_databases(old_config, verbosity=0)
+        teardown_test_environment()
+
+
+def measure(func, repeat=5):
+    """Call ``func`` ``repeat`` times and return the timings in ms."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return timings
+
+
+def report(name, timings, **extra):
+    """Print the median and best timings of a benchmark."""
+    details = ''.join(f'  {key}={value}' for key, value in extra.items())
+    print(
+        f'{name:<40} median={statistics.median(timings):9.2f}ms '
+        f'best={min(timings):9.2f}ms{details}'
+    )
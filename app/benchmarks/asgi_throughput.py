@@ -0,0 +1,131 @@
+"""
+Compare the throughput of one worker listing recipes while every query
+takes an extra 20ms: a single threaded WSGI worker, as run by uWSGI, and
+an ASGI worker serving the sync and the async views.
+
+    python -m benchmarks.asgi_throughput
+"""
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import benchmark_database, setup
+
+
+QUERY_DELAY = 0.02
+CONCURRENCY = 20
+REQUESTS = 200
+
+
+def slow_query(execute, sql, params, many, context):
+    """Run a query as if the database was slow."""
+    time.sleep(QUERY_DELAY)
+    return execute(sql, params, many, context)
+
+
+def serve_wsgi(port):
+    """Serve the WSGI application from a thread, one request at a time."""
+    from wsgiref.simple_server import (
+        WSGIRequestHandler,
+        WSGIServer,
+        make_server
+    )
+
+    from app.wsgi import application
+
+    class Server(WSGIServer):
+        request_queue_size = CONCURRENCY
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    server = make_server('127.0.0.1', port, application,
+                         server_class=Server, handler_class=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return server
+
+
+def serve_asgi(port):
+    """Serve the ASGI application from a thread and return the server."""
+    import uvicorn
+
+    from app.asgi import application
+
+    server = uvicorn.Server(uvicorn.Config(
+        application, host='127.0.0.1', port=port, log_level='warning',
+        lifespan='off'
+    ))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+
+    return server
+
+
+def main():
+    """Run the benchmark."""
+    from django.db.backends.signals import connection_created
+    from django.test import override_settings
+    from rest_framework.authtoken.models import Token
+
+    from core.models import Recipe, User
+
+    user = User.objects.create_user('bench@example.com', 'benchpass123')
+    Recipe.objects.bulk_create(
+        Recipe(user=user, title=f'Recipe {i}', time_minutes=10, price='5.00')
+        for i in range(20)
+    )
+    token = Token.objects.create(user=user).key
+
+    def slow_down(connection, **kwargs):
+        """Delay the queries of every connection once."""
+        if slow_query not in connection.execute_wrappers:
+            connection.execute_wrappers.append(slow_query)
+
+    connection_created.connect(slow_down, weak=False)
+    # Skip the response cache so every request hits the database.
+    override_settings(CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+        'responses': {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+        },
+    }).enable()
+    wsgi_server = serve_wsgi(port=8764)
+    asgi_server = serve_asgi(port=8765)
+
+    def get(url):
+        """Request a URL with the benchmark user's token."""
+        request = urllib.request.Request(
+            url,
+            headers={'Authorization': f'Token {token}', 'Host': 'testserver'}
+        )
+        with urllib.request.urlopen(request) as response:
+            response.read()
+
+    for name, url in (
+        ('WSGI sync view', 'http://127.0.0.1:8764/api/recipes/'),
+        ('ASGI sync view', 'http://127.0.0.1:8765/api/recipes/'),
+        ('ASGI async view', 'http://127.0.0.1:8765/api/async/recipes/'),
+    ):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(CONCURRENCY) as executor:
+            list(executor.map(get, [url] * REQUESTS))
+        elapsed = time.perf_counter() - start
+        print(
+            f'{name:<40} {REQUESTS / elapsed:9.1f} req/s  '
+            f'concurrency={CONCURRENCY} query_delay={QUERY_DELAY * 1000}ms'
+        )
+
+    wsgi_server.shutdown()
+    asgi_server.should_exit = True
+
+
+if __name__ == '__main__':
+    setup()
+    with benchmark_database():
+        main()
@@ -0,0 +1,65 @@
+"""
+Time suggesting names among the tens of thousands of ingredients of a
+user, with the trigram index and without it.
+
+    python -m benchmarks.autocomplete
+"""
+from benchmarks import benchmark_database, measure, report, setup
+
+
+USERS = 3
+NAMES_PER_WORD = 6000
+WORDS = ('Tomato', 'Potato', 'Onion', 'Garlic', 'Basil')
+
+
+def seed():
+    """Create accounts with many ingredients."""
+    from django.db import connection
+
+    from core.models import Ingredient, User
+
+    users = [
+        User.objects.create_user(f'bench{i}@example.com', 'benchpass123')
+        for i in range(USERS)
+    ]
+    for user in users:
+        Ingredient.objects.bulk_create(
+            Ingredient(user=user, name=f'{word} {i}')
+            for word in WORDS for i in range(NAMES_PER_WORD)
+        )
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE core_ingredient')
+
+    return users[0]
+
+
+def main():
+    """Run the benchmark."""
+    from django.db import connection, transaction
+
+    from core.models import Ingredient
+    from recipe import autocomplete
+
+    if not autocomplete.trigram_enabled():
+        print('pg_trgm is not installed, only prefixes are matched.')
+    queryset = Ingredient.objects.filter(user=seed())
+    count = len(WORDS) * NAMES_PER_WORD
+
+    for text in ('garl', 'garlci'):
+        report(f'suggest {text!r} among {count}',
+               measure(lambda: list(autocomplete.suggest(queryset, text, 10)),
+                       repeat=20))
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_bitmapscan = off')
+            cursor.execute('SET LOCAL enable_indexscan = off')
+        report(f'suggest \'garl\' among {count}, no index',
+               measure(lambda: list(autocomplete.suggest(queryset, 'garl',
+                                                         10)), repeat=5))
+
+
+if __name__ == '__main__':
+    setup()
+    with benchmark_database():
+        main()
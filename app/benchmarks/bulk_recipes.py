@@ -0,0 +1,62 @@
+"""
+Compare the bulk recipe endpoint with one request per recipe.
+
+    python -m benchmarks.bulk_recipes
+"""
+from benchmarks import benchmark_database, measure, report, setup
+
+
+def payload(index):
+    """Return a recipe payload with nested tags and ingredients."""
+    return {
+        'title': f'Recipe {index}',
+        'time_minutes': 20,
+        'price': '4.50',
+        'tags': [{'name': f'Tag {index % 10}'}, {'name': 'Dinner'}],
+        'ingredients': [
+            {'name': f'Ingredient {index % 25}'} for index in range(8)
+        ],
+    }
+
+
+def main():
+    """Run the benchmark."""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from django.urls import reverse
+    from rest_framework.authtoken.models import Token
+    from rest_framework.test import APIClient
+
+    from core.models import Recipe, User
+
+    user = User.objects.create_user('bench@example.com', 'benchpass123')
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}'
+    )
+    list_url = reverse('recipe:recipe-list')
+    bulk_url = reverse('recipe:recipe-bulk')
+
+    for size in (10, 100, 500):
+        items = [payload(i) for i in range(size)]
+
+        def one_by_one():
+            for item in items:
+                client.post(list_url, item, format='json')
+
+        def bulk():
+            client.post(bulk_url, items, format='json')
+
+        for name, func in (('one-by-one', one_by_one), ('bulk', bulk)):
+            with CaptureQueriesContext(connection) as context:
+                func()
+            queries = len(context.captured_queries)
+            report(f'{name} x{size}', measure(func, repeat=3),
+                   queries=queries)
+            Recipe.objects.all().delete()
+
+
+if __name__ == '__main__':
+    setup()
+    with benchmark_database():
+        main()
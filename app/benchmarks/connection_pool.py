@@ -0,0 +1,75 @@
+"""
+Compare the latency of listing recipes with and without reusing database
+connections between requests.
+
+    python -m benchmarks.connection_pool
+"""
+from benchmarks import benchmark_database, measure, report, setup
+
+
+def main():
+    """Run the benchmark."""
+    from wsgiref.util import setup_testing_defaults
+
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.db import connection
+    from django.urls import reverse
+    from rest_framework.authtoken.models import Token
+
+    from core.db.pool import drain_pools, pool_stats
+    from core.models import Recipe, User
+    from recipe import cache
+
+    user = User.objects.create_user('bench@example.com', 'benchpass123')
+    Recipe.objects.bulk_create(
+        Recipe(user=user, title=f'Recipe {i}', time_minutes=10, price='5.00')
+        for i in range(20)
+    )
+    # The test client keeps the connection open between requests, so call
+    # the WSGI handler the way the application server does.
+    handler = WSGIHandler()
+    environ = {
+        'PATH_INFO': reverse('recipe:recipe-list'),
+        'SERVER_NAME': 'testserver',
+        'HTTP_AUTHORIZATION': (
+            f'Token {Token.objects.create(user=user).key}'
+        ),
+    }
+    setup_testing_defaults(environ)
+
+    def get():
+        """Make a request, closing the response as a server does."""
+        response = handler(dict(environ), lambda status, headers: None)
+        response.close()
+    settings_dict = connection.settings_dict
+    configurations = (
+        ('new connection per request', 0, {'MAX_SIZE': 0}),
+        ('CONN_MAX_AGE=60', 60, {'MAX_SIZE': 0}),
+        ('pool', 0, settings_dict['POOL']),
+    )
+
+    for name, max_age, pool in configurations:
+        connection.close()
+        drain_pools()
+        connection.settings_dict = {
+            **settings_dict, 'CONN_MAX_AGE': max_age, 'POOL': pool
+        }
+
+        def list_recipes():
+            for _ in range(50):
+                # Skip the response cache so every request hits the
+                # database.
+                cache.get_cache().clear()
+                get()
+
+        list_recipes()
+        report(f'{name} x50 requests', measure(list_recipes))
+
+    connection.close()
+    print(pool_stats())
+
+
+if __name__ == '__main__':
+    setup()
+    with benchmark_database():
+        main()
@@ -0,0 +1,75 @@
+"""
+Compare uploading a photo while making its variants in the request with
+queueing it for the workers, and the bytes of the original with those of
+its variants.
+
+    python -m benchmarks.image_pipeline
+"""
+import io
+import os
+import shutil
+import tempfile
+
+from benchmarks import benchmark_database, measure, report, setup
+
+
+def make_photo(width=4000, height=3000):
+    """Return the content of a noisy camera sized JPEG."""
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.effect_noise((width, height), 40).convert('RGB').save(
+        buffer, 'JPEG', quality=92
+    )
+    return buffer.getvalue()
+
+
+def main():
+    """Run the benchmark."""
+    from django.core.files.storage import default_storage
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from django.test import override_settings
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    from core.models import Recipe, User
+    from recipe import images
+
+    media_root = tempfile.mkdtemp()
+    override_settings(MEDIA_ROOT=media_root).enable()
+    user = User.objects.create_user('bench@example.com', 'benchpass123')
+    recipe = Recipe.objects.create(user=user, title='Recipe',
+                                   time_minutes=10, price='5.00')
+    client = APIClient()
+    client.force_authenticate(user)
+    url = reverse('recipe:recipe-upload-image', args=[recipe.id])
+    photo = make_photo()
+
+    def upload():
+        client.post(url, {
+            'image': SimpleUploadedFile('photo.jpg', photo, 'image/jpeg')
+        }, format='multipart')
+
+    def upload_and_process():
+        upload()
+        images.process_pending(limit=1)
+
+    try:
+        report('upload, variants made inline', measure(upload_and_process))
+        report('upload, variants queued', measure(upload))
+        images.process_pending(limit=1)
+
+        recipe.refresh_from_db()
+        print(f'{"original":<40} {os.path.getsize(recipe.image.path):>9} B')
+        for name, variant in recipe.image_variants.items():
+            for key in images.FORMATS:
+                size = default_storage.size(variant[key])
+                print(f'{name + " " + key:<40} {size:>9} B')
+    finally:
+        shutil.rmtree(media_root)
+
+
+if __name__ == '__main__':
+    setup()
+    with benchmark_database():
+        main()
@@ -0,0 +1,79 @@
+"""
+Compare rendering and parsing a page of recipes with DRF's JSON renderer
+and parser and with the orjson ones.
+
+    python -m benchmarks.json_rendering
+"""
+import io
+import random
+from decimal import Decimal
+
+from benchmarks import benchmark_database, measure, report, setup
+
+
+RECIPES = 1000
+TAGS = 30
+INGREDIENTS = 100
+
+
+def seed():
+    """Create a user with recipes linked to tags and ingredients."""
+    from core.models import Ingredient, Recipe, Tag, User
+
+    rng = random.Random(0)
+    user = User.objects.create_user('bench@example.com', 'benchpass123')
+    tags = Tag.objects.bulk_create(
+        Tag(user=user, name=f'Tag {i}') for i in range(TAGS)
+    )
+    ingredients = Ingredient.objects.bulk_create(
+        Ingredient(user=user, name=f'Ingredient {i}')
+        for i in range(INGREDIENTS)
+    )
+    recipes = Recipe.objects.bulk_create(
+        Recipe(user=user, title=f'Recipe {i}', time_minutes=i % 120,
+               price=Decimal(rng.randint(100, 5000)) / 100,
+               description='Mix and bake. ' * 20)
+        for i in range(RECIPES)
+    )
+    for recipe in recipes:
+        recipe.tags.add(*rng.sample(tags, 3))
+        recipe.ingredients.add(*rng.sample(ingredients, 8))
+
+    return user
+
+
+def main():
+    """Run the benchmark."""
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+
+    from core.models import Recipe
+    from core.parsers import ORJSONParser
+    from core.renderers import ORJSONRenderer
+    from recipe.serializers import RecipeDetailSerializer
+
+    user = seed()
+    recipes = Recipe.objects.filter(user=user).prefetch_related(
+        'tags', 'ingredients'
+    )
+    data = RecipeDetailSerializer(recipes, many=True).data
+    body = JSONRenderer().render(data)
+
+    for name, renderer in (('DRF', JSONRenderer()),
+                           ('orjson', ORJSONRenderer())):
+        report(f'render {RECIPES} recipes, {name}',
+               measure(lambda: renderer.render(data), repeat=20),
+               bytes=len(renderer.render(data)))
+
+    context = {'encoding': 'utf-8'}
+    for name, parser in (('DRF', JSONParser()), ('orjson', ORJSONParser())):
+        report(f'parse {RECIPES} recipes, {name}',
+               measure(lambda: parser.parse(io.BytesIO(body),
+                                            'application/json', context),
+                       repeat=20))
+
+
+if __name__ == '__main__':
+    setup()
+    with benchmark_database():
+        main()
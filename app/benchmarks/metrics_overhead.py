@@ -0,0 +1,58 @@
+"""
+Measure the cost of counting a request for the metrics.
+
+    python -m benchmarks.metrics_overhead
+"""
+from benchmarks import measure, report, setup
+
+REQUESTS = 100000
+
+
+def main():
+    """Run the benchmark."""
+    from django.http import HttpResponse
+    from django.test import RequestFactory
+    from django.urls import resolve
+
+    from core import metrics
+    from core.middleware import MetricsMiddleware
+
+    request = RequestFactory().get('/api/health-check')
+    request.resolver_match = resolve('/api/health-check')
+    response = HttpResponse(b'{"healthy":true}')
+
+    def bare():
+        for _ in range(REQUESTS):
+            response
+
+    def instrumented(middleware):
+        def run():
+            for _ in range(REQUESTS):
+                middleware(request)
+
+        return run
+
+    def observe():
+        for _ in range(REQUESTS):
+            metrics.registry.observe_request('health-check', 'GET', 200,
+                                             0.001, 1, 0.0005, 16)
+
+    baseline = min(measure(instrumented(lambda request: response)))
+    for name, func in (
+        ('loop', bare),
+        ('observe_request', observe),
+        ('middleware', instrumented(MetricsMiddleware(
+            lambda request: response
+        ))),
+    ):
+        timings = measure(func)
+        per_request = min(timings) * 1000 / REQUESTS
+        if name == 'middleware':
+            per_request -= baseline * 1000 / REQUESTS
+        report(f'{name} x{REQUESTS}', timings,
+               us_per_request=f'{per_request:.2f}')
+
+
+if __name__ == '__main__':
+    setup()
+    main()
@@ -0,0 +1,95 @@
+"""
+Compare filtering recipes and tags with JOIN + DISTINCT and with EXISTS
+semi-joins on a seeded account, and show the plans Postgres picks.
+
+    python -m benchmarks.recipe_filters
+"""
+import random
+
+from benchmarks import benchmark_database, measure, report, setup
+
+
+RECIPES = 20000
+TAGS = 30
+TAGS_PER_RECIPE = 3
+PAGE_SIZE = 101
+
+
+def seed():
+    """Create an account with many described and tagged recipes."""
+    from django.db import connection
+
+    from core.models import Recipe, Tag, User
+
+    user = User.objects.create_user('bench@example.com', 'benchpass123')
+    tags = Tag.objects.bulk_create(
+        Tag(user=user, name=f'Tag {i}') for i in range(TAGS)
+    )
+    recipes = Recipe.objects.bulk_create(
+        Recipe(user=user, title=f'Recipe {i}', time_minutes=10,
+               price='5.00', description='Slowly cooked. ' * 60)
+        for i in range(RECIPES)
+    )
+    rng = random.Random(0)
+    Recipe.tags.through.objects.bulk_create(
+        Recipe.tags.through(recipe_id=recipe.id, tag_id=tag.id)
+        for recipe in recipes
+        for tag in rng.sample(tags, TAGS_PER_RECIPE)
+    )
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+    return user, [tag.id for tag in tags]
+
+
+def main():
+    """Run the benchmark."""
+    from django.db.models import Count, Exists, OuterRef
+
+    from core.models import Recipe, Tag
+
+    user, tag_ids = seed()
+    tag_ids = tag_ids[:5]
+    recipes = Recipe.objects.filter(user=user).order_by('-id')
+    tags = Tag.objects.filter(user=user).order_by('-name', '-id')
+    through = Recipe.tags.through
+
+    cases = {
+        'recipes, any of 5 tags, JOIN+DISTINCT': recipes.filter(
+            tags__id__in=tag_ids
+        ).distinct(),
+        'recipes, any of 5 tags, EXISTS': recipes.filter(Exists(
+            through.objects.filter(recipe_id=OuterRef('pk'),
+                                   tag_id__in=tag_ids)
+        )),
+        'recipes, all of 2 tags, grouped': recipes.filter(
+            id__in=through.objects.filter(tag_id__in=tag_ids[:2]).values(
+                'recipe_id'
+            ).annotate(matches=Count('tag_id')).filter(matches=2).values(
+                'recipe_id'
+            )
+        ),
+        'tags, assigned only, JOIN+DISTINCT': tags.filter(
+            recipe__isnull=False
+        ).distinct(),
+        'tags, assigned only, EXISTS': tags.filter(Exists(
+            through.objects.filter(tag_id=OuterRef('pk'))
+        )),
+    }
+
+    for name, queryset in cases.items():
+        page = queryset[:PAGE_SIZE]
+        plan = page.explain().splitlines()
+        nodes = [plan[0]] + [
+            line for line in plan if line.lstrip().startswith('->')
+        ]
+        report(name, measure(lambda: list(page.all()), repeat=10),
+               plan=' > '.join(
+                   node.strip(' ->').split('  ')[0] for node in nodes[:4]
+               ))
+
+
+if __name__ == '__main__':
+    setup()
+    with benchmark_database():
+        main()
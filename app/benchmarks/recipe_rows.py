@@ -0,0 +1,91 @@
+"""
+Compare serializing recipe lists through ``RecipeSerializer`` and from
+rows, in time and in memory allocated, for lists of 10, 1k and 10k
+recipes.
+
+    python -m benchmarks.recipe_rows
+"""
+import random
+import tracemalloc
+from decimal import Decimal
+
+from benchmarks import benchmark_database, measure, report, setup
+
+
+SIZES = [10, 1000, 10000]
+TAGS = 30
+INGREDIENTS = 100
+
+
+def seed():
+    """Create a user with recipes linked to tags and ingredients."""
+    from core.models import Ingredient, Recipe, Tag, User
+
+    rng = random.Random(0)
+    user = User.objects.create_user('bench@example.com', 'benchpass123')
+    tags = Tag.objects.bulk_create(
+        Tag(user=user, name=f'Tag {i}') for i in range(TAGS)
+    )
+    ingredients = Ingredient.objects.bulk_create(
+        Ingredient(user=user, name=f'Ingredient {i}')
+        for i in range(INGREDIENTS)
+    )
+    recipes = Recipe.objects.bulk_create(
+        Recipe(user=user, title=f'Recipe {i}', time_minutes=i % 120,
+               price=Decimal(rng.randint(100, 5000)) / 100)
+        for i in range(max(SIZES))
+    )
+    Recipe.tags.through.objects.bulk_create(
+        Recipe.tags.through(recipe_id=recipe.id, tag_id=tag.id)
+        for recipe in recipes for tag in rng.sample(tags, 3)
+    )
+    Recipe.ingredients.through.objects.bulk_create(
+        Recipe.ingredients.through(recipe_id=recipe.id,
+                                   ingredient_id=ingredient.id)
+        for recipe in recipes for ingredient in rng.sample(ingredients, 8)
+    )
+
+    return user
+
+
+def allocated(func):
+    """Return the peak memory allocated by ``func`` in KiB."""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] // 1024
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    """Run the benchmark."""
+    from core.models import Recipe
+    from recipe import rows
+    from recipe.serializers import RecipeSerializer
+
+    user = seed()
+    queryset = Recipe.objects.filter(user=user).order_by('-id')
+    serializer = RecipeSerializer()
+
+    for size in SIZES:
+        def with_serializer():
+            recipes = queryset.prefetch_related('tags', 'ingredients')
+            return RecipeSerializer(recipes[:size], many=True).data
+
+        def from_rows():
+            page = list(rows.values_queryset(serializer, queryset)[:size])
+            return rows.serialize_rows(serializer, page)
+
+        repeat = 20 if size < 10000 else 5
+        report(f'{size} recipes, serializer',
+               measure(with_serializer, repeat=repeat),
+               kib=allocated(with_serializer))
+        report(f'{size} recipes, rows', measure(from_rows, repeat=repeat),
+               kib=allocated(from_rows))
+
+
+if __name__ == '__main__':
+    setup()
+    with benchmark_database():
+        main()
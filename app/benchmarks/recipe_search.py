@@ -0,0 +1,92 @@
+"""
+Compare searching recipes through the indexed search vectors with
+matching the words with ILIKE, and time the batched backfill.
+
+    python -m benchmarks.recipe_search
+"""
+import io
+import random
+
+from benchmarks import benchmark_database, measure, report, setup
+
+
+USERS = 20
+RECIPES_PER_USER = 10000
+VOCABULARY = 5000
+
+
+def make_words(rng):
+    """Return a vocabulary of made up words."""
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    return list(dict.fromkeys(
+        ''.join(rng.choices(letters, k=7)) for _ in range(VOCABULARY)
+    ))
+
+
+def seed():
+    """Create accounts with many described recipes."""
+    from django.db import connection
+
+    from core.models import Recipe, User
+
+    rng = random.Random(0)
+    words = make_words(rng)
+    users = [
+        User.objects.create_user(f'bench{i}@example.com', 'benchpass123')
+        for i in range(USERS)
+    ]
+    for user in users:
+        Recipe.objects.bulk_create(
+            Recipe(
+                user=user,
+                title=' '.join(rng.sample(words, 3)),
+                description=' '.join(rng.choices(words, k=80)),
+                time_minutes=10,
+                price='5.00'
+            )
+            for _ in range(RECIPES_PER_USER)
+        )
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE core_recipe')
+
+    return users[0], words
+
+
+def main():
+    """Run the benchmark."""
+    from django.contrib.postgres.search import SearchQuery, SearchRank
+    from django.core.management import call_command
+    from django.db.models import F, Q
+
+    from core.models import Recipe
+
+    user, words = seed()
+    recipes = Recipe.objects.filter(user=user)
+
+    report(
+        f'backfill {USERS * RECIPES_PER_USER} recipes',
+        measure(lambda: call_command('update_search_vectors',
+                                     stdout=io.StringIO()), repeat=1)
+    )
+
+    first, second = words[:2]
+    query = SearchQuery(f'{first} {second}', search_type='websearch',
+                        config='english')
+    ranked = recipes.filter(search_vector=query).annotate(
+        rank=SearchRank(F('search_vector'), query)
+    ).order_by('-rank', '-id')[:100]
+    ilike = recipes.filter(
+        Q(title__icontains=first) | Q(description__icontains=first),
+        Q(title__icontains=second) | Q(description__icontains=second),
+    ).order_by('-id')[:100]
+
+    report('search vector, ranked page', measure(lambda: list(ranked.all())),
+           rows=len(ranked.all()))
+    report('ILIKE on title and description',
+           measure(lambda: list(ilike.all())), rows=len(ilike.all()))
+
+
+if __name__ == '__main__':
+    setup()
+    with benchmark_database():
+        main()
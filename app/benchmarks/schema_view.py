@@ -0,0 +1,37 @@
+"""
+Compare generating the OpenAPI schema per request with the cached one.
+
+    python -m benchmarks.schema_view
+"""
+import logging
+
+from benchmarks import measure, report, setup
+
+
+def main():
+    """Run the benchmark."""
+    from drf_spectacular.views import SpectacularAPIView
+    from rest_framework.test import APIRequestFactory
+
+    from core import schema
+    from core.views import SchemaView
+
+    logging.disable(logging.WARNING)
+    factory = APIRequestFactory()
+    schema.clear()
+
+    for name, view in (('generated', SpectacularAPIView.as_view()),
+                       ('cached', SchemaView.as_view())):
+
+        def get():
+            response = view(factory.get('/api/schema/'))
+            if hasattr(response, 'render'):
+                response.render()
+
+        get()
+        report(f'{name} /api/schema/', measure(get, repeat=10))
+
+
+if __name__ == '__main__':
+    setup()
+    main()
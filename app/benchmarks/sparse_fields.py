@@ -0,0 +1,82 @@
+"""
+Compare listing pages of recipes in full with listing them narrowed with
+``fields`` and ``expand``.
+
+    python -m benchmarks.sparse_fields
+"""
+import random
+from decimal import Decimal
+
+from benchmarks import benchmark_database, measure, report, setup
+
+
+RECIPES = 1000
+TAGS = 30
+INGREDIENTS = 100
+PAGE_SIZE = 100
+
+
+def seed():
+    """Create a user with described recipes linked to many attributes."""
+    from core.models import Ingredient, Recipe, Tag, User
+
+    rng = random.Random(0)
+    user = User.objects.create_user('bench@example.com', 'benchpass123')
+    tags = Tag.objects.bulk_create(
+        Tag(user=user, name=f'Tag {i}') for i in range(TAGS)
+    )
+    ingredients = Ingredient.objects.bulk_create(
+        Ingredient(user=user, name=f'Ingredient {i}')
+        for i in range(INGREDIENTS)
+    )
+    recipes = Recipe.objects.bulk_create(
+        Recipe(user=user, title=f'Recipe {i}', time_minutes=i % 120,
+               price=Decimal(rng.randint(100, 5000)) / 100,
+               description='Mix and bake. ' * 20)
+        for i in range(RECIPES)
+    )
+    Recipe.tags.through.objects.bulk_create(
+        Recipe.tags.through(recipe_id=recipe.id, tag_id=tag.id)
+        for recipe in recipes for tag in rng.sample(tags, 3)
+    )
+    Recipe.ingredients.through.objects.bulk_create(
+        Recipe.ingredients.through(recipe_id=recipe.id,
+                                   ingredient_id=ingredient.id)
+        for recipe in recipes for ingredient in rng.sample(ingredients, 8)
+    )
+
+    return user
+
+
+def main():
+    """Run the benchmark."""
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    from recipe import cache
+
+    user = seed()
+    client = APIClient()
+    client.force_authenticate(user)
+    url = reverse('recipe:recipe-list')
+
+    for name, params in (
+        ('full', {}),
+        ('not expanded', {'expand': ''}),
+        ('fields=id,title,price', {'fields': 'id,title,price'}),
+    ):
+        params['page_size'] = PAGE_SIZE
+
+        def get():
+            # Skip the response cache, the view is measured.
+            cache.get_cache().clear()
+            return client.get(url, params)
+
+        report(f'list {PAGE_SIZE} recipes, {name}', measure(get, repeat=20),
+               bytes=len(get().content))
+
+
+if __name__ == '__main__':
+    setup()
+    with benchmark_database():
+        main()
@@ -0,0 +1,50 @@
+"""
+Compare the cached token authentication with the stock one.
+
+    python -m benchmarks.token_auth
+"""
+from benchmarks import benchmark_database, measure, report, setup
+
+
+def main():
+    """Run the benchmark."""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from rest_framework.authentication import TokenAuthentication
+    from rest_framework.authtoken.models import Token
+    from rest_framework.test import APIRequestFactory
+
+    from core.authentication import CachedTokenAuthentication, local_cache
+    from core.models import User
+
+    users = [
+        User.objects.create_user(f'bench{i}@example.com', 'benchpass123')
+        for i in range(100)
+    ]
+    requests = [
+        APIRequestFactory().get(
+            '/', HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=u)}'
+        )
+        for u in users
+    ]
+    local_cache.clear()
+
+    for name, auth in (('stock', TokenAuthentication()),
+                       ('cached', CachedTokenAuthentication())):
+
+        def authenticate():
+            for _ in range(10):
+                for request in requests:
+                    auth.authenticate(request)
+
+        authenticate()
+        with CaptureQueriesContext(connection) as context:
+            authenticate()
+        report(f'{name} x1000 requests', measure(authenticate),
+               queries=len(context.captured_queries))
+
+
+if __name__ == '__main__':
+    setup()
+    with benchmark_database():
+        main()
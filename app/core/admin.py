@@ -3,9 +3,11 @@ Django admin customization.
 """
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.http import Http404, HttpResponse
+from django.template.response import TemplateResponse
 from django.utils.translation import gettext_lazy as _
 
-from core import models
+from core import models, profiling
 
 
 class UserAdmin(BaseUserAdmin):
@@ -49,3 +51,44 @@ admin.site.register(models.User, UserAdmin)
 admin.site.register(models.Recipe)
 admin.site.register(models.Tag)
 admin.site.register(models.Ingredient)
+admin.site.index_template = 'admin/core/index.html'
+
+
+def profile_list(request):
+    """Lists the saved request profiles, newest first."""
+    reports = filter(None, map(profiling.load_report, profiling.report_ids()))
+    return TemplateResponse(request, 'admin/core/profile_list.html', {
+        **admin.site.each_context(request),
+        'title': _('Request profiles'),
+        'reports': reports,
+    })
+
+
+def _get_report(report_id):
+    """Return a saved report or raise 404."""
+    report = profiling.load_report(report_id)
+    if report is None:
+        raise Http404('No such profile.')
+    return report
+
+
+def profile_detail(request, report_id):
+    """Shows the hottest functions and the queries of a request profile."""
+    report = _get_report(report_id)
+    return TemplateResponse(request, 'admin/core/profile_detail.html', {
+        **admin.site.each_context(request),
+        'title': f'{report["method"]} {report["path"]}',
+        'report': report,
+        'functions': profiling.hottest_functions(report['stacks']),
+    })
+
+
+def profile_stacks(request, report_id):
+    """Returns the folded stacks of a request profile for flame graphs."""
+    report = _get_report(report_id)
+    response = HttpResponse(report['stacks'],
+                            content_type='text/plain; charset=utf-8')
+    response['Content-Disposition'] = (
+        f'attachment; filename="{report_id}.folded"'
+    )
+    return response
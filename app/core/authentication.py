@@ -0,0 +1,144 @@
+"""
+Token authentication with the token to user mapping cached.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from core import metrics
+
+
+class LocalTokenCache:
+    """Bounded least recently used cache of users with a time to live."""
+
+    def __init__(self, max_entries, timeout):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.max_entries = max_entries
+        self.timeout = timeout
+
+    def get(self, key):
+        """Return the cached user of a token or ``None``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            user, expires = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+
+        # Requests may change their user, so they don't share one object.
+        return copy.copy(user)
+
+    def set(self, key, user):
+        """Cache the user of a token, evicting the oldest entry if full."""
+        with self._lock:
+            self._entries[key] = (
+                copy.copy(user), time.monotonic() + self.timeout
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        """Remove a token from the cache."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Remove all the tokens from the cache."""
+        with self._lock:
+            self._entries.clear()
+
+
+local_cache = LocalTokenCache(
+    settings.AUTH_TOKEN_CACHE_MAX_ENTRIES,
+    settings.AUTH_TOKEN_CACHE_LOCAL_TIMEOUT
+)
+
+
+def get_shared_cache():
+    """Return the cache shared between processes or ``None``."""
+    alias = settings.AUTH_TOKEN_CACHE_ALIAS
+    return caches[alias] if alias else None
+
+
+def _cache_key(key):
+    """Return the shared cache key of a token."""
+    return f'auth-token:{key}'
+
+
+def forget_tokens(keys):
+    """
+    Drop tokens from the caches.
+
+    The tokens are dropped again on commit, so a user cached by a
+    concurrent request before the transaction committed isn't served.
+    """
+    keys = list(keys)
+
+    def forget():
+        for key in keys:
+            local_cache.delete(key)
+        shared_cache = get_shared_cache()
+        if shared_cache is not None:
+            shared_cache.delete_many([_cache_key(key) for key in keys])
+
+    forget()
+    transaction.on_commit(forget)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication serving warm requests without queries.
+
+    Users are looked up in a small in-process cache first, then in the
+    shared cache when ``AUTH_TOKEN_CACHE_ALIAS`` is set. Entries are
+    dropped when the user is saved or deleted and when the token is
+    deleted. Other processes drop their in-process entries once
+    ``AUTH_TOKEN_CACHE_LOCAL_TIMEOUT`` expires, so keep it short.
+    """
+
+    def authenticate_credentials(self, key):
+        """Return the user and token of a key, cached when possible."""
+        user = local_cache.get(key)
+        metrics.registry.observe_cache('auth_tokens_local',
+                                       hit=user is not None)
+
+        if user is None:
+            shared_cache = get_shared_cache()
+            if shared_cache is not None:
+                user = shared_cache.get(_cache_key(key))
+                metrics.registry.observe_cache('auth_tokens_shared',
+                                               hit=user is not None)
+
+            if user is None:
+                user, _token = super().authenticate_credentials(key)
+                if shared_cache is not None:
+                    shared_cache.set(_cache_key(key), user,
+                                     settings.AUTH_TOKEN_CACHE_TIMEOUT)
+
+            local_cache.set(key, user)
+
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.')
+            )
+
+        return user, self._make_token(key, user)
+
+    def _make_token(self, key, user):
+        """Return an unsaved token instance for ``request.auth``."""
+        return self.get_model()(key=key, user=user)
@@ -0,0 +1,61 @@
+"""
+PostgreSQL backend handing out connections from a per-process pool.
+
+Set ``POOL`` in the database settings to enable the pool, e.g.
+``{'MAX_SIZE': 10, 'TIMEOUT': 10, 'HEALTH_CHECK_INTERVAL': 30,
+'MAX_IDLE': 300}``. Closing a connection then returns it to the pool,
+so ``CONN_MAX_AGE`` should stay at 0 to share the pool between threads.
+
+The queries run by requests are counted for the metrics, and the slow
+ones are logged, see ``core.db.slow_queries``.
+"""
+from functools import partial
+
+from django.db.backends.postgresql import base
+
+from core.db.backends.postgresql.creation import DatabaseCreation
+from core.db.slow_queries import log_slow_query
+from core.metrics import count_query
+from core.db.pool import get_pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """Database wrapper checking connections out of a pool."""
+    creation_class = DatabaseCreation
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = None
+        # The slow query log goes first, so the time it spends isn't
+        # counted as the query's.
+        self.execute_wrappers.append(log_slow_query)
+        self.execute_wrappers.append(count_query)
+
+    def get_new_connection(self, conn_params):
+        """Return a connection from the pool when it's enabled."""
+        options = self.settings_dict.get('POOL') or {}
+        if not options.get('MAX_SIZE'):
+            self.pool = None
+            return super().get_new_connection(conn_params)
+
+        self.pool = get_pool(self.alias, conn_params, options)
+        connection = self.pool.acquire(
+            partial(super().get_new_connection, conn_params)
+        )
+        self.isolation_level = self.settings_dict['OPTIONS'].get(
+            'isolation_level', connection.isolation_level
+        )
+        return connection
+
+    def _close(self):
+        """Return the connection to the pool instead of closing it."""
+        if self.pool is None or self.connection is None:
+            return super()._close()
+
+        with self.wrap_database_errors:
+            if self.in_atomic_block:
+                # The wrapper keeps the connection until the block exits,
+                # so it can't be handed to another thread yet.
+                self.pool.discard(self.connection)
+            else:
+                self.pool.release(self.connection)
@@ -0,0 +1,20 @@
+"""
+Test database creation closing pooled connections first.
+"""
+from django.db.backends.postgresql import creation
+
+from core.db.pool import drain_pools
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    """Database creation aware of idle pooled connections."""
+
+    def _clone_test_db(self, suffix, verbosity, keepdb=False):
+        """Clone the test database once no idle connection uses it."""
+        drain_pools()
+        super()._clone_test_db(suffix, verbosity, keepdb)
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        """Destroy the test database once no idle connection uses it."""
+        drain_pools()
+        super()._destroy_test_db(test_database_name, verbosity)
@@ -0,0 +1,202 @@
+"""
+Bounded pools of database connections shared by the threads of a process.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+import psycopg2
+from psycopg2 import extensions
+
+
+class ConnectionPool:
+    """
+    Pool of psycopg2 connections to one database.
+
+    At most ``max_size`` connections are open at a time, a thread asking
+    for one while all are checked out waits up to ``timeout`` seconds.
+    Connections idle for longer than ``health_check_interval`` seconds are
+    pinged before being handed out, and replaced if the ping fails.
+    """
+
+    def __init__(self, max_size, timeout, health_check_interval, max_idle,
+                 name=None):
+        self.name = name
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.max_idle = max_idle
+        self._condition = threading.Condition()
+        self._idle = deque()
+        self._pid = os.getpid()
+        self._inherited = []
+        self.checked_out = 0
+        self.connects = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.reconnects = 0
+
+    def acquire(self, connect):
+        """Return an idle connection or one opened with ``connect``."""
+        with self._condition:
+            self._check_pid()
+            if self.checked_out >= self.max_size:
+                self.waits += 1
+                if not self._condition.wait_for(
+                    lambda: self.checked_out < self.max_size, self.timeout
+                ):
+                    self.timeouts += 1
+                    raise psycopg2.OperationalError(
+                        f'No database connection became available in '
+                        f'{self.timeout} seconds.'
+                    )
+            self.checked_out += 1
+            idle = self._idle.pop() if self._idle else None
+
+        try:
+            connection = self._check(*idle) if idle else None
+            if connection is None:
+                connection = connect()
+                with self._condition:
+                    self.connects += 1
+        except BaseException:
+            self._checked_in()
+            raise
+
+        return connection
+
+    def release(self, connection):
+        """Return a connection to the pool, closing it if it's unusable."""
+        usable = not connection.closed
+        if usable:
+            try:
+                if connection.get_transaction_status() != (
+                    extensions.TRANSACTION_STATUS_IDLE
+                ):
+                    connection.rollback()
+            except psycopg2.Error:
+                usable = False
+
+        with self._condition:
+            if usable and self._pid == os.getpid():
+                self._idle.append((connection, time.monotonic()))
+                connection = None
+            self._checked_in()
+
+        if connection is not None:
+            self._close(connection)
+
+    def discard(self, connection):
+        """Close a checked out connection instead of reusing it."""
+        self._close(connection)
+        with self._condition:
+            self._checked_in()
+
+    def drain(self):
+        """Close the idle connections."""
+        with self._condition:
+            idle = [connection for connection, _ in self._idle]
+            self._idle.clear()
+
+        for connection in idle:
+            self._close(connection)
+
+    def stats(self):
+        """Return the counters of the pool."""
+        with self._condition:
+            return {
+                'database': self.name,
+                'max_size': self.max_size,
+                'idle': len(self._idle),
+                'checked_out': self.checked_out,
+                'connects': self.connects,
+                'waits': self.waits,
+                'timeouts': self.timeouts,
+                'reconnects': self.reconnects,
+            }
+
+    def _check(self, connection, released_at):
+        """Return the connection if it's still usable, otherwise ``None``."""
+        idle_for = time.monotonic() - released_at
+
+        if not connection.closed and idle_for <= self.max_idle:
+            if idle_for <= self.health_check_interval:
+                return connection
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                return connection
+            except psycopg2.Error:
+                pass
+
+        self._close(connection)
+        with self._condition:
+            self.reconnects += 1
+        return None
+
+    def _checked_in(self):
+        """Free a slot and wake up a waiting thread."""
+        with self._condition:
+            self.checked_out -= 1
+            self._condition.notify()
+
+    def _check_pid(self):
+        """Forget the connections inherited from a parent process."""
+        if self._pid != os.getpid():
+            # Closing them would end the parent's sessions, so keep them
+            # referenced instead of letting them be garbage collected.
+            self._inherited.extend(self._idle)
+            self._idle.clear()
+            self.checked_out = 0
+            self._pid = os.getpid()
+
+    @staticmethod
+    def _close(connection):
+        """Close a connection, ignoring errors of broken ones."""
+        try:
+            connection.close()
+        except psycopg2.Error:
+            pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, conn_params, options):
+    """Return the pool of a database, creating it on first use."""
+    key = (alias, repr(sorted(conn_params.items())))
+
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(
+                max_size=options['MAX_SIZE'],
+                timeout=options.get('TIMEOUT', 10),
+                health_check_interval=options.get(
+                    'HEALTH_CHECK_INTERVAL', 30
+                ),
+                max_idle=options.get('MAX_IDLE', 300),
+                name=conn_params.get('database')
+            )
+        return _pools[key]
+
+
+def drain_pools():
+    """Close the idle connections of all the pools."""
+    with _pools_lock:
+        pools = list(_pools.values())
+
+    for pool in pools:
+        pool.drain()
+
+
+def pool_stats():
+    """Return the counters of the pools with their database alias."""
+    with _pools_lock:
+        pools = list(_pools.items())
+
+    return [
+        {'alias': alias, **pool.stats()}
+        for (alias, _), pool in pools
+    ]
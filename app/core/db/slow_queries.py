@@ -0,0 +1,237 @@
+"""
+Log of the slow database queries.
+
+Queries taking ``SLOW_QUERY_THRESHOLD_MS`` or longer are appended as JSON
+lines to ``SLOW_QUERY_LOG``, rotated once it reaches
+``SLOW_QUERY_LOG_MAX_BYTES`` with ``SLOW_QUERY_LOG_BACKUPS`` older files
+kept. Each entry holds the SQL, its fingerprint, the view of the request
+running it and the app frames of the stack. ``SLOW_QUERY_EXPLAIN_RATE``
+of the slow ``SELECT`` queries are run again under ``EXPLAIN (ANALYZE,
+BUFFERS)`` to log their plan. Parameters aren't logged. See the
+``slow_queries`` command to read the log.
+"""
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import threading
+import traceback
+from logging.handlers import RotatingFileHandler
+from time import perf_counter
+
+from django.conf import settings
+from django.utils import timezone
+
+from core import metrics
+
+
+logger = logging.getLogger(__name__)
+
+# Only the entries go to this logger, through the handler of the log file.
+store = logging.getLogger(f'{__name__}.store')
+store.propagate = False
+store.setLevel(logging.INFO)
+_handler_lock = threading.Lock()
+
+_NORMALIZE = [
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),
+    (re.compile(r'(?:\(\.\.\.\)\s*,\s*)+\(\.\.\.\)'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+]
+
+
+def normalize(sql):
+    """Return the SQL with its literals and lists of values collapsed."""
+    for pattern, replacement in _NORMALIZE:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def fingerprint(normalized_sql):
+    """Return a short id of normalized SQL."""
+    return hashlib.sha1(normalized_sql.encode()).hexdigest()[:16]
+
+
+def log_slow_query(execute, sql, params, many, context):
+    """Database execute wrapper logging the slow queries."""
+    if settings.SLOW_QUERY_LOG is None:
+        return execute(sql, params, many, context)
+
+    start = perf_counter()
+    failed = True
+    try:
+        result = execute(sql, params, many, context)
+        failed = False
+        return result
+    finally:
+        ms = (perf_counter() - start) * 1000
+        if ms >= settings.SLOW_QUERY_THRESHOLD_MS:
+            _record(sql, params, many, context['connection'], ms, failed)
+
+
+def _record(sql, params, many, connection, ms, failed):
+    """Log a slow query, with its plan for a sampled share of them."""
+    stats = metrics.current_request.get()
+    request = stats.request if stats is not None else None
+    match = request.resolver_match if request is not None else None
+    normalized = normalize(sql)
+    entry = {
+        'time': timezone.now().isoformat(),
+        'fingerprint': fingerprint(normalized),
+        'sql': normalized,
+        'ms': round(ms, 3),
+        'many': many,
+        'failed': failed,
+        'database': connection.alias,
+        'view': match.view_name if match else None,
+        'method': request.method if request is not None else None,
+        'path': request.path if request is not None else None,
+        'stack': _app_stack(),
+        'plan': None,
+    }
+    # Other statements would change data when run again, and so would
+    # the ones following a semicolon.
+    if (
+        not failed and not many
+        and sql.lstrip()[:6].upper() == 'SELECT'
+        and ';' not in sql.rstrip().rstrip(';')
+        and random.random() < settings.SLOW_QUERY_EXPLAIN_RATE
+    ):
+        entry['plan'] = _explain(connection, sql, params)
+
+    try:
+        _get_handler()
+        store.info(json.dumps(entry))
+    except OSError:
+        logger.exception('Writing the slow query log failed.')
+
+
+def _app_stack():
+    """Return the frames of the app's code running the query."""
+    base_dir = str(settings.BASE_DIR)
+    # The execute wrappers.
+    skipped = (os.path.dirname(__file__), metrics.__file__)
+    return [
+        f'{os.path.relpath(frame.filename, base_dir)}:{frame.lineno} '
+        f'in {frame.name}'
+        for frame in traceback.extract_stack()
+        if frame.filename.startswith(base_dir)
+        and not frame.filename.startswith(skipped)
+    ]
+
+
+def _explain(connection, sql, params):
+    """
+    Return the plan of a query run again, or ``None`` if it failed.
+
+    The EXPLAIN runs on the driver's cursor, out of the execute wrappers,
+    so it's neither counted in the request metrics nor logged in turn.
+    """
+    # The savepoint keeps a failing EXPLAIN from breaking the transaction
+    # the query runs in.
+    savepoint = not connection.get_autocommit()
+    with connection.connection.cursor() as cursor:
+        if savepoint:
+            cursor.execute('SAVEPOINT slow_query_explain')
+        try:
+            cursor.execute(f'EXPLAIN (ANALYZE, BUFFERS) {sql}', params)
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+        except connection.Database.Error:
+            if savepoint:
+                cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+            logger.warning('Explaining a slow query failed.', exc_info=True)
+            return None
+        if savepoint:
+            cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+
+    return plan
+
+
+class SharedRotatingFileHandler(RotatingFileHandler):
+    """
+    Rotating file handler of a log written by several processes.
+
+    A process reopens the file once another one rotated it, and the
+    rotations are serialized with a lock file so each happens once.
+    """
+
+    def emit(self, record):
+        """Write a record to the current file."""
+        self._reopen_if_rotated()
+        super().emit(record)
+
+    def doRollover(self):
+        """Rotate the file unless another process just did."""
+        with open(f'{self.baseFilename}.lock', 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            self._reopen_if_rotated()
+            if self.stream is None or (
+                os.fstat(self.stream.fileno()).st_size >= self.maxBytes
+            ):
+                super().doRollover()
+
+    def _reopen_if_rotated(self):
+        """Reopen the file if it was renamed."""
+        if self.stream is None:
+            return
+
+        try:
+            current = os.stat(self.baseFilename)
+        except FileNotFoundError:
+            current = None
+        if current is None or not os.path.samestat(
+            current, os.fstat(self.stream.fileno())
+        ):
+            self.stream.close()
+            self.stream = self._open()
+
+
+def _get_handler():
+    """Point the store at the configured log file."""
+    path = os.path.abspath(settings.SLOW_QUERY_LOG)
+    if store.handlers and store.handlers[0].baseFilename == path:
+        return
+
+    with _handler_lock:
+        if store.handlers and store.handlers[0].baseFilename == path:
+            return
+        for handler in list(store.handlers):
+            store.removeHandler(handler)
+            handler.close()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        handler = SharedRotatingFileHandler(
+            path, maxBytes=settings.SLOW_QUERY_LOG_MAX_BYTES,
+            backupCount=settings.SLOW_QUERY_LOG_BACKUPS, encoding='utf-8'
+        )
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        store.addHandler(handler)
+
+
+def log_files():
+    """Return the log file and its rotated backups, oldest first."""
+    path = settings.SLOW_QUERY_LOG
+    if path is None:
+        return []
+
+    files = [f'{path}.{index}'
+             for index in range(settings.SLOW_QUERY_LOG_BACKUPS, 0, -1)]
+    files.append(path)
+    return [file for file in files if os.path.exists(file)]
+
+
+def read_entries():
+    """Yield the logged entries, oldest first."""
+    for path in log_files():
+        with open(path, encoding='utf-8') as file:
+            for line in file:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # A line cut short by a crash or a concurrent write.
+                    continue
@@ -0,0 +1,21 @@
+"""
+Django command to write the OpenAPI schema files served by the proxy.
+"""
+from django.core.management.base import BaseCommand
+
+from core import schema
+
+
+class Command(BaseCommand):
+    """Django command to generate the OpenAPI schema once."""
+
+    help = 'Write the OpenAPI schema as YAML and JSON to SCHEMA_ROOT.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--directory',
+                            help='Directory to write to instead.')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        for path in schema.write(options['directory']):
+            self.stdout.write(f'Wrote {path}.')
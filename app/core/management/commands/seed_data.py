@@ -0,0 +1,311 @@
+"""
+Django command to generate a large dataset streamed in with COPY.
+"""
+import itertools
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.models import Ingredient, Recipe, Tag, User
+
+
+TAG_WORDS = [
+    'Vegan', 'Vegetarian', 'Quick', 'Dessert', 'Breakfast', 'Lunch',
+    'Dinner', 'Spicy', 'Healthy', 'Comfort', 'Italian', 'Mexican', 'Indian',
+    'Thai', 'Japanese', 'French', 'Greek', 'Soup', 'Salad', 'Baking',
+    'Grill', 'Snack', 'Party', 'Budget', 'Gluten free', 'Low carb',
+    'Seafood', 'Kids', 'Holiday', 'Summer', 'Winter', 'One pot',
+]
+INGREDIENT_WORDS = [
+    'Salt', 'Pepper', 'Olive oil', 'Butter', 'Garlic', 'Onion', 'Tomato',
+    'Egg', 'Flour', 'Sugar', 'Milk', 'Cream', 'Cheese', 'Rice', 'Pasta',
+    'Chicken', 'Beef', 'Pork', 'Salmon', 'Shrimp', 'Tofu', 'Lemon', 'Lime',
+    'Basil', 'Parsley', 'Cilantro', 'Ginger', 'Chili', 'Cumin', 'Paprika',
+    'Potato', 'Carrot', 'Celery', 'Spinach', 'Mushroom', 'Bell pepper',
+    'Zucchini', 'Eggplant', 'Chickpeas', 'Lentils', 'Beans', 'Honey',
+    'Vinegar', 'Soy sauce', 'Yogurt', 'Coconut milk', 'Bread', 'Avocado',
+]
+TITLE_WORDS = [
+    'roasted', 'creamy', 'spicy', 'grilled', 'crispy', 'slow cooked',
+    'lemon', 'garlic', 'herb', 'smoky', 'sweet', 'tangy', 'baked', 'fresh',
+    'chicken', 'salmon', 'tofu', 'pasta', 'curry', 'soup', 'salad', 'stew',
+    'tacos', 'risotto', 'pie', 'bowl', 'skewers', 'bread', 'cake', 'noodles',
+]
+DESCRIPTION_WORDS = TITLE_WORDS + [
+    'mix', 'stir', 'simmer', 'chop', 'season', 'serve', 'bake', 'whisk',
+    'until', 'golden', 'tender', 'minutes', 'with', 'and', 'the', 'a',
+    'heat', 'pan', 'oven', 'bowl', 'slowly', 'gently', 'taste', 'plate',
+]
+PASSWORD = 'seedpass123'
+
+
+def zipf_cum_weights(count, skew):
+    """Return the cumulative weights of ranks following Zipf's law."""
+    return list(itertools.accumulate(
+        1 / (rank ** skew) for rank in range(1, count + 1)
+    ))
+
+
+def names(words, count):
+    """Return ``count`` distinct names made from the words."""
+    result = words[:count]
+    for round_ in itertools.count(2):
+        if len(result) >= count:
+            return result[:count]
+        result.extend(f'{word} {round_}' for word in words)
+
+
+class CopyStream:
+    """File-like object reading generated rows in COPY text format."""
+
+    def __init__(self, rows):
+        self._lines = ('\t'.join(row) + '\n' for row in rows)
+        self._buffer = b''
+        self.rows = 0
+
+    def read(self, size=-1):
+        """Return up to ``size`` bytes of the rows."""
+        chunks = [self._buffer]
+        length = len(self._buffer)
+
+        for line in self._lines:
+            data = line.encode()
+            chunks.append(data)
+            length += len(data)
+            self.rows += 1
+            if 0 <= size <= length:
+                break
+
+        data = b''.join(chunks)
+        if size < 0:
+            size = len(data)
+        self._buffer = data[size:]
+        return data[:size]
+
+
+class Command(BaseCommand):
+    """Django command to generate users, tags, ingredients and recipes."""
+
+    help = (
+        'Generate a large dataset for load and performance tests. The rows '
+        'are streamed in with COPY and, ids and times aside, the same seed '
+        'gives the same data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=100000,
+                            help='Number of recipes of all the users.')
+        parser.add_argument('--tags-per-user', type=int, default=30)
+        parser.add_argument('--ingredients-per-user', type=int, default=100)
+        parser.add_argument('--tags-per-recipe', type=int, default=3,
+                            help='Average number of tags of a recipe.')
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8,
+                            help='Average number of ingredients of a recipe.')
+        parser.add_argument(
+            '--skew', type=float, default=1.0,
+            help=(
+                "Zipf exponent of the number of recipes of the users and "
+                "of the use of each user's tags and ingredients, 0 spreads "
+                "them evenly."
+            )
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--skip-search-vectors', action='store_true',
+            help='Leave the search vectors of the recipes empty.'
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if options['users'] < 1:
+            raise CommandError('At least one user is needed.')
+        if options['tags_per_user'] < 2 * options['tags_per_recipe'] or (
+            options['ingredients_per_user']
+            < 2 * options['ingredients_per_recipe']
+        ):
+            raise CommandError(
+                'Users need at least twice as many tags and ingredients '
+                'as their recipes have on average.'
+            )
+
+        self.options = options
+        self.now = timezone.now()
+        start = time.perf_counter()
+        users = options['users']
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            self.cursor = cursor
+            user_ids = self._reserve_ids(User, users)
+            tag_ids = self._reserve_ids(Tag, users * options['tags_per_user'])
+            ingredient_ids = self._reserve_ids(
+                Ingredient, users * options['ingredients_per_user']
+            )
+            recipe_ids = self._reserve_ids(Recipe, options['recipes'])
+
+            self._copy(User, ['id', 'password', 'is_superuser', 'email',
+                              'name', 'is_active', 'is_staff'],
+                       self._users(user_ids))
+            self._copy(Tag, ['id', 'name', 'user_id', 'updated_at'],
+                       self._attrs(TAG_WORDS, tag_ids, user_ids,
+                                   options['tags_per_user'], 'tags'))
+            self._copy(Ingredient, ['id', 'name', 'user_id', 'updated_at'],
+                       self._attrs(INGREDIENT_WORDS, ingredient_ids,
+                                   user_ids, options['ingredients_per_user'],
+                                   'ingredients'))
+            owners = self._owners(len(recipe_ids), users)
+            self._copy(Recipe, ['id', 'user_id', 'title', 'description',
+                                'time_minutes', 'price', 'link',
+                                'image_status', 'image_variants',
+                                'updated_at'],
+                       self._recipes(recipe_ids, owners, user_ids))
+            for field_name, per_user, per_recipe, ids in (
+                ('tags', 'tags_per_user', 'tags_per_recipe', tag_ids),
+                ('ingredients', 'ingredients_per_user',
+                 'ingredients_per_recipe', ingredient_ids),
+            ):
+                field = Recipe._meta.get_field(field_name)
+                self._copy(
+                    field.remote_field.through,
+                    ['recipe_id', f'{field.m2m_reverse_field_name()}_id'],
+                    self._links(recipe_ids, owners, ids, options[per_user],
+                                options[per_recipe], field_name)
+                )
+
+        with connection.cursor() as cursor:
+            for model in (User, Tag, Ingredient, Recipe, Recipe.tags.through,
+                          Recipe.ingredients.through):
+                cursor.execute(f'ANALYZE {model._meta.db_table}')
+        if not options['skip_search_vectors']:
+            call_command('update_search_vectors', '--missing',
+                         '--batch-size', '10000', stdout=self.stdout)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {users} users with the password {PASSWORD!r} in '
+            f'{time.perf_counter() - start:.0f}s.'
+        ))
+
+    def _rng(self, name):
+        """Return the random generator of one kind of rows."""
+        return random.Random(f'{self.options["seed"]}:{name}')
+
+    def _reserve_ids(self, model, count):
+        """Take ``count`` ids from the sequence of a model's table."""
+        table = model._meta.db_table
+        self.cursor.execute(
+            'SELECT nextval(pg_get_serial_sequence(%s, %s))', [table, 'id']
+        )
+        first = self.cursor.fetchone()[0]
+        if count > 1:
+            self.cursor.execute(
+                'SELECT setval(pg_get_serial_sequence(%s, %s), %s)',
+                [table, 'id', first + count - 1]
+            )
+
+        return range(first, first + count)
+
+    def _copy(self, model, columns, rows):
+        """Stream rows into the table of a model with COPY."""
+        table = model._meta.db_table
+        stream = CopyStream(rows)
+        start = time.perf_counter()
+
+        self.cursor.copy_expert(
+            f'COPY {table} ({", ".join(columns)}) FROM STDIN',
+            stream, 1 << 16
+        )
+        self.stdout.write(
+            f'Copied {stream.rows} rows into {table} in '
+            f'{time.perf_counter() - start:.1f}s.'
+        )
+
+    def _timestamp(self, rng):
+        """Return a modification time within the last year."""
+        return (
+            self.now - timedelta(seconds=rng.randrange(365 * 24 * 3600))
+        ).isoformat()
+
+    def _users(self, ids):
+        """Generate the rows of the users."""
+        password = make_password(PASSWORD)
+        for user_id in ids:
+            yield (str(user_id), password, 'f',
+                   f'seed{user_id}@example.com', f'Seed user {user_id}',
+                   't', 'f')
+
+    def _attrs(self, words, ids, user_ids, per_user, name):
+        """Generate the rows of the tags or ingredients of the users."""
+        rng = self._rng(name)
+        ids = iter(ids)
+        pool = names(words, per_user)
+        for user_id in user_ids:
+            # The order is the popularity of the names for the user.
+            rng.shuffle(pool)
+            for attr_name in pool:
+                yield (str(next(ids)), attr_name, str(user_id),
+                       self._timestamp(rng))
+
+    def _owners(self, count, users):
+        """Return the index of the owner of each recipe."""
+        rng = self._rng('owners')
+        users_by_activity = list(range(users))
+        rng.shuffle(users_by_activity)
+        return rng.choices(users_by_activity, cum_weights=zipf_cum_weights(
+            users, self.options['skew']
+        ), k=count)
+
+    def _recipes(self, ids, owners, user_ids):
+        """Generate the rows of the recipes."""
+        rng = self._rng('recipes')
+        for recipe_id, owner in zip(ids, owners):
+            title = ' '.join(rng.sample(TITLE_WORDS, rng.randint(2, 4)))
+            yield (
+                str(recipe_id),
+                str(user_ids[owner]),
+                title.capitalize(),
+                ' '.join(rng.choices(DESCRIPTION_WORDS,
+                                     k=rng.randint(20, 80))),
+                str(min(int(rng.expovariate(1 / 40)) + 5, 600)),
+                f'{rng.randint(100, 99999) / 100:.2f}',
+                f'https://example.com/recipes/{recipe_id}'
+                if rng.random() < 0.3 else '',
+                Recipe.ImageStatus.NONE,
+                '{}',
+                self._timestamp(rng),
+            )
+
+    def _links(self, recipe_ids, owners, ids, per_user, per_recipe, name):
+        """
+        Generate the links of the recipes to tags or ingredients.
+
+        The owner's popular ones are linked the most, the number of links
+        of a recipe is spread evenly around the average.
+        """
+        rng = self._rng(name + ':links')
+        cum_weights = zipf_cum_weights(per_user, self.options['skew'])
+        population = range(per_user)
+        first = ids.start
+        for recipe_id, owner in zip(recipe_ids, owners):
+            count = rng.randint(0, 2 * per_recipe)
+            picked = set()
+            for _ in range(3):
+                if len(picked) == count:
+                    break
+                picked.update(rng.choices(population, cum_weights=cum_weights,
+                                          k=count - len(picked)))
+            if len(picked) < count:
+                # Rare ones may take long to be drawn on a steep skew.
+                picked.update(rng.sample(
+                    [index for index in population if index not in picked],
+                    count - len(picked)
+                ))
+            recipe = str(recipe_id)
+            offset = first + owner * per_user
+            for index in sorted(picked):
+                yield (recipe, str(offset + index))
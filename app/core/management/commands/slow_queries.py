@@ -0,0 +1,158 @@
+"""
+Django command to report the slow query log grouped by SQL fingerprint.
+"""
+from collections import Counter
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.db import slow_queries
+
+
+SORT_KEYS = {
+    'total': lambda group: group['total_ms'],
+    'count': lambda group: group['count'],
+    'mean': lambda group: group['total_ms'] / group['count'],
+    'max': lambda group: group['max_ms'],
+}
+
+
+def group_entries(entries):
+    """Return the statistics of the entries of each fingerprint."""
+    groups = {}
+
+    for entry in entries:
+        group = groups.get(entry['fingerprint'])
+        if group is None:
+            group = groups[entry['fingerprint']] = {
+                'fingerprint': entry['fingerprint'],
+                'sql': entry['sql'],
+                'count': 0,
+                'failed': 0,
+                'total_ms': 0.0,
+                'max_ms': 0.0,
+                'timings': [],
+                'views': Counter(),
+                'stacks': Counter(),
+                'last_seen': None,
+                'plan': None,
+            }
+        group['count'] += 1
+        group['failed'] += entry['failed']
+        group['total_ms'] += entry['ms']
+        group['max_ms'] = max(group['max_ms'], entry['ms'])
+        group['timings'].append(entry['ms'])
+        group['views'][entry['view'] or '-'] += 1
+        group['stacks'][tuple(entry['stack'])] += 1
+        group['last_seen'] = entry['time']
+        if entry['plan']:
+            group['plan'] = entry['plan']
+
+    for group in groups.values():
+        timings = sorted(group.pop('timings'))
+        group['p95_ms'] = timings[max(0, -(-95 * len(timings) // 100) - 1)]
+
+    return list(groups.values())
+
+
+class Command(BaseCommand):
+    """Django command to report the slowest queries."""
+
+    help = (
+        'Report the queries of the slow query log grouped by their SQL '
+        'with literals and lists of values taken out.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sort', choices=SORT_KEYS, default='total',
+                            help='Order of the groups, total time by default.')
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument('--view', help='Only the queries of this view.')
+        parser.add_argument(
+            '--since',
+            help='Only the queries since an ISO time or a number of hours ago.'
+        )
+        parser.add_argument(
+            'fingerprint', nargs='?',
+            help='Show the views, stacks and latest plan of one group.'
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if not slow_queries.log_files():
+            self.stdout.write('The slow query log is empty.')
+            return
+
+        since = self._since(options['since'])
+        entries = (
+            entry for entry in slow_queries.read_entries()
+            if (since is None or parse_datetime(entry['time']) >= since)
+            and (options['view'] is None or entry['view'] == options['view'])
+        )
+        groups = group_entries(entries)
+
+        if options['fingerprint']:
+            matching = [group for group in groups
+                        if group['fingerprint'] == options['fingerprint']]
+            if not matching:
+                raise CommandError('No queries with the fingerprint '
+                                   f'{options["fingerprint"]}.')
+            self._show_group(matching[0])
+            return
+
+        groups.sort(key=SORT_KEYS[options['sort']], reverse=True)
+        self.stdout.write(
+            f'{"fingerprint":<16} {"count":>6} {"total ms":>10} '
+            f'{"mean ms":>9} {"p95 ms":>9} {"max ms":>9}  top view / sql'
+        )
+        for group in groups[:options['limit']]:
+            view, _ = group['views'].most_common(1)[0]
+            self.stdout.write(
+                f'{group["fingerprint"]:<16} {group["count"]:>6} '
+                f'{group["total_ms"]:>10.1f} '
+                f'{group["total_ms"] / group["count"]:>9.1f} '
+                f'{group["p95_ms"]:>9.1f} {group["max_ms"]:>9.1f}  {view}'
+            )
+            self.stdout.write(f'{"":<16}  {group["sql"][:200]}')
+
+    def _since(self, value):
+        """Return the time to report the queries from or ``None``."""
+        if value is None:
+            return None
+
+        try:
+            return timezone.now() - timedelta(hours=float(value))
+        except ValueError:
+            pass
+
+        since = parse_datetime(value)
+        if since is None:
+            raise CommandError(f'Invalid --since {value}.')
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        return since
+
+    def _show_group(self, group):
+        """Write the details of one group."""
+        self.stdout.write(group['sql'])
+        self.stdout.write(
+            f'\n{group["count"]} queries, {group["failed"]} failed, '
+            f'{group["total_ms"]:.1f}ms in total, '
+            f'p95 {group["p95_ms"]:.1f}ms, max {group["max_ms"]:.1f}ms, '
+            f'last at {group["last_seen"]}.'
+        )
+
+        self.stdout.write('\nViews:')
+        for view, count in group['views'].most_common():
+            self.stdout.write(f'  {count:>6}  {view}')
+
+        self.stdout.write('\nStacks:')
+        for stack, count in group['stacks'].most_common(5):
+            self.stdout.write(f'  {count:>6} queries')
+            for frame in stack:
+                self.stdout.write(f'          {frame}')
+
+        self.stdout.write('\nLatest plan:')
+        self.stdout.write(group['plan'] or '  None captured yet.')
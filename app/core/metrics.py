@@ -0,0 +1,297 @@
+"""
+Request metrics of the API in the Prometheus text format.
+
+Each process counts requests in memory, which takes a couple of
+microseconds a request. When ``METRICS_DIR`` is set, a thread of each
+process writes its counters to a file of its own there every
+``METRICS_FLUSH_INTERVAL`` seconds, named after its host and pid, and
+the reported metrics add up the files of all the processes, so the
+workers of every server sharing the directory are reported together.
+Files of exited workers are kept so the counters don't go back when a
+worker is replaced, remove the files of the host before its server
+starts. Without ``METRICS_DIR`` only the serving process is reported.
+"""
+import atexit
+import bisect
+import glob
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the latency histogram buckets in seconds.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75,
+                   1.0, 2.5, 5.0, 7.5, 10.0)
+
+# Counters of each view and method, followed by the latency buckets.
+REQUESTS, SECONDS, QUERIES, QUERY_SECONDS, RESPONSE_BYTES = range(5)
+BUCKETS = 5
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class RequestStats:
+    """The request being handled with the count and time of its queries."""
+    __slots__ = ('request', 'queries', 'query_seconds')
+
+    def __init__(self, request):
+        self.request = request
+        self.queries = 0
+        self.query_seconds = 0.0
+
+
+# Stats of the current request, shared with the threads the request runs
+# its queries on through the copied context.
+current_request = ContextVar('current_request', default=None)
+
+
+def count_query(execute, sql, params, many, context):
+    """Database execute wrapper counting the queries of a request."""
+    stats = current_request.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+
+    start = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.query_seconds += perf_counter() - start
+
+
+class Registry:
+    """Counters of the requests and cache lookups of this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flusher = None
+        self._clear()
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _clear(self):
+        """Drop all the counters."""
+        self.views = {}
+        self.statuses = {}
+        self.caches = {}
+        self.dirty = False
+
+    def _after_fork(self):
+        """Start afresh in a forked process, the parent reports its own."""
+        self._lock = threading.Lock()
+        self._flusher = None
+        self._clear()
+
+    def observe_request(self, view, method, status, seconds, queries,
+                        query_seconds, response_bytes):
+        """Count a request handled by a view."""
+        bucket = BUCKETS + bisect.bisect_left(LATENCY_BUCKETS, seconds)
+        with self._lock:
+            values = self.views.get((view, method))
+            if values is None:
+                values = self.views[view, method] = (
+                    [0] * (BUCKETS + len(LATENCY_BUCKETS) + 1)
+                )
+            values[REQUESTS] += 1
+            values[SECONDS] += seconds
+            values[QUERIES] += queries
+            values[QUERY_SECONDS] += query_seconds
+            values[RESPONSE_BYTES] += response_bytes
+            values[bucket] += 1
+            key = (view, method, status)
+            self.statuses[key] = self.statuses.get(key, 0) + 1
+            self.dirty = True
+
+        if self._flusher is None and settings.METRICS_DIR:
+            self._start_flusher()
+
+    def observe_cache(self, cache, hit):
+        """Count a lookup in a cache."""
+        with self._lock:
+            values = self.caches.get(cache)
+            if values is None:
+                values = self.caches[cache] = [0, 0]
+            values[0 if hit else 1] += 1
+            self.dirty = True
+
+    def snapshot(self):
+        """Return the counters in a form that can be saved as JSON."""
+        with self._lock:
+            self.dirty = False
+            return {
+                'views': [[*key, *values]
+                          for key, values in self.views.items()],
+                'statuses': [[*key, count]
+                             for key, count in self.statuses.items()],
+                'caches': [[cache, *values]
+                           for cache, values in self.caches.items()],
+            }
+
+    def reset(self):
+        """Drop all the counters."""
+        with self._lock:
+            self._clear()
+
+    def flush(self, directory=None):
+        """Write the counters to the file of this process."""
+        directory = directory or settings.METRICS_DIR
+        if not directory:
+            return
+
+        path = os.path.join(directory, file_name())
+        with open(f'{path}.tmp', 'w') as file:
+            json.dump(self.snapshot(), file)
+        os.replace(f'{path}.tmp', path)
+
+    def _start_flusher(self):
+        """Start the thread writing the counters to the file."""
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(
+                target=self._flush_periodically, name='metrics-flusher',
+                daemon=True
+            )
+        self._flusher.start()
+
+    def _flush_periodically(self):
+        """Write the changed counters to the file every interval."""
+        while True:
+            time.sleep(settings.METRICS_FLUSH_INTERVAL)
+            if self.dirty:
+                try:
+                    self.flush()
+                except OSError:
+                    logger.exception('Writing the metrics failed.')
+
+
+def file_name():
+    """Return the name of the counters file of this process."""
+    return f'{socket.gethostname()}-{os.getpid()}.json'
+
+
+registry = Registry()
+atexit.register(lambda: registry.dirty and registry.flush())
+
+
+def collect():
+    """Return the counters of all the processes added up."""
+    directory = settings.METRICS_DIR
+    if not directory:
+        return merge([registry.snapshot()])
+
+    registry.flush(directory)
+    snapshots = []
+    for path in glob.glob(os.path.join(directory, '*.json')):
+        try:
+            with open(path) as file:
+                snapshots.append(json.load(file))
+        except (OSError, ValueError):
+            logger.warning('Skipped unreadable metrics file %s.', path)
+
+    return merge(snapshots)
+
+
+def merge(snapshots):
+    """Add up the counters of several processes."""
+    views = {}
+    statuses = {}
+    caches = {}
+
+    for snapshot in snapshots:
+        for view, method, *values in snapshot['views']:
+            total = views.setdefault((view, method), [0] * len(values))
+            for index, value in enumerate(values):
+                total[index] += value
+        for view, method, status, count in snapshot['statuses']:
+            key = (view, method, status)
+            statuses[key] = statuses.get(key, 0) + count
+        for cache, hits, misses in snapshot['caches']:
+            total = caches.setdefault(cache, [0, 0])
+            total[0] += hits
+            total[1] += misses
+
+    return {'views': views, 'statuses': statuses, 'caches': caches}
+
+
+def _labels(**labels):
+    """Return the label set of a sample."""
+    return ','.join(
+        f'{name}="{_escape(str(value))}"' for name, value in labels.items()
+    )
+
+
+def _escape(value):
+    """Escape a label value."""
+    return (value.replace('\\', '\\\\').replace('"', '\\"')
+            .replace('\n', '\\n'))
+
+
+def _family(lines, name, kind, help_text, samples):
+    """Add a metric with its samples to the exposition."""
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} {kind}')
+    lines.extend(f'{sample}{{{labels}}} {value}'
+                 for sample, labels, value in samples)
+
+
+def render(metrics):
+    """Return the counters in the Prometheus text format."""
+    views = sorted(metrics['views'].items())
+    lines = []
+
+    _family(lines, 'http_requests_total', 'counter',
+            'Requests handled by view, method and status.', [
+                ('http_requests_total',
+                 _labels(view=view, method=method, status=status), count)
+                for (view, method, status), count
+                in sorted(metrics['statuses'].items())
+            ])
+
+    histogram = []
+    for (view, method), values in views:
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + ('+Inf',),
+                                values[BUCKETS:]):
+            cumulative += count
+            histogram.append((
+                'http_request_duration_seconds_bucket',
+                _labels(view=view, method=method, le=bound), cumulative
+            ))
+        labels = _labels(view=view, method=method)
+        histogram.append(('http_request_duration_seconds_sum', labels,
+                          values[SECONDS]))
+        histogram.append(('http_request_duration_seconds_count', labels,
+                          values[REQUESTS]))
+    _family(lines, 'http_request_duration_seconds', 'histogram',
+            'Time taken to handle requests.', histogram)
+
+    for name, index, help_text in (
+        ('db_queries_total', QUERIES, 'Database queries run by requests.'),
+        ('db_query_duration_seconds_total', QUERY_SECONDS,
+         'Time requests spent on database queries.'),
+        ('http_response_size_bytes_total', RESPONSE_BYTES,
+         'Bytes of the response bodies, streamed ones aside.'),
+    ):
+        _family(lines, name, 'counter', help_text, [
+            (name, _labels(view=view, method=method), values[index])
+            for (view, method), values in views
+        ])
+
+    _family(lines, 'cache_requests_total', 'counter',
+            'Lookups in the caches by result.', [
+                ('cache_requests_total', _labels(cache=cache, result=result),
+                 values[index])
+                for cache, values in sorted(metrics['caches'].items())
+                for index, result in enumerate(('hit', 'miss'))
+            ])
+
+    return '\n'.join(lines) + '\n'
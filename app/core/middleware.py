@@ -0,0 +1,179 @@
+"""
+Middleware of the app.
+"""
+import asyncio
+import logging
+import sys
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import exceptions
+
+from core import metrics, profiling
+from core.authentication import CachedTokenAuthentication
+
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsMiddleware:
+    """
+    Count the requests, their latency, queries and response sizes by view.
+
+    Works in both sync and async stacks, so async views aren't moved to
+    a thread. Put it first to time the other middleware too.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            # Mark the instance as a coroutine function for Django.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        start = perf_counter()
+        stats = metrics.RequestStats(request)
+        token = metrics.current_request.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.current_request.reset(token)
+        self._observe(request, response, perf_counter() - start, stats)
+        return response
+
+    async def __acall__(self, request):
+        start = perf_counter()
+        stats = metrics.RequestStats(request)
+        token = metrics.current_request.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.current_request.reset(token)
+        self._observe(request, response, perf_counter() - start, stats)
+        return response
+
+    def _observe(self, request, response, seconds, stats):
+        """Count a handled request."""
+        match = request.resolver_match
+        metrics.registry.observe_request(
+            match.view_name if match else 'unmatched',
+            request.method,
+            response.status_code,
+            seconds,
+            stats.queries,
+            stats.query_seconds,
+            0 if response.streaming else len(response.content),
+        )
+
+
+class ProfilingMiddleware:
+    """
+    Profile the requests of staff users asking for it.
+
+    A request is profiled when it has the ``X-Profile: 1`` header or the
+    ``profile=1`` query parameter and is authenticated as a staff user,
+    with a session or a token. Its stacks are sampled and its queries
+    captured into a report saved in ``PROFILE_DIR``, whose admin page is
+    linked from the ``X-Profile-Report`` header. Other requests only pay
+    for looking at the header and query string. Async requests are
+    passed on unprofiled.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            # Mark the instance as a coroutine function for Django.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.get_response(request)
+
+        if not self._wants_profile(request):
+            return self.get_response(request)
+
+        user = self._staff_user(request)
+        if user is None:
+            return self.get_response(request)
+
+        return self._profile(request, user)
+
+    def _wants_profile(self, request):
+        """Return whether the request asks to be profiled."""
+        if request.META.get('HTTP_X_PROFILE') == '1':
+            return True
+
+        # The query string is only parsed when it may hold the flag.
+        return ('profile=' in request.META.get('QUERY_STRING', '')
+                and request.GET.get('profile') == '1')
+
+    def _staff_user(self, request):
+        """Return the staff user of the request or ``None``."""
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_authenticated:
+            try:
+                result = CachedTokenAuthentication().authenticate(request)
+            except exceptions.AuthenticationFailed:
+                result = None
+            user = result[0] if result else None
+
+        return user if user is not None and user.is_staff else None
+
+    def _profile(self, request, user):
+        """Return the response of a request, saving its profile."""
+        queries = []
+
+        def capture(execute, sql, params, many, context):
+            start = perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                queries.append({
+                    'sql': sql,
+                    'many': many,
+                    'ms': (perf_counter() - start) * 1000,
+                })
+
+        start = perf_counter()
+        sampler = profiling.Sampler(settings.PROFILE_INTERVAL,
+                                    root=sys._getframe())
+        with sampler, connection.execute_wrapper(capture):
+            response = self.get_response(request)
+        ms = (perf_counter() - start) * 1000
+
+        report_id = profiling.new_report_id()
+        report = {
+            'id': report_id,
+            'created': timezone.now().isoformat(),
+            'method': request.method,
+            'path': request.get_full_path(),
+            'user': user.email,
+            'status': response.status_code,
+            'ms': ms,
+            'samples': sampler.samples,
+            'interval_ms': settings.PROFILE_INTERVAL * 1000,
+            'queries': queries,
+            'query_ms': sum(query['ms'] for query in queries),
+            'stacks': sampler.folded(),
+        }
+        try:
+            profiling.save_report(report)
+        except OSError:
+            logger.exception('Saving the profile of %s failed.',
+                             request.path)
+        else:
+            response['X-Profile-Report'] = reverse('admin-profile',
+                                                   args=[report_id])
+        return response
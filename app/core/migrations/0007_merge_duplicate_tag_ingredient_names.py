@@ -0,0 +1,44 @@
+# Generated by Django 4.0.6 on 2026-10-18 03:36
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicate_names(apps, schema_editor):
+    """Merge tags and ingredients sharing a user and name."""
+    Recipe = apps.get_model('core', 'Recipe')
+
+    for field_name in ('tags', 'ingredients'):
+        field = Recipe._meta.get_field(field_name)
+        model = field.related_model
+        through = field.remote_field.through
+        column = field.m2m_reverse_field_name()
+        duplicates = model.objects.values('user', 'name').annotate(
+            keep=Min('id'), count=Count('id')
+        ).filter(count__gt=1)
+
+        for duplicate in duplicates:
+            keep = duplicate['keep']
+            extras = model.objects.filter(
+                user=duplicate['user'], name=duplicate['name']
+            ).exclude(id=keep)
+            for extra in extras:
+                linked = through.objects.filter(
+                    **{column: keep}
+                ).values('recipe_id')
+                through.objects.filter(**{column: extra}).exclude(
+                    recipe_id__in=linked
+                ).update(**{column: keep})
+            extras.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_alter_recipe_tags'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_names,
+                             migrations.RunPython.noop),
+    ]
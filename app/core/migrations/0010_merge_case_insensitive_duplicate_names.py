@@ -0,0 +1,49 @@
+# Generated by Django 4.0.6 on 2026-10-18 05:12
+
+from django.db import migrations
+from django.db.models import Count, Min
+from django.db.models.functions import Lower
+
+
+def merge_case_insensitive_duplicates(apps, schema_editor):
+    """Merge tags and ingredients whose names only differ in case."""
+    Recipe = apps.get_model('core', 'Recipe')
+
+    for field_name in ('tags', 'ingredients'):
+        field = Recipe._meta.get_field(field_name)
+        model = field.related_model
+        through = field.remote_field.through
+        column = field.m2m_reverse_field_name()
+        duplicates = model.objects.annotate(
+            lower_name=Lower('name')
+        ).values('user', 'lower_name').annotate(
+            keep=Min('id'), count=Count('id')
+        ).filter(count__gt=1)
+
+        for duplicate in duplicates:
+            keep = duplicate['keep']
+            extras = model.objects.annotate(
+                lower_name=Lower('name')
+            ).filter(
+                user=duplicate['user'], lower_name=duplicate['lower_name']
+            ).exclude(id=keep)
+            for extra in extras:
+                linked = through.objects.filter(
+                    **{column: keep}
+                ).values('recipe_id')
+                through.objects.filter(**{column: extra}).exclude(
+                    recipe_id__in=linked
+                ).update(**{column: keep})
+            extras.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_case_insensitive_duplicates,
+                             migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.0.6 on 2026-10-18 05:12
+
+from django.db import migrations, models
+import django.db.models.expressions
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_merge_case_insensitive_duplicate_names'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(django.db.models.expressions.F('user'), django.db.models.functions.text.Lower('name'), name='unique_ingredient_user_lower_name'),
+        ),
+        migrations.AddConstraint(
+            model_name='tag',
+            constraint=models.UniqueConstraint(django.db.models.expressions.F('user'), django.db.models.functions.text.Lower('name'), name='unique_tag_user_lower_name'),
+        ),
+        migrations.RemoveConstraint(
+            model_name='ingredient',
+            name='unique_ingredient_user_name',
+        ),
+        migrations.RemoveConstraint(
+            model_name='tag',
+            name='unique_tag_user_name',
+        ),
+    ]
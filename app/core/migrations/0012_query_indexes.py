@@ -0,0 +1,105 @@
+# Generated by Django 4.0.6 on 2026-10-18 05:12
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# The tag and ingredient filters reach recipes from the tag or ingredient
+# side of the through tables, which only have single column indexes.
+THROUGH_INDEXES = [
+    ('core_recipe_tags', 'tag_id'),
+    ('core_recipe_ingredients', 'ingredient_id'),
+]
+
+# Django indexes every foreign key. The composite indexes lead with the
+# same columns, so the single column ones only slow writes down.
+USER_INDEXES = [
+    ('recipe', 'core_recipe', 'core_recipe_user_id_04234149', 'User'),
+    ('tag', 'core_tag', 'core_tag_user_id_1b670500', 'user'),
+    ('ingredient', 'core_ingredient', 'core_ingredient_user_id_73e97fe3',
+     'User'),
+]
+# The through tables are created with the many to many fields, whose state
+# has no say over their indexes, so these are only dropped in the database.
+THROUGH_FOREIGN_KEY_INDEXES = [
+    ('core_recipe_tags', 'tag_id', 'core_recipe_tags_tag_id_10c0ffea'),
+    ('core_recipe_ingredients', 'ingredient_id',
+     'core_recipe_ingredients_ingredient_id_a8fec9ee'),
+]
+
+
+def drop_index_sql(table, column, name):
+    """Return the operation dropping a single column index."""
+    return migrations.RunSQL(
+        f'DROP INDEX CONCURRENTLY IF EXISTS "{name}";',
+        f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{name}" '
+        f'ON "{table}" ("{column}");'
+    )
+
+
+def through_index_operations():
+    """Return the operations indexing the through tables in reverse."""
+    return [
+        migrations.RunSQL(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {table}_reverse_idx '
+            f'ON {table} ({column}, recipe_id);',
+            f'DROP INDEX CONCURRENTLY IF EXISTS {table}_reverse_idx;'
+        )
+        for table, column in THROUGH_INDEXES
+    ]
+
+
+def foreign_key_index_operations():
+    """Return the operations dropping the covered foreign key indexes."""
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[drop_index_sql(table, 'user_id', name)],
+            state_operations=[
+                migrations.AlterField(
+                    model_name=model_name,
+                    name='user',
+                    field=models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name=verbose_name
+                    ),
+                ),
+            ],
+        )
+        for model_name, table, name, verbose_name in USER_INDEXES
+    ]
+    operations.extend(
+        drop_index_sql(table, column, name)
+        for table, column, name in THROUGH_FOREIGN_KEY_INDEXES
+    )
+    return operations
+
+
+class Migration(migrations.Migration):
+    # Indexes are built concurrently, which can't run in a transaction.
+    atomic = False
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0011_case_insensitive_unique_names'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='recipe',
+            index=models.Index(fields=['user', '-id'], name='recipe_user_id_desc_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='tag',
+            index=models.Index(fields=['user', 'name', 'id'], name='tag_user_name_id_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='ingredient',
+            index=models.Index(fields=['user', 'name', 'id'], name='ingredient_user_name_id_idx'),
+        ),
+        *through_index_operations(),
+        *foreign_key_index_operations(),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.0.6 on 2026-10-18 04:11
+
+from django.db import migrations, models
+
+
+def queue_existing_images(apps, schema_editor):
+    """Queue the images uploaded before processing existed."""
+    Recipe = apps.get_model('core', 'Recipe')
+    Recipe.objects.exclude(image='').exclude(image__isnull=True).update(
+        image_status='pending'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='image_claimed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='image claimed at'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='image_status',
+            field=models.CharField(choices=[('none', 'none'), ('pending', 'pending'), ('processing', 'processing'), ('ready', 'ready'), ('failed', 'failed')], default='none', max_length=10, verbose_name='image status'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, verbose_name='image variants'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(condition=models.Q(('image_status__in', ['pending', 'processing'])), fields=['id'], name='recipe_image_queue_idx'),
+        ),
+        migrations.RunPython(queue_existing_images,
+                             migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.0.6 on 2026-10-18 04:17
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_recipe_image_processing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('size', models.PositiveBigIntegerField(verbose_name='size')),
+                ('offset', models.PositiveBigIntegerField(default=0, verbose_name='offset')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.recipe', verbose_name='recipe')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='user')),
+            ],
+            options={
+                'verbose_name': 'image upload',
+                'verbose_name_plural': 'image uploads',
+            },
+        ),
+    ]
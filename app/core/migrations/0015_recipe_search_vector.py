@@ -0,0 +1,28 @@
+# Generated by Django 4.0.6 on 2026-10-18 04:23
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+# The vectors of existing recipes are filled in batches by the
+# update_search_vectors command rather than in one long transaction here.
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('core', '0014_imageupload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='search vector'),
+        ),
+        AddIndexConcurrently(
+            model_name='recipe',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='recipe_search_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+from django.db import migrations
+
+
+# The autocomplete of tag and ingredient names matches trigrams within the
+# names of one user. btree_gin lets the user column lead the GIN index.
+EXTENSIONS = ['pg_trgm', 'btree_gin']
+TABLES = ['core_tag', 'core_ingredient']
+
+
+def create_trigram_indexes(apps, schema_editor):
+    """
+    Create the trigram indexes of the names.
+
+    Servers without the contrib extensions are left as they are, the
+    autocomplete falls back to prefix matching there.
+    """
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT count(*) FROM pg_available_extensions '
+            'WHERE name = ANY(%s)',
+            [EXTENSIONS]
+        )
+        if cursor.fetchone()[0] < len(EXTENSIONS):
+            return
+
+    for extension in EXTENSIONS:
+        schema_editor.execute(f'CREATE EXTENSION IF NOT EXISTS {extension};')
+    for table in TABLES:
+        schema_editor.execute(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {table}_name_trgm_idx '
+            f'ON {table} USING gin (user_id, name gin_trgm_ops);'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    """Drop the trigram indexes of the names."""
+    for table in TABLES:
+        schema_editor.execute(
+            f'DROP INDEX CONCURRENTLY IF EXISTS {table}_name_trgm_idx;'
+        )
+
+
+class Migration(migrations.Migration):
+    # Indexes are built concurrently, which can't run in a transaction.
+    atomic = False
+
+    dependencies = [
+        ('core', '0015_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -4,7 +4,12 @@ Database models.
 import os
 import uuid
 
-from django.db import models
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db import connections, models
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Lower
 from django.conf import settings
 from django.contrib.auth.models import (
     AbstractBaseUser,
@@ -45,6 +50,69 @@ class UserManager(BaseUserManager):
         return user
 
 
+class RecipeAttrManager(models.Manager):
+    """Manager for tags and ingredients of recipes."""
+
+    def get_or_create_by_names(self, user, names):
+        """
+        Return a mapping of names to the user's objects, creating the
+        missing ones.
+
+        Names are matched case-insensitively, the first spelling of a
+        missing name is the one created. Existing objects are fetched in
+        one query and the missing ones are inserted in bulk, skipping rows
+        a concurrent request already created.
+        """
+        names = list(dict.fromkeys(names))
+        lower_names = self._lower(names)
+        objects = self._get_by_lower_names(user, set(lower_names.values()))
+        missing = list({
+            lower_names[name]: name
+            for name in reversed(names) if lower_names[name] not in objects
+        }.values())
+
+        if missing:
+            self.bulk_create(
+                [self.model(user=user, name=name) for name in missing],
+                ignore_conflicts=True
+            )
+            objects.update(self._get_by_lower_names(
+                user, {lower_names[name] for name in missing}
+            ))
+
+        return {name: objects[lower_names[name]] for name in names}
+
+    def _lower(self, names):
+        """
+        Return a mapping of names to their lowercase as the database has it.
+
+        Outside ASCII, Python and PostgreSQL lowercase some letters
+        differently, e.g. the final sigma, so those names are lowered by
+        the database the unique constraint is checked in.
+        """
+        lower_names = {name: name.lower() for name in names if name.isascii()}
+        others = [name for name in names if not name.isascii()]
+
+        if others:
+            with connections[self.db].cursor() as cursor:
+                cursor.execute(
+                    'SELECT name, lower(name) FROM unnest(%s::text[]) name',
+                    [others]
+                )
+                lower_names.update(cursor.fetchall())
+
+        return lower_names
+
+    def _get_by_lower_names(self, user, lower_names):
+        """Return a mapping of lowercase names to the user's objects."""
+        return {
+            obj.lower_name: obj
+            for obj in self.annotate(lower_name=Lower('name')).filter(
+                user=user, lower_name__in=lower_names
+            )
+        }
+
+
 class User(AbstractBaseUser, PermissionsMixin):
     """Custom user model."""
     email = models.EmailField(_('email'), max_length=255, unique=True)
@@ -57,12 +125,51 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = 'email'
 
 
+class RecipeQuerySet(models.QuerySet):
+    """Queryset of recipes."""
+
+    def update_search_vector(self):
+        """
+        Recompute the search vectors of the recipes with one ``UPDATE``.
+
+        Titles weigh the most, then the names of the tags and ingredients,
+        then the descriptions.
+        """
+        config = settings.SEARCH_CONFIG
+        vector = SearchVector('title', weight='A', config=config)
+
+        for field_name in ('tags', 'ingredients'):
+            field = self.model._meta.get_field(field_name)
+            names = field.remote_field.through.objects.filter(
+                recipe_id=OuterRef('pk')
+            ).values('recipe_id').annotate(
+                names=StringAgg(f'{field.m2m_reverse_field_name()}__name',
+                                ' ')
+            ).values('names')
+            vector += SearchVector(Subquery(names), weight='B',
+                                   config=config)
+
+        vector += SearchVector('description', weight='C', config=config)
+        return self.update(search_vector=vector)
+
+
 class Recipe(models.Model):
     """Recipe model."""
+
+    class ImageStatus(models.TextChoices):
+        """Processing status of the image of a recipe."""
+        NONE = 'none', _('none')
+        PENDING = 'pending', _('pending')
+        PROCESSING = 'processing', _('processing')
+        READY = 'ready', _('ready')
+        FAILED = 'failed', _('failed')
+
+    # Covered by the user and id index.
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
-        verbose_name=_('User')
+        verbose_name=_('User'),
+        db_index=False
     )
     title = models.CharField(_('title'), max_length=255)
     description = models.TextField(_('description'), blank=True)
@@ -71,9 +178,33 @@ class Recipe(models.Model):
     link = models.CharField(_('link'), max_length=255, blank=True)
     image = models.ImageField(_('image'), null=True,
                               upload_to=recipe_image_file_path)
+    image_status = models.CharField(_('image status'), max_length=10,
+                                    choices=ImageStatus.choices,
+                                    default=ImageStatus.NONE)
+    image_variants = models.JSONField(_('image variants'), default=dict,
+                                      blank=True)
+    image_claimed_at = models.DateTimeField(_('image claimed at'), null=True,
+                                            blank=True)
     tags = models.ManyToManyField('Tag', verbose_name=_('tags'))
     ingredients = models.ManyToManyField('Ingredient',
                                          verbose_name=_('indgredients'))
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+    search_vector = SearchVectorField(_('search vector'), null=True,
+                                      editable=False)
+
+    objects = RecipeQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-id'],
+                         name='recipe_user_id_desc_idx'),
+            GinIndex(fields=['search_vector'], name='recipe_search_idx'),
+            models.Index(
+                fields=['id'],
+                name='recipe_image_queue_idx',
+                condition=models.Q(image_status__in=['pending', 'processing'])
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -82,8 +213,22 @@ class Recipe(models.Model):
 class Tag(models.Model):
     """Tag for filtering recipes."""
     name = models.CharField(_('name'), max_length=255)
+    # Covered by the user and name index.
     user = models.ForeignKey(User, on_delete=models.CASCADE,
-                             verbose_name=_('user'))
+                             verbose_name=_('user'), db_index=False)
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+
+    objects = RecipeAttrManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint('user', Lower('name'),
+                                    name='unique_tag_user_lower_name'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'name', 'id'],
+                         name='tag_user_name_id_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -92,15 +237,56 @@ class Tag(models.Model):
 class Ingredient(models.Model):
     """Ingredient model for recipes."""
     name = models.CharField(_('name'), max_length=255)
+    # Covered by the user and name index.
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
-        verbose_name=_('User')
+        verbose_name=_('User'),
+        db_index=False
     )
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+
+    objects = RecipeAttrManager()
 
     class Meta:
         verbose_name = _('ingredient')
         verbose_name_plural = _('ingredients')
+        constraints = [
+            models.UniqueConstraint('user', Lower('name'),
+                                    name='unique_ingredient_user_lower_name'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'name', 'id'],
+                         name='ingredient_user_name_id_idx'),
+        ]
 
     def __str__(self):
         return self.name
+
+
+class ImageUpload(models.Model):
+    """Recipe image uploaded in chunks, possibly over many requests."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4,
+                          editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        verbose_name=_('user')
+    )
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE,
+                               verbose_name=_('recipe'))
+    size = models.PositiveBigIntegerField(_('size'))
+    offset = models.PositiveBigIntegerField(_('offset'), default=0)
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _('image upload')
+        verbose_name_plural = _('image uploads')
+
+    def __str__(self):
+        return f'{self.id} ({self.offset}/{self.size})'
+
+    @property
+    def path(self):
+        """Path of the temporary file receiving the chunks."""
+        return os.path.join(settings.IMAGE_UPLOAD_TEMP_DIR, f'{self.id}.part')
@@ -0,0 +1,36 @@
+"""
+Fast JSON parsing for the API.
+
+``orjson`` is used when it's installed and the body is UTF-8, otherwise
+the parser is DRF's ``JSONParser``. Both reject the NaN and infinity
+constants, as DRF's strict mode does. Unlike DRF's parser, ``orjson``
+reads integers too large for 64 bits as floats; no field of the API takes
+such numbers, and scanning each body for them would cost more than the
+parsing saves.
+"""
+import codecs
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+from core.renderers import ORJSONRenderer, orjson
+
+
+class ORJSONParser(JSONParser):
+    """Parser reading JSON with ``orjson`` when available."""
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """Parse the incoming bytestream as JSON and return the data."""
+        encoding = (parser_context or {}).get('encoding', 'utf-8')
+        if (
+            orjson is None
+            or not self.strict
+            or codecs.lookup(encoding).name != 'utf-8'
+        ):
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -0,0 +1,170 @@
+"""
+Profiles of single requests kept in a bounded directory of reports.
+
+The stack of the thread handling the request is sampled from another
+thread, each sample weighted by the time since the previous one, so the
+stacks add up to the wall time of the request, waits included. The
+stacks are kept in the folded format read by ``flamegraph.pl`` and
+speedscope.
+"""
+import json
+import os
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+
+
+REPORT_ID = re.compile(r'^\d{8}-\d{6}-[0-9a-f]{8}$')
+
+
+class Sampler:
+    """Sample the stack of a thread at an interval from another thread."""
+
+    def __init__(self, interval, root=None):
+        self.interval = interval
+        self.thread_id = threading.get_ident()
+        # Frames outside of the root frame are left out of the stacks.
+        self.root = root
+        self.stacks = defaultdict(float)
+        self.samples = 0
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run,
+                                        name='request-profiler', daemon=True)
+        self._names = {}
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        """Sample the stack until stopped."""
+        last = time.perf_counter()
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            if frame is not None:
+                self.stacks[self._stack(frame)] += now - last
+                self.samples += 1
+            last = now
+
+    def _stack(self, frame):
+        """Return the folded stack of a frame, outermost call first."""
+        names = []
+        while frame is not None and frame is not self.root:
+            names.append(self._name(frame.f_code))
+            frame = frame.f_back
+        return ';'.join(reversed(names))
+
+    def _name(self, code):
+        """Return the name of a function in the stacks."""
+        name = self._names.get(code)
+        if name is None:
+            name = self._names[code] = (
+                f'{code.co_name} ({short_path(code.co_filename)}:'
+                f'{code.co_firstlineno})'
+            )
+        return name
+
+    def folded(self):
+        """Return the stacks in the folded format, weighted in us."""
+        return '\n'.join(
+            f'{stack} {round(seconds * 1e6)}'
+            for stack, seconds in sorted(self.stacks.items())
+            if round(seconds * 1e6)
+        )
+
+
+def short_path(filename):
+    """Return a source path relative to the app or the installed packages."""
+    base_dir = str(settings.BASE_DIR)
+    if filename.startswith(base_dir):
+        return filename[len(base_dir):].lstrip(os.sep)
+
+    _, found, package_path = filename.rpartition(
+        f'{os.sep}site-packages{os.sep}'
+    )
+    return package_path if found else filename
+
+
+def new_report_id():
+    """Return a unique report id sorting by creation time."""
+    return f'{time.strftime("%Y%m%d-%H%M%S")}-{secrets.token_hex(4)}'
+
+
+def _path(report_id):
+    """Return the file of a report."""
+    return os.path.join(settings.PROFILE_DIR, f'{report_id}.json')
+
+
+def save_report(report):
+    """Save a report and drop the oldest ones beyond the limit."""
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    path = _path(report['id'])
+    with open(f'{path}.tmp', 'w') as file:
+        json.dump(report, file)
+    os.replace(f'{path}.tmp', path)
+
+    for report_id in report_ids()[settings.PROFILE_MAX_REPORTS:]:
+        try:
+            os.remove(_path(report_id))
+        except FileNotFoundError:
+            # Already dropped by another process.
+            pass
+
+
+def report_ids():
+    """Return the ids of the saved reports, newest first."""
+    try:
+        names = os.listdir(settings.PROFILE_DIR)
+    except FileNotFoundError:
+        return []
+
+    return sorted((
+        name[:-len('.json')] for name in names
+        if name.endswith('.json') and REPORT_ID.match(name[:-len('.json')])
+    ), reverse=True)
+
+
+def load_report(report_id):
+    """Return a saved report or ``None``."""
+    if not REPORT_ID.match(report_id):
+        return None
+
+    try:
+        with open(_path(report_id)) as file:
+            return json.load(file)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def hottest_functions(folded, limit=30):
+    """
+    Return the functions taking the most time in folded stacks.
+
+    Each function comes with the time spent in it, ``self``, and the
+    time spent in it and its callees, ``total``, in ms.
+    """
+    own = Counter()
+    total = Counter()
+
+    for line in folded.splitlines():
+        stack, _, weight = line.rpartition(' ')
+        frames = stack.split(';')
+        ms = int(weight) / 1000
+        own[frames[-1]] += ms
+        for name in set(frames):
+            total[name] += ms
+
+    return [
+        {'name': name, 'self': ms, 'total': total[name]}
+        for name, ms in own.most_common(limit)
+    ]
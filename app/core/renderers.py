@@ -0,0 +1,53 @@
+"""
+Fast JSON rendering for the API.
+
+``orjson`` is used when it's installed, otherwise the renderer is DRF's
+``JSONRenderer``. Both produce semantically equivalent JSON: compact UTF-8
+with the line and paragraph separators escaped, and the types ``orjson``
+doesn't know, Decimal and datetimes included, formatted by DRF's encoder.
+Floats may be spelled differently, e.g. ``1e-07`` and ``1e-7``.
+Payloads ``orjson`` can't encode, e.g. integers over 64 bits, and
+indented output fall back to DRF's renderer. Unlike it, ``orjson``
+writes NaN and infinities as ``null`` instead of refusing them.
+"""
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class ORJSONRenderer(JSONRenderer):
+    """Renderer serializing to JSON with ``orjson`` when available."""
+    options = 0
+
+    if orjson is not None:
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render ``data`` into JSON, returning a bytestring."""
+        if (
+            orjson is None
+            or data is None
+            or not self.compact
+            or self.ensure_ascii
+            or self.get_indent(accepted_media_type,
+                               renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default,
+                               option=self.options)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+
+        # Escaped like DRF does, to output a strict javascript subset.
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(
+                b'\xe2\x80\xa9', b'\\u2029'
+            )
+        return ret
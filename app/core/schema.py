@@ -0,0 +1,103 @@
+"""
+OpenAPI schema generated once and served from memory.
+
+The schema only changes with the code, so ``generate_schema`` writes it
+to ``SCHEMA_ROOT`` on deploy, where the proxy serves it as a static file.
+Requests reaching the app read it from there once per process, or
+generate it on the first request when it's missing or ``DEBUG`` is on.
+"""
+import hashlib
+import logging
+import os
+import threading
+
+from django.conf import settings
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+from drf_spectacular.settings import spectacular_settings
+
+
+logger = logging.getLogger(__name__)
+
+RENDERERS = {
+    'yaml': OpenApiYamlRenderer,
+    'json': OpenApiJsonRenderer,
+}
+
+_lock = threading.Lock()
+_schemas = {}
+
+
+def file_path(schema_format, directory=None):
+    """Return the file of the schema in a format."""
+    return os.path.join(directory or settings.SCHEMA_ROOT,
+                        f'openapi.{schema_format}')
+
+
+def generate():
+    """Return the schema rendered in each format."""
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    schema = generator.get_schema(request=None, public=True)
+    return {
+        schema_format: renderer().render(schema, renderer_context={})
+        for schema_format, renderer in RENDERERS.items()
+    }
+
+
+def write(directory=None):
+    """Write the schema in each format and return the files."""
+    directory = directory or settings.SCHEMA_ROOT
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+
+    for schema_format, content in generate().items():
+        path = file_path(schema_format, directory)
+        with open(f'{path}.tmp', 'wb') as file:
+            file.write(content)
+        os.replace(f'{path}.tmp', path)
+        paths.append(path)
+
+    return paths
+
+
+def get(schema_format):
+    """Return the content and ETag of the schema in a format."""
+    schema = _schemas.get(schema_format)
+    if schema is None:
+        with _lock:
+            if not _schemas:
+                _load()
+        schema = _schemas[schema_format]
+
+    return schema
+
+
+def clear():
+    """Drop the schema from memory."""
+    with _lock:
+        _schemas.clear()
+
+
+def _load():
+    """Read the schema files or generate the schema."""
+    contents = None if settings.DEBUG else _read()
+    if contents is None:
+        logger.info('Generating the API schema.')
+        contents = generate()
+
+    for schema_format, content in contents.items():
+        etag = f'"{hashlib.sha1(content).hexdigest()}"'
+        _schemas[schema_format] = (content, etag)
+
+
+def _read():
+    """Return the schema files' contents, or ``None`` if one is missing."""
+    contents = {}
+
+    for schema_format in RENDERERS:
+        try:
+            with open(file_path(schema_format), 'rb') as file:
+                contents[schema_format] = file.read()
+        except FileNotFoundError:
+            return None
+
+    return contents
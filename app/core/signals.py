@@ -0,0 +1,141 @@
+"""
+Signal handlers of the core models.
+"""
+from django.db.models.signals import (
+    post_save,
+    post_delete,
+    pre_delete,
+    m2m_changed
+)
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from core.authentication import forget_tokens
+from core.models import Recipe, Tag, Ingredient, User
+
+
+LINK_FIELDS = {
+    Recipe.tags.through: 'tag',
+    Recipe.ingredients.through: 'ingredient',
+}
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def touch_linked_objects(sender, instance, action, reverse, model, pk_set,
+                         **kwargs):
+    """Bump the modification time of both sides of changed links."""
+    if action not in ('pre_clear', 'post_add', 'post_remove'):
+        return
+
+    now = timezone.now()
+    type(instance).objects.filter(pk=instance.pk).update(updated_at=now)
+
+    if action == 'pre_clear':
+        own, other = 'recipe', LINK_FIELDS[sender]
+        if reverse:
+            own, other = other, own
+        pk_set = sender.objects.filter(**{own: instance}).values(other)
+
+    model.objects.filter(pk__in=pk_set).update(updated_at=now)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def touch_recipes(sender, instance, created=False, **kwargs):
+    """Bump the modification time of recipes showing the changed object."""
+    if created:
+        return
+
+    field = 'tags' if sender is Tag else 'ingredients'
+    Recipe.objects.filter(**{field: instance}).update(
+        updated_at=timezone.now()
+    )
+
+
+@receiver(post_save, sender=Recipe)
+def update_search_vector(sender, instance, update_fields=None, **kwargs):
+    """Recompute the search vector of a saved recipe."""
+    if update_fields is not None and not {'title', 'description'} & set(
+        update_fields
+    ):
+        return
+
+    Recipe.objects.filter(pk=instance.pk).update_search_vector()
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def update_linked_search_vectors(sender, instance, action, reverse, pk_set,
+                                 **kwargs):
+    """Recompute the search vectors of recipes whose links changed."""
+    if action == 'pre_clear' and reverse:
+        # The cleared recipes can't be found once the links are gone.
+        instance._cleared_recipe_ids = list(sender.objects.filter(
+            **{LINK_FIELDS[sender]: instance}
+        ).values_list('recipe_id', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        recipes = Recipe.objects.filter(pk=instance.pk)
+    elif action == 'post_clear':
+        recipes = Recipe.objects.filter(
+            pk__in=instance.__dict__.pop('_cleared_recipe_ids', [])
+        )
+    else:
+        recipes = Recipe.objects.filter(pk__in=pk_set)
+
+    recipes.update_search_vector()
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def update_named_search_vectors(sender, instance, created, update_fields=None,
+                                **kwargs):
+    """Recompute the search vectors of recipes showing a renamed object."""
+    if created or (update_fields is not None and 'name' not in update_fields):
+        return
+
+    field = 'tags' if sender is Tag else 'ingredients'
+    Recipe.objects.filter(**{field: instance}).update_search_vector()
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def remember_named_recipes(sender, instance, **kwargs):
+    """Keep the recipes of an object being deleted."""
+    field = 'tags' if sender is Tag else 'ingredients'
+    instance._recipe_ids = list(Recipe.objects.filter(
+        **{field: instance}
+    ).values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def update_unnamed_search_vectors(sender, instance, **kwargs):
+    """Recompute the search vectors of recipes of a deleted object."""
+    recipe_ids = instance.__dict__.pop('_recipe_ids', [])
+    if recipe_ids:
+        Recipe.objects.filter(pk__in=recipe_ids).update_search_vector()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_user_tokens(sender, instance, **kwargs):
+    """Drop the cached authentication of a changed user."""
+    forget_tokens(
+        Token.objects.filter(user_id=instance.pk).values_list(
+            'key', flat=True
+        )
+    )
+
+
+@receiver(post_delete, sender=Token)
+def forget_token(sender, instance, **kwargs):
+    """Drop the cached authentication of a deleted token."""
+    forget_tokens([instance.key])
@@ -0,0 +1,98 @@
+"""
+Tests for the cached token authentication.
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.authentication import LocalTokenCache, local_cache
+
+
+User = get_user_model()
+ME_URL = reverse('user:me')
+
+
+class LocalTokenCacheTests(TestCase):
+    """Test the in-process token cache."""
+
+    def test_evicts_least_recently_used(self):
+        """Test the oldest entry is evicted when the cache is full."""
+        cache = LocalTokenCache(max_entries=2, timeout=60)
+        cache.set('a', User(email='a@example.com'))
+        cache.set('b', User(email='b@example.com'))
+        cache.get('a')
+
+        cache.set('c', User(email='c@example.com'))
+
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('c'))
+
+    def test_entries_expire(self):
+        """Test entries are not returned after their time to live."""
+        cache = LocalTokenCache(max_entries=2, timeout=0)
+        cache.set('a', User(email='a@example.com'))
+
+        self.assertIsNone(cache.get('a'))
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test authenticating requests with cached tokens."""
+
+    def setUp(self):
+        local_cache.clear()
+        self.user = User.objects.create_user('user@example.com', 'pass123',
+                                             name='Name')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_warm_request_makes_no_queries(self):
+        """Test a warm request is authenticated without queries."""
+        self.client.get(ME_URL)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(ME_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['email'], self.user.email)
+
+    def test_invalid_token(self):
+        """Test an unknown token is rejected."""
+        self.client.credentials(HTTP_AUTHORIZATION='Token invalid')
+
+        response = self.client.get(ME_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_user_change_invalidates(self):
+        """Test changes of the user are seen by the next request."""
+        self.client.get(ME_URL)
+
+        self.user.name = 'New name'
+        self.user.save()
+        response = self.client.get(ME_URL)
+
+        self.assertEqual(response.data['name'], 'New name')
+
+    def test_deactivated_user_rejected(self):
+        """Test a deactivated user can no longer authenticate."""
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(ME_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_token_rejected(self):
+        """Test a deleted token can no longer authenticate."""
+        self.client.get(ME_URL)
+
+        self.token.delete()
+        response = self.client.get(ME_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
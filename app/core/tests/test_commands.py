@@ -1,12 +1,16 @@
 """Test custom django management commands."""
-
+import io
 from unittest.mock import patch
 
 from psycopg2 import OperationalError as Psycopg2OperationalError
 
 from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Count, F
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, TestCase
+
+from core.models import Ingredient, Recipe, Tag, User
 
 
 @patch('core.management.commands.wait_for_db.Command.check')
@@ -31,3 +35,77 @@ class CommandTests(SimpleTestCase):
 
         self.assertEqual(patched_check.call_count, 6)
         patched_check.assert_called_with(databases=['default'])
+
+
+class SeedDataCommandTests(TestCase):
+    """Test generating datasets."""
+
+    def seed(self, **options):
+        """Run the command with small sizes."""
+        options = {
+            'users': 5, 'recipes': 200, 'tags_per_user': 6,
+            'ingredients_per_user': 10, 'tags_per_recipe': 2,
+            'ingredients_per_recipe': 4, 'skip_search_vectors': True,
+            **options,
+        }
+        call_command('seed_data', stdout=io.StringIO(), **options)
+
+    def snapshot(self):
+        """Return the generated data, with ids relative to the first."""
+        first_user = User.objects.order_by('id').first().id
+        return [
+            (recipe.title, recipe.price, recipe.user_id - first_user,
+             sorted(tag.name for tag in recipe.tags.all()))
+            for recipe in Recipe.objects.order_by('id').prefetch_related(
+                'tags'
+            )
+        ]
+
+    def test_counts(self):
+        """Test the requested numbers of rows are created."""
+        self.seed()
+
+        self.assertEqual(User.objects.count(), 5)
+        self.assertEqual(Tag.objects.count(), 30)
+        self.assertEqual(Ingredient.objects.count(), 50)
+        self.assertEqual(Recipe.objects.count(), 200)
+        links = Recipe.ingredients.through.objects.count()
+        self.assertTrue(400 < links < 1200)
+        self.assertFalse(Recipe.ingredients.through.objects.exclude(
+            recipe__user=F('ingredient__user')
+        ).exists())
+        self.assertTrue(User.objects.first().check_password('seedpass123'))
+
+    def test_deterministic(self):
+        """Test the same seed generates the same data."""
+        self.seed(seed=3)
+        first = self.snapshot()
+        User.objects.all().delete()
+
+        self.seed(seed=3)
+        self.assertEqual(self.snapshot(), first)
+        User.objects.all().delete()
+
+        self.seed(seed=4)
+        self.assertNotEqual(self.snapshot(), first)
+
+    def test_skew(self):
+        """Test a steep skew gives most recipes to a few users."""
+        self.seed(users=20, skew=2)
+
+        counts = list(User.objects.annotate(
+            recipe_count=Count('recipe')
+        ).order_by('-recipe_count').values_list('recipe_count', flat=True))
+        self.assertGreater(counts[0], 100)
+        self.assertLess(counts[-1], 5)
+
+    def test_search_vectors(self):
+        """Test the search vectors are filled by default."""
+        self.seed(recipes=20, skip_search_vectors=False)
+
+        self.assertFalse(Recipe.objects.filter(search_vector=None).exists())
+
+    def test_too_few_tags(self):
+        """Test users need more tags than their recipes have."""
+        with self.assertRaises(CommandError):
+            self.seed(tags_per_user=3, tags_per_recipe=2)
@@ -0,0 +1,156 @@
+"""
+Tests for the database connection pool.
+"""
+import threading
+import time
+
+import psycopg2
+from django.contrib.auth import get_user_model
+from django.db import connection, connections
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.db.pool import ConnectionPool
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """Test checking connections in and out of a pool."""
+    databases = {'default'}
+
+    def setUp(self):
+        self.conn_params = connection.get_connection_params()
+        self.pool = ConnectionPool(max_size=1, timeout=1,
+                                   health_check_interval=30, max_idle=300)
+        self.addCleanup(self.pool.drain)
+
+    def connect(self):
+        """Open a new connection to the test database."""
+        return psycopg2.connect(**self.conn_params)
+
+    def test_connection_reused(self):
+        """Test a released connection is handed out again."""
+        first = self.pool.acquire(self.connect)
+        self.pool.release(first)
+
+        second = self.pool.acquire(self.connect)
+        self.pool.release(second)
+
+        self.assertIs(first, second)
+        self.assertEqual(self.pool.stats()['connects'], 1)
+        self.assertEqual(self.pool.stats()['idle'], 1)
+
+    def test_timeout_when_exhausted(self):
+        """Test waiting for a connection times out when none is freed."""
+        self.pool.timeout = 0.01
+        conn = self.pool.acquire(self.connect)
+        self.addCleanup(self.pool.release, conn)
+
+        with self.assertRaises(psycopg2.OperationalError):
+            self.pool.acquire(self.connect)
+
+        self.assertEqual(self.pool.stats()['timeouts'], 1)
+        self.assertEqual(self.pool.stats()['checked_out'], 1)
+
+    def test_waiting_thread_gets_released_connection(self):
+        """Test a waiting thread gets the connection once it's released."""
+        conn = self.pool.acquire(self.connect)
+        acquired = []
+        thread = threading.Thread(
+            target=lambda: acquired.append(self.pool.acquire(self.connect))
+        )
+        thread.start()
+        while not self.pool.stats()['waits']:
+            time.sleep(0.001)
+
+        self.pool.release(conn)
+        thread.join()
+        self.pool.release(acquired[0])
+
+        self.assertIs(acquired[0], conn)
+        self.assertEqual(self.pool.stats()['waits'], 1)
+
+    def test_broken_connection_replaced(self):
+        """Test a connection closed by the server is replaced."""
+        self.pool.health_check_interval = 0
+        conn = self.pool.acquire(self.connect)
+        self.pool.release(conn)
+        with self.connect() as other, other.cursor() as cursor:
+            cursor.execute('SELECT pg_terminate_backend(%s)',
+                           [conn.get_backend_pid()])
+        other.close()
+
+        new_conn = self.pool.acquire(self.connect)
+        self.pool.release(new_conn)
+
+        self.assertIsNot(new_conn, conn)
+        self.assertEqual(self.pool.stats()['reconnects'], 1)
+
+    def test_open_transaction_rolled_back(self):
+        """Test a connection is released without its open transaction."""
+        conn = self.pool.acquire(self.connect)
+        with conn.cursor() as cursor:
+            cursor.execute('SELECT 1')
+
+        self.pool.release(conn)
+
+        self.assertEqual(conn.get_transaction_status(),
+                         psycopg2.extensions.TRANSACTION_STATUS_IDLE)
+
+
+class PooledBackendTests(SimpleTestCase):
+    """Test the database backend using the pool."""
+    databases = {'default'}
+
+    def test_close_returns_connection_to_pool(self):
+        """Test closing a connection keeps it open in the pool."""
+        wrapper = connections.create_connection('default')
+        wrapper.ensure_connection()
+        raw_connection = wrapper.connection
+
+        wrapper.close()
+        wrapper.ensure_connection()
+
+        self.assertIs(wrapper.connection, raw_connection)
+        wrapper.close()
+
+    def test_pool_disabled(self):
+        """Test connections are closed when the pool is disabled."""
+        wrapper = connections.create_connection('default')
+        wrapper.settings_dict = {**wrapper.settings_dict,
+                                 'POOL': {'MAX_SIZE': 0}}
+        wrapper.ensure_connection()
+        raw_connection = wrapper.connection
+
+        wrapper.close()
+
+        self.assertTrue(raw_connection.closed)
+
+
+class DatabasePoolsApiTests(TestCase):
+    """Test the pool counters endpoint."""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_staff_only(self):
+        """Test only staff users can read the counters."""
+        user = get_user_model().objects.create_user('user@example.com',
+                                                    'pass123')
+        self.client.force_authenticate(user)
+
+        response = self.client.get(reverse('database-pools'))
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_counters(self):
+        """Test the counters of the pools are returned."""
+        user = get_user_model().objects.create_superuser('admin@example.com',
+                                                         'pass123')
+        self.client.force_authenticate(user)
+
+        response = self.client.get(reverse('database-pools'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('checked_out', response.data[0])
@@ -0,0 +1,152 @@
+"""
+Tests the hot queries are served by the indexes made for them.
+"""
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchQuery
+from django.core.management import call_command
+from django.db import connection
+from django.db.models.functions import Lower
+from django.test import TestCase
+
+from core.models import Recipe, Tag, Ingredient
+
+
+User = get_user_model()
+
+
+class IndexUsageTests(TestCase):
+    """Test the query plans of the recipe API queries."""
+
+    @classmethod
+    def setUpTestData(cls):
+        users = [
+            User.objects.create_user(f'user{i}@example.com', 'pass123')
+            for i in range(5)
+        ]
+        cls.user = users[0]
+
+        for user in users:
+            recipes = Recipe.objects.bulk_create(
+                Recipe(user=user, title=f'Recipe {i}', time_minutes=10,
+                       price=Decimal('5.00'))
+                for i in range(200)
+            )
+            tags = Tag.objects.bulk_create(
+                Tag(user=user, name=f'Tag {i}') for i in range(200)
+            )
+            ingredients = Ingredient.objects.bulk_create(
+                Ingredient(user=user, name=f'Ingredient {i}')
+                for i in range(20)
+            )
+            Recipe.tags.through.objects.bulk_create(
+                Recipe.tags.through(recipe=recipe, tag=tags[i % 20])
+                for i, recipe in enumerate(recipes)
+            )
+            Recipe.ingredients.through.objects.bulk_create(
+                Recipe.ingredients.through(
+                    recipe=recipe, ingredient=ingredients[i % 20]
+                )
+                for i, recipe in enumerate(recipes)
+            )
+        cls.tag = tags[0]
+        cls.ingredient = ingredients[0]
+        Recipe.objects.update_search_vector()
+
+        with connection.cursor() as cursor:
+            for table in ('core_recipe', 'core_tag', 'core_ingredient',
+                          'core_recipe_tags', 'core_recipe_ingredients'):
+                cursor.execute(f'ANALYZE {table}')
+
+    def assertUsesIndex(self, queryset, index_name):
+        """Assert the plan of a query scans the given index."""
+        with connection.cursor() as cursor:
+            # The seeded tables are small enough for sequential scans to
+            # win, rule them out as they would be on a production dataset.
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = queryset.explain()
+
+        self.assertIn(index_name, plan)
+
+    def test_recipe_list(self):
+        """Test listing recipes scans the user and id index."""
+        queryset = Recipe.objects.filter(user=self.user).order_by('-id')
+
+        self.assertUsesIndex(queryset[:100], 'recipe_user_id_desc_idx')
+
+    def test_tag_list(self):
+        """Test listing tags scans the user and name index."""
+        queryset = Tag.objects.filter(user=self.user).order_by('-name', '-id')
+
+        self.assertUsesIndex(queryset[:100], 'tag_user_name_id_idx')
+
+    def test_ingredient_list(self):
+        """Test listing ingredients scans the user and name index."""
+        queryset = Ingredient.objects.filter(user=self.user).order_by(
+            '-name', '-id'
+        )
+
+        self.assertUsesIndex(queryset[:100], 'ingredient_user_name_id_idx')
+
+    def test_filter_by_tags(self):
+        """Test filtering by tags scans the reverse through index."""
+        queryset = Recipe.objects.filter(
+            user=self.user, tags__id__in=[self.tag.id]
+        ).order_by('-id')
+
+        self.assertUsesIndex(queryset[:100], 'core_recipe_tags_reverse_idx')
+
+    def test_filter_by_ingredients(self):
+        """Test filtering by ingredients scans the reverse through index."""
+        queryset = Recipe.objects.filter(
+            user=self.user, ingredients__id__in=[self.ingredient.id]
+        ).order_by('-id')
+
+        self.assertUsesIndex(
+            queryset[:100], 'core_recipe_ingredients_reverse_idx'
+        )
+
+    def test_name_lookup(self):
+        """Test resolving names scans the case-insensitive unique index."""
+        queryset = Tag.objects.get_queryset().annotate(
+            lower_name=Lower('name')
+        ).filter(user=self.user, lower_name__in=['tag 1', 'tag 2'])
+
+        self.assertUsesIndex(queryset, 'unique_tag_user_lower_name')
+
+    def test_search(self):
+        """Test matching search words scans the search vector index."""
+        queryset = Recipe.objects.filter(
+            search_vector=SearchQuery('199', config='english')
+        )
+
+        self.assertUsesIndex(queryset, 'recipe_search_idx')
+
+    def test_covered_foreign_key_indexes_dropped(self):
+        """Test the models and tables agree on the dropped indexes."""
+        with connection.cursor() as cursor:
+            constraints = {
+                table: connection.introspection.get_constraints(cursor, table)
+                for table in ('core_recipe', 'core_tag', 'core_ingredient',
+                              'core_recipe_tags', 'core_recipe_ingredients')
+            }
+        single_column = {
+            (table, tuple(constraint['columns']))
+            for table, table_constraints in constraints.items()
+            for constraint in table_constraints.values()
+            if constraint['index'] and not constraint['unique']
+            and not constraint['primary_key']
+            and len(constraint['columns']) == 1
+        }
+
+        for table, column in (('core_recipe', 'user_id'),
+                              ('core_tag', 'user_id'),
+                              ('core_ingredient', 'user_id'),
+                              ('core_recipe_tags', 'tag_id'),
+                              ('core_recipe_ingredients', 'ingredient_id')):
+            with self.subTest(table=table):
+                self.assertNotIn((table, (column,)), single_column)
+        call_command('makemigrations', 'core', check=True, dry_run=True,
+                     stdout=StringIO())
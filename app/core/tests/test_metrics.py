@@ -0,0 +1,162 @@
+"""
+Tests for the request metrics.
+"""
+import json
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import metrics
+
+
+METRICS_URL = reverse('metrics')
+HEALTH_CHECK_URL = reverse('health-check')
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+def sample(text, line_start):
+    """Return the value of the sample starting with ``line_start``."""
+    for line in text.splitlines():
+        if line.startswith(line_start + ' '):
+            return float(line.rsplit(' ', 1)[1])
+
+    return None
+
+
+@override_settings(METRICS_DIR=None, METRICS_TOKEN=None)
+class MetricsApiTests(TestCase):
+    """Test the metrics endpoint."""
+
+    def setUp(self):
+        self.client = APIClient()
+        metrics.registry.reset()
+
+    def get_metrics(self, **headers):
+        """Return the metrics text."""
+        response = self.client.get(METRICS_URL, **headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], metrics.CONTENT_TYPE)
+        return response.content.decode()
+
+    def test_requests_counted_by_view(self):
+        """Test the requests, latencies and sizes of views are reported."""
+        for _ in range(3):
+            response = self.client.get(HEALTH_CHECK_URL)
+        self.client.get('/api/missing')
+
+        text = self.get_metrics()
+
+        labels = 'view="health-check",method="GET"'
+        self.assertEqual(sample(
+            text, f'http_requests_total{{{labels},status="200"}}'
+        ), 3)
+        self.assertEqual(sample(
+            text, f'http_request_duration_seconds_count{{{labels}}}'
+        ), 3)
+        self.assertEqual(sample(
+            text, f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}}'
+        ), 3)
+        self.assertEqual(sample(
+            text, f'http_response_size_bytes_total{{{labels}}}'
+        ), 3 * len(response.content))
+        self.assertEqual(sample(
+            text, 'http_requests_total'
+            '{view="unmatched",method="GET",status="404"}'
+        ), 1)
+
+    def test_queries_and_cache_counted(self):
+        """Test the queries of a view and its cache lookups are reported."""
+        user = get_user_model().objects.create_user('user@example.com',
+                                                    'pass123')
+        self.client.force_authenticate(user)
+        self.client.get(RECIPES_URL)
+        self.client.get(RECIPES_URL)
+
+        text = self.get_metrics()
+
+        labels = 'view="recipe:recipe-list",method="GET"'
+        self.assertGreater(sample(text, f'db_queries_total{{{labels}}}'), 0)
+        self.assertGreater(
+            sample(text, f'db_query_duration_seconds_total{{{labels}}}'), 0
+        )
+        self.assertEqual(sample(
+            text, 'cache_requests_total{cache="responses",result="hit"}'
+        ), 1)
+        self.assertEqual(sample(
+            text, 'cache_requests_total{cache="responses",result="miss"}'
+        ), 1)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_token_required(self):
+        """Test the metrics need the token when one is configured."""
+        response = self.client.get(METRICS_URL)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.get_metrics(HTTP_AUTHORIZATION='Bearer secret')
+
+
+class MetricsRegistryTests(TestCase):
+    """Test counting and adding up the metrics of processes."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        metrics.registry.reset()
+
+    def test_histogram_buckets(self):
+        """Test latencies fall in the buckets of their upper bounds."""
+        for seconds in (0.001, 0.005, 0.3, 60):
+            metrics.registry.observe_request('view', 'GET', 200, seconds,
+                                             0, 0, 0)
+
+        text = metrics.render(metrics.merge([metrics.registry.snapshot()]))
+
+        bucket = ('http_request_duration_seconds_bucket'
+                  '{view="view",method="GET"')
+        self.assertEqual(sample(text, f'{bucket},le="0.005"}}'), 2)
+        self.assertEqual(sample(text, f'{bucket},le="0.25"}}'), 2)
+        self.assertEqual(sample(text, f'{bucket},le="0.5"}}'), 3)
+        self.assertEqual(sample(text, f'{bucket},le="10.0"}}'), 3)
+        self.assertEqual(sample(text, f'{bucket},le="+Inf"}}'), 4)
+
+    def test_processes_added_up(self):
+        """Test the files of the other processes are added to this one's."""
+        metrics.registry.observe_request('view', 'GET', 200, 0.01, 2, 0.001,
+                                         100)
+        metrics.registry.observe_cache('responses', hit=True)
+        other = metrics.registry.snapshot()
+        with open(os.path.join(self.directory, '1.json'), 'w') as file:
+            json.dump(other, file)
+        with open(os.path.join(self.directory, '2.json'), 'w') as file:
+            file.write('{')
+
+        with override_settings(METRICS_DIR=self.directory), \
+                self.assertLogs('core.metrics', 'WARNING'):
+            text = metrics.render(metrics.collect())
+
+        self.assertTrue(os.path.exists(
+            os.path.join(self.directory, metrics.file_name())
+        ))
+        self.assertEqual(sample(
+            text, 'http_requests_total{view="view",method="GET",status="200"}'
+        ), 2)
+        self.assertEqual(sample(
+            text, 'db_queries_total{view="view",method="GET"}'
+        ), 4)
+        self.assertEqual(sample(
+            text, 'cache_requests_total{cache="responses",result="hit"}'
+        ), 2)
+
+    def test_label_values_escaped(self):
+        """Test quotes and backslashes in label values are escaped."""
+        metrics.registry.observe_request('a"b\\c', 'GET', 200, 0.01, 0, 0, 0)
+
+        text = metrics.render(metrics.merge([metrics.registry.snapshot()]))
+
+        self.assertIn('view="a\\"b\\\\c"', text)
@@ -4,6 +4,7 @@ Tests for models.
 from decimal import Decimal
 from unittest.mock import patch
 
+from django.db import IntegrityError, connection
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 
@@ -88,6 +89,77 @@ class ModelTests(TestCase):
 
         self.assertEqual(str(ingredient), ingredient.name)
 
+    def test_tag_name_unique_per_user(self):
+        """Test a user cannot have two tags with the same name in any case."""
+        user = create_user()
+        other_user = create_user(email='other@example.com')
+        models.Tag.objects.create(user=user, name='Vegan')
+        models.Tag.objects.create(user=other_user, name='Vegan')
+
+        with self.assertRaises(IntegrityError):
+            models.Tag.objects.create(user=user, name='vegan')
+
+    def test_get_or_create_by_names(self):
+        """Test getting existing and creating missing ingredients."""
+        user = create_user()
+        other_user = create_user(email='other@example.com')
+        salt = models.Ingredient.objects.create(user=user, name='Salt')
+        models.Ingredient.objects.create(user=other_user, name='Pepper')
+
+        with self.assertNumQueries(3):
+            ingredients = models.Ingredient.objects.get_or_create_by_names(
+                user, ['Salt', 'Pepper', 'Salt']
+            )
+
+        self.assertEqual(list(ingredients), ['Salt', 'Pepper'])
+        self.assertEqual(ingredients['Salt'], salt)
+        self.assertEqual(ingredients['Pepper'].user, user)
+        self.assertEqual(
+            models.Ingredient.objects.filter(user=user).count(), 2
+        )
+
+    def test_get_or_create_by_names_ignores_case(self):
+        """Test names differing in case resolve to the same ingredient."""
+        user = create_user()
+        salt = models.Ingredient.objects.create(user=user, name='Salt')
+
+        ingredients = models.Ingredient.objects.get_or_create_by_names(
+            user, ['salt', 'Olive oil', 'olive OIL']
+        )
+
+        self.assertEqual(ingredients['salt'], salt)
+        self.assertEqual(ingredients['Olive oil'], ingredients['olive OIL'])
+        self.assertEqual(ingredients['olive OIL'].name, 'Olive oil')
+        self.assertEqual(
+            models.Ingredient.objects.filter(user=user).count(), 2
+        )
+
+    def test_get_or_create_by_names_non_ascii(self):
+        """Test names are matched as the database lowercases them."""
+        user = create_user()
+        models.Ingredient.objects.create(user=user, name='Οδος')
+        names = ['ΟΔΟΣ', 'οδοσ', 'Οδος', 'ΟΔΟΣ İ', 'Straße']
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT lower(name) FROM unnest(%s) name',
+                           [names])
+            lower_names = dict(zip(names, (row[0] for row in cursor)))
+
+        ingredients = models.Ingredient.objects.get_or_create_by_names(
+            user, names
+        )
+
+        for first in names:
+            for second in names:
+                with self.subTest(first=first, second=second):
+                    self.assertEqual(
+                        ingredients[first] == ingredients[second],
+                        lower_names[first] == lower_names[second]
+                    )
+        self.assertEqual(
+            models.Ingredient.objects.filter(user=user).count(),
+            len(set(lower_names.values()))
+        )
+
     @patch('core.models.uuid.uuid4')
     def test_recipe_filename_uuid(self, mock_uuid):
         """Test generating image path."""
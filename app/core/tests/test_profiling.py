@@ -0,0 +1,151 @@
+"""
+Tests for profiling requests of staff users.
+"""
+import os
+import shutil
+import tempfile
+import time
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core import profiling
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+PROFILES_URL = reverse('admin-profiles')
+
+
+def wait_a_little():
+    """Sleep long enough to be sampled."""
+    time.sleep(0.05)
+
+
+class ProfilingMiddlewareTests(TestCase):
+    """Test profiling the requests asking for it."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        settings_override = override_settings(PROFILE_DIR=self.directory,
+                                              PROFILE_MAX_REPORTS=3)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        User = get_user_model()
+        self.staff = User.objects.create_user('staff@example.com', 'pass123',
+                                              is_staff=True)
+        self.user = User.objects.create_user('user@example.com', 'pass123')
+        self.client = APIClient()
+
+    def authenticate(self, user):
+        """Authenticate the client with a token of the user."""
+        token = Token.objects.create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def test_staff_request_profiled(self):
+        """Test a staff request with the header is profiled."""
+        self.authenticate(self.staff)
+
+        response = self.client.get(RECIPES_URL, HTTP_X_PROFILE='1')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        report_id = profiling.report_ids()[0]
+        self.assertEqual(response['X-Profile-Report'],
+                         reverse('admin-profile', args=[report_id]))
+        report = profiling.load_report(report_id)
+        self.assertEqual(report['path'], RECIPES_URL)
+        self.assertEqual(report['user'], self.staff.email)
+        self.assertGreater(len(report['queries']), 0)
+        self.assertIn('SELECT', report['queries'][0]['sql'])
+
+    def test_query_flag(self):
+        """Test the query parameter asks for a profile too."""
+        self.client.force_login(self.staff)
+
+        response = self.client.get(RECIPES_URL, {'profile': '1'})
+
+        self.assertIn('X-Profile-Report', response)
+
+    def test_other_requests_not_profiled(self):
+        """Test unflagged and non-staff requests aren't profiled."""
+        self.authenticate(self.user)
+        response = self.client.get(RECIPES_URL, HTTP_X_PROFILE='1')
+        self.assertNotIn('X-Profile-Report', response)
+
+        self.authenticate(self.staff)
+        response = self.client.get(RECIPES_URL, {'profiled': '1'})
+        self.assertNotIn('X-Profile-Report', response)
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token invalid')
+        response = self.client.get(RECIPES_URL, HTTP_X_PROFILE='1')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.assertEqual(profiling.report_ids(), [])
+
+    def test_reports_bounded(self):
+        """Test only the newest reports are kept."""
+        self.authenticate(self.staff)
+
+        responses = [
+            self.client.get(RECIPES_URL, HTTP_X_PROFILE='1')
+            for _ in range(5)
+        ]
+
+        self.assertEqual(len(os.listdir(self.directory)), 3)
+        self.assertEqual(
+            [reverse('admin-profile', args=[report_id])
+             for report_id in profiling.report_ids()],
+            sorted((response['X-Profile-Report']
+                    for response in responses), reverse=True)[:3]
+        )
+
+    def test_admin_pages(self):
+        """Test the reports are browsed in the admin by staff only."""
+        self.authenticate(self.staff)
+        report_url = self.client.get(
+            RECIPES_URL, HTTP_X_PROFILE='1'
+        )['X-Profile-Report']
+        report_id = profiling.report_ids()[0]
+        self.client.credentials()
+
+        self.client.force_login(self.user)
+        response = self.client.get(PROFILES_URL)
+        self.assertEqual(response.status_code, status.HTTP_302_FOUND)
+
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('admin:index'))
+        self.assertContains(response, PROFILES_URL)
+        response = self.client.get(PROFILES_URL)
+        self.assertContains(response, report_url)
+        response = self.client.get(report_url)
+        self.assertContains(response, 'SELECT')
+        response = self.client.get(
+            reverse('admin-profile-stacks', args=[report_id])
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('attachment', response['Content-Disposition'])
+        response = self.client.get(
+            reverse('admin-profile', args=['20200101-000000-00000000'])
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class SamplerTests(TestCase):
+    """Test sampling the stacks of a thread."""
+
+    def test_folded_stacks(self):
+        """Test the sampled stacks are folded with their time."""
+        with profiling.Sampler(0.001) as sampler:
+            wait_a_little()
+
+        self.assertGreater(sampler.samples, 0)
+        folded = sampler.folded()
+        self.assertIn('wait_a_little (core/tests/test_profiling.py:', folded)
+        functions = profiling.hottest_functions(folded)
+        self.assertTrue(functions[0]['name'].startswith('wait_a_little'))
+        self.assertAlmostEqual(functions[0]['self'], 50, delta=25)
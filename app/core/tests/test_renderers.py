@@ -0,0 +1,117 @@
+"""
+Tests for the orjson renderer and parser.
+"""
+import datetime
+import io
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core import parsers, renderers
+from core.models import Ingredient, Recipe, Tag
+from core.parsers import ORJSONParser
+from core.renderers import ORJSONRenderer
+from recipe.serializers import RecipeDetailSerializer
+
+
+class ORJSONRendererTests(TestCase):
+    """Test the renderer outputs the same bytes as DRF's."""
+
+    def assertSameOutput(self, data, **kwargs):
+        """Assert both renderers render ``data`` identically."""
+        self.assertEqual(ORJSONRenderer().render(data, **kwargs),
+                         JSONRenderer().render(data, **kwargs))
+
+    def test_recipes(self):
+        """Test serialized recipes render identically."""
+        user = get_user_model().objects.create_user('user@example.com',
+                                                    'pass123')
+        recipe = Recipe.objects.create(user=user, title='Crème brûlée',
+                                       time_minutes=45,
+                                       price=Decimal('7.50'))
+        recipe.tags.add(Tag.objects.create(user=user, name='Dessert'))
+        recipe.ingredients.add(Ingredient.objects.create(user=user,
+                                                         name='Cream'))
+
+        self.assertSameOutput(RecipeDetailSerializer(recipe).data)
+
+    def test_special_types(self):
+        """Test types orjson doesn't know are formatted by DRF's encoder."""
+        self.assertSameOutput({
+            'price': Decimal('1.10'),
+            'created': datetime.datetime(2022, 7, 1, 12, 30, 15, 123456,
+                                         tzinfo=datetime.timezone.utc),
+            'naive': datetime.datetime(2022, 7, 1, 12, 30),
+            'day': datetime.date(2022, 7, 1),
+            'time': datetime.time(8, 15),
+            'duration': datetime.timedelta(minutes=90),
+            'lazy': gettext_lazy('Title'),
+            'ids': {1, 2},
+        })
+
+    def test_unicode(self):
+        """Test unicode is written as UTF-8 with separators escaped."""
+        self.assertSameOutput({'text': 'Ünïcødé 食べ物     "\\/'})
+
+    def test_non_string_keys(self):
+        """Test integer keys are written as strings."""
+        self.assertSameOutput({1: 'one', 'two': [1.5, True, None]})
+
+    def test_none(self):
+        """Test nothing is rendered for no data."""
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+
+    def test_indent(self):
+        """Test indented output falls back to DRF's renderer."""
+        self.assertSameOutput({'a': [1, 2]},
+                              accepted_media_type='application/json; '
+                                                  'indent=4')
+
+    def test_big_integer(self):
+        """Test integers orjson can't encode fall back to DRF's renderer."""
+        self.assertSameOutput({'big': 2 ** 70})
+
+    def test_without_orjson(self):
+        """Test DRF's renderer is used without orjson."""
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertSameOutput({'price': Decimal('1.10')})
+
+
+class ORJSONParserTests(TestCase):
+    """Test the parser reads bodies like DRF's."""
+
+    def parse(self, parser, body):
+        """Return ``body`` parsed by ``parser``."""
+        return parser.parse(io.BytesIO(body), 'application/json',
+                            {'encoding': 'utf-8'})
+
+    def assertSameData(self, body):
+        """Assert both parsers parse ``body`` to the same data."""
+        self.assertEqual(self.parse(ORJSONParser(), body),
+                         self.parse(JSONParser(), body))
+
+    def test_parse(self):
+        """Test bodies are parsed to the same data."""
+        self.assertSameData(
+            '{"title": "Crème brûlée", "price": "7.50", "time_minutes": 45,'
+            ' "tags": [{"name": "Dessert"}], "rating": 4.5, "x": null}'
+            .encode()
+        )
+
+    def test_invalid(self):
+        """Test invalid bodies raise a parse error."""
+        for body in (b'{"title": ', b'{"rating": NaN}', b'\xff'):
+            with self.subTest(body=body):
+                with self.assertRaises(ParseError):
+                    self.parse(ORJSONParser(), body)
+
+    def test_without_orjson(self):
+        """Test DRF's parser is used without orjson."""
+        with mock.patch.object(parsers, 'orjson', None):
+            self.assertSameData(b'{"a": [1, 2]}')
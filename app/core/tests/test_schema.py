@@ -0,0 +1,110 @@
+"""
+Tests for serving the OpenAPI schema generated once.
+"""
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from drf_spectacular.views import SpectacularAPIView
+from rest_framework import status
+from rest_framework.test import APIClient, APIRequestFactory
+
+from core import schema
+
+
+SCHEMA_URL = reverse('api-schema')
+
+
+class SchemaViewTests(TestCase):
+    """Test the schema endpoint."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        settings_override = override_settings(SCHEMA_ROOT=self.directory)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        schema.clear()
+        self.addCleanup(schema.clear)
+        self.client = APIClient()
+
+    def test_same_as_generated(self):
+        """Test the cached schema matches the one generated per request."""
+        view = SpectacularAPIView.as_view()
+
+        for params in ({}, {'format': 'json'}):
+            with self.subTest(params=params):
+                expected = view(APIRequestFactory().get(SCHEMA_URL, params))
+                expected.render()
+
+                response = self.client.get(SCHEMA_URL, params)
+
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(response.content, expected.content)
+                self.assertEqual(response['Content-Type'],
+                                 expected['Content-Type'])
+                self.assertEqual(response['Content-Disposition'],
+                                 expected['Content-Disposition'])
+
+    def test_generated_once(self):
+        """Test the schema is generated on the first request only."""
+        with mock.patch.object(schema, 'generate',
+                               wraps=schema.generate) as generate:
+            self.client.get(SCHEMA_URL)
+            self.client.get(SCHEMA_URL, {'format': 'json'})
+            self.client.get(SCHEMA_URL)
+
+        generate.assert_called_once()
+
+    def test_etag(self):
+        """Test a request with the current ETag is not modified."""
+        etag = self.client.get(SCHEMA_URL)['ETag']
+
+        response = self.client.get(SCHEMA_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+        json_etag = self.client.get(SCHEMA_URL, {'format': 'json'})['ETag']
+        self.assertNotEqual(json_etag, etag)
+
+    def test_files_served(self):
+        """Test the files written by the command are served."""
+        out = StringIO()
+        call_command('generate_schema', stdout=out)
+
+        contents = {}
+        for schema_format in ('yaml', 'json'):
+            path = os.path.join(self.directory, f'openapi.{schema_format}')
+            self.assertIn(path, out.getvalue())
+            with open(path, 'ab') as file:
+                file.write(b'\n')
+            with open(path, 'rb') as file:
+                contents[schema_format] = file.read()
+
+        for schema_format, content in contents.items():
+            response = self.client.get(SCHEMA_URL,
+                                       {'format': schema_format})
+
+            self.assertEqual(response.content, content)
+
+    @override_settings(DEBUG=True)
+    def test_files_ignored_when_debugging(self):
+        """Test the schema is generated afresh while debugging."""
+        call_command('generate_schema', stdout=StringIO())
+        with open(os.path.join(self.directory, 'openapi.yaml'), 'wb') as file:
+            file.write(b'stale')
+
+        response = self.client.get(SCHEMA_URL)
+
+        self.assertNotEqual(response.content, b'stale')
+
+    def test_generated_without_warnings(self):
+        """Test every view and field is described in the schema."""
+        call_command('spectacular', '--fail-on-warn', '--validate',
+                     '--file', os.path.join(self.directory, 'openapi.yaml'),
+                     stdout=StringIO(), stderr=StringIO())
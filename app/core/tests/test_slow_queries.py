@@ -0,0 +1,167 @@
+"""
+Tests for the slow query log.
+"""
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core import metrics
+from core.db import slow_queries
+from core.models import Recipe
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+class NormalizeTests(SimpleTestCase):
+    """Test fingerprinting SQL."""
+
+    def test_literals_and_lists_collapsed(self):
+        """Test queries differing in values share a fingerprint."""
+        first = slow_queries.normalize(
+            'SELECT "t"."id" FROM "t" WHERE "t"."id" IN (%s, %s)\n'
+            "  AND \"t\".\"name\" = 'it''s' LIMIT 21"
+        )
+        second = slow_queries.normalize(
+            'SELECT "t"."id" FROM "t" WHERE "t"."id" IN (%s) '
+            "AND \"t\".\"name\" = 'other' LIMIT 100"
+        )
+
+        self.assertEqual(first, second)
+        self.assertEqual(
+            first,
+            'SELECT "t"."id" FROM "t" WHERE "t"."id" IN (...) '
+            'AND "t"."name" = ? LIMIT ?'
+        )
+        self.assertEqual(
+            slow_queries.normalize('INSERT INTO t VALUES (%s, %s), (%s, %s)'),
+            'INSERT INTO t VALUES (...)'
+        )
+
+
+class SlowQueryLogTests(TestCase):
+    """Test logging slow queries and reporting them."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        settings_override = override_settings(
+            SLOW_QUERY_LOG=os.path.join(self.directory, 'slow.jsonl'),
+            SLOW_QUERY_THRESHOLD_MS=0,
+            SLOW_QUERY_EXPLAIN_RATE=1,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        user = get_user_model().objects.create_user('user@example.com',
+                                                    'pass123')
+        Recipe.objects.create(user=user, title='Sample recipe',
+                              time_minutes=10, price=Decimal('5.00'))
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def view_entries(self):
+        """Return the logged entries of the recipe list view."""
+        return [entry for entry in slow_queries.read_entries()
+                if entry['view'] == 'recipe:recipe-list']
+
+    def test_queries_logged_with_view_and_plan(self):
+        """Test a view's queries are logged with their stack and plan."""
+        self.client.get(RECIPES_URL)
+
+        entries = self.view_entries()
+        self.assertGreater(len(entries), 1)
+        frames = [frame for entry in entries for frame in entry['stack']]
+        self.assertTrue(any(frame.startswith('recipe/rows.py:')
+                            for frame in frames))
+        self.assertFalse(any(frame.startswith(('core/db/', 'core/metrics'))
+                             for frame in frames))
+        entry = entries[0]
+        self.assertEqual(entry['path'], RECIPES_URL)
+        self.assertIn('actual time', entry['plan'])
+        self.assertEqual(
+            entry['fingerprint'], slow_queries.fingerprint(entry['sql'])
+        )
+
+    def test_fast_queries_not_logged(self):
+        """Test queries under the threshold aren't logged."""
+        with override_settings(SLOW_QUERY_THRESHOLD_MS=60000):
+            self.client.get(RECIPES_URL)
+
+        self.assertEqual(self.view_entries(), [])
+
+    def test_plans_sampled(self):
+        """Test no plan is captured with a zero rate."""
+        with override_settings(SLOW_QUERY_EXPLAIN_RATE=0):
+            self.client.get(RECIPES_URL)
+
+        self.assertTrue(all(entry['plan'] is None
+                            for entry in self.view_entries()))
+
+    def test_plans_not_counted(self):
+        """Test capturing a plan adds no query to the request metrics."""
+        stats = metrics.RequestStats(None)
+        token = metrics.current_request.set(stats)
+        try:
+            get_user_model().objects.count()
+        finally:
+            metrics.current_request.reset(token)
+
+        self.assertEqual(stats.queries, 1)
+        entry = list(slow_queries.read_entries())[-1]
+        self.assertIn('COUNT(*)', entry['sql'])
+        self.assertIn('actual time', entry['plan'])
+
+    def test_failed_explain(self):
+        """Test a failing EXPLAIN leaves the transaction usable."""
+        with self.assertLogs('core.db.slow_queries', 'WARNING'), \
+                connection.cursor() as cursor:
+            # Running it again fails as the table exists.
+            cursor.execute('SELECT 1 AS one INTO TEMP TABLE slow_query_test')
+
+        self.assertEqual(get_user_model().objects.count(), 1)
+
+    @override_settings(SLOW_QUERY_LOG_MAX_BYTES=2000,
+                       SLOW_QUERY_LOG_BACKUPS=2)
+    def test_log_rotated(self):
+        """Test the log is rotated and only a few backups are kept."""
+        with override_settings(SLOW_QUERY_LOG=os.path.join(
+            self.directory, 'rotated.jsonl'
+        )):
+            for _ in range(20):
+                get_user_model().objects.count()
+
+            files = slow_queries.log_files()
+            self.assertEqual(len(files), 3)
+            self.assertGreater(len(list(slow_queries.read_entries())), 0)
+
+    def test_command_groups_queries(self):
+        """Test the command reports the queries by fingerprint."""
+        for page_size in range(1, 4):
+            self.client.get(RECIPES_URL, {'page_size': page_size})
+        fingerprint = self.view_entries()[0]['fingerprint']
+
+        out = StringIO()
+        call_command('slow_queries', '--view', 'recipe:recipe-list',
+                     '--sort', 'count', '--since', '1', stdout=out)
+        self.assertIn(fingerprint, out.getvalue())
+        self.assertIn('recipe:recipe-list', out.getvalue())
+
+        out = StringIO()
+        call_command('slow_queries', fingerprint, stdout=out)
+        self.assertIn('3 queries, 0 failed', out.getvalue())
+        self.assertIn('recipe/conditional.py:', out.getvalue())
+        self.assertIn('actual time', out.getvalue())
+
+        with self.assertRaises(CommandError):
+            call_command('slow_queries', 'unknown', stdout=StringIO())
@@ -1,11 +1,92 @@
 """
 Core views for app.
 """
-from rest_framework.decorators import api_view
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.cache import get_conditional_response
+from django.views.decorators.http import require_GET
+from drf_spectacular.utils import extend_schema, inline_serializer
+from drf_spectacular.views import SpectacularAPIView
+from rest_framework import serializers
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 
+from core import metrics as metrics_registry, schema
+from core.db.pool import pool_stats
+
 
+@extend_schema(responses=inline_serializer(
+    'HealthCheck', {'healthy': serializers.BooleanField()}
+))
 @api_view(['GET'])
 def health_check(request):
     """Returns successful response."""
     return Response({'healthy': True})
+
+
+@extend_schema(responses=inline_serializer('DatabasePool', {
+    'alias': serializers.CharField(),
+    'database': serializers.CharField(),
+    'max_size': serializers.IntegerField(),
+    'idle': serializers.IntegerField(),
+    'checked_out': serializers.IntegerField(),
+    'connects': serializers.IntegerField(),
+    'waits': serializers.IntegerField(),
+    'timeouts': serializers.IntegerField(),
+    'reconnects': serializers.IntegerField(),
+}, many=True))
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def database_pools(request):
+    """Returns the counters of the database connection pools."""
+    return Response(pool_stats())
+
+
+@require_GET
+def metrics(request):
+    """
+    Returns the request metrics in the Prometheus text format.
+
+    When ``METRICS_TOKEN`` is set, it's required as a bearer token.
+    """
+    token = settings.METRICS_TOKEN
+    if token and not hmac.compare_digest(
+        request.headers.get('Authorization', '').encode(),
+        f'Bearer {token}'.encode()
+    ):
+        return HttpResponseForbidden()
+
+    return HttpResponse(
+        metrics_registry.render(metrics_registry.collect()),
+        content_type=metrics_registry.CONTENT_TYPE
+    )
+
+
+class SchemaView(SpectacularAPIView):
+    """
+    Serves the OpenAPI schema generated once, see ``core.schema``.
+
+    Requests for another language or API version generate it each time.
+    """
+
+    def _get_schema_response(self, request):
+        """Returns the cached schema in the negotiated format."""
+        if request.GET.get('lang') or request.GET.get('version'):
+            return super()._get_schema_response(request)
+
+        renderer = request.accepted_renderer
+        content, etag = schema.get(renderer.format)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            content_type = request.accepted_media_type
+            if renderer.charset:
+                content_type += f'; charset={renderer.charset}'
+            response = HttpResponse(content, content_type=content_type)
+            response['Content-Disposition'] = (
+                f'inline; filename="{self._get_filename(request, None)}"'
+            )
+        response['ETag'] = etag
+        return response
@@ -0,0 +1,16 @@
+"""
+Load tests for the API.
+
+Virtual users run scripted scenarios against a running server and the
+throughput, latency percentiles and error rates are reported for each
+endpoint. Only the standard library is used, so the harness runs from
+any machine, e.g. against the development stack::
+
+    docker compose up
+    python -m loadtest http://localhost:8000 --users 20 --duration 60 \\
+        --output results.json
+
+Results saved with ``--output`` can be compared with those of another
+commit with ``--baseline``, which fails when an endpoint got slower or
+less reliable.
+"""
@@ -0,0 +1,92 @@
+"""
+Command line of the load tests, see ``python -m loadtest --help``.
+"""
+import argparse
+import json
+import logging
+import sys
+
+from loadtest import runner, scenarios, stats
+
+
+def parse_weights(values):
+    """Return the scenario weights from ``name`` or ``name=weight`` items."""
+    if not values:
+        return None
+
+    weights = {}
+    for value in values:
+        name, _, weight = value.partition('=')
+        if name not in scenarios.SCENARIOS:
+            raise argparse.ArgumentTypeError(
+                f'Unknown scenario {name}, expected one of '
+                f'{", ".join(scenarios.SCENARIOS)}.'
+            )
+        weights[name] = int(weight or 1)
+
+    return weights
+
+
+def main(argv=None):
+    """Run the load test and report the results."""
+    parser = argparse.ArgumentParser(
+        prog='python -m loadtest',
+        description='Load test the API of a running server.'
+    )
+    parser.add_argument('base_url', help='e.g. http://localhost:8000')
+    parser.add_argument('--users', type=int, default=10,
+                        help='Number of concurrent virtual users.')
+    parser.add_argument('--duration', type=float, default=60,
+                        help='Seconds measured.')
+    parser.add_argument('--warmup', type=float, default=5,
+                        help='Seconds run before measuring.')
+    parser.add_argument(
+        '--scenario', action='append', metavar='NAME[=WEIGHT]',
+        help=(
+            'Scenario to run, repeatable. One of '
+            f'{", ".join(scenarios.SCENARIOS)}, all by default.'
+        )
+    )
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=30,
+                        help='Seconds to wait for a response.')
+    parser.add_argument('--output', help='File to save the results to.')
+    parser.add_argument('--baseline',
+                        help='Results of an earlier run to compare with.')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Allowed relative slowdown, 0.2 by default.')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    try:
+        weights = parse_weights(args.scenario)
+    except argparse.ArgumentTypeError as exc:
+        parser.error(str(exc))
+
+    results = runner.run(args.base_url, users=args.users,
+                         duration=args.duration, warmup=args.warmup,
+                         weights=weights, seed=args.seed,
+                         timeout=args.timeout)
+    print(stats.format_table(results))
+    print(f'\n{results["iterations"]} iterations, '
+          f'{results["failed_iterations"]} failed.')
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            regressions = stats.compare(json.load(baseline), results,
+                                        tolerance=args.tolerance)
+        if regressions:
+            print('\nRegressions against the baseline:')
+            print('\n'.join(f'  {line}' for line in regressions))
+            return 1
+        print('\nNo regressions against the baseline.')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
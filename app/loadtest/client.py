@@ -0,0 +1,132 @@
+"""
+HTTP client of the virtual users, recording every request it makes.
+"""
+import http.client
+import json
+import time
+import urllib.parse
+import uuid
+from collections import namedtuple
+
+
+Sample = namedtuple('Sample', ['name', 'status', 'seconds', 'ok', 'started'])
+Response = namedtuple('Response', ['status', 'headers', 'body', 'data'])
+
+
+class RequestFailed(Exception):
+    """A request failed or got an unexpected status."""
+
+
+class Client:
+    """
+    Client of one virtual user over a persistent connection.
+
+    Requests are recorded under their name, the path with the ids
+    replaced, e.g. ``GET /api/recipes/{id}/``.
+    """
+
+    def __init__(self, base_url, timeout=30):
+        parts = urllib.parse.urlsplit(base_url)
+        self.connection_class = (
+            http.client.HTTPSConnection if parts.scheme == 'https'
+            else http.client.HTTPConnection
+        )
+        self.netloc = parts.netloc
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self.token = None
+        self.samples = []
+        self._connection = None
+
+    def close(self):
+        """Close the connection to the server."""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def request(self, method, path, name=None, json_data=None, body=None,
+                headers=None, expect=(200,)):
+        """
+        Make a request and return its response.
+
+        ``RequestFailed`` is raised when the status isn't in ``expect``,
+        the request is recorded as an error then.
+        """
+        name = f'{method} {name or path}'
+        headers = dict(headers or {})
+        if self.token:
+            headers['Authorization'] = f'Token {self.token}'
+        if json_data is not None:
+            body = json.dumps(json_data).encode()
+            headers['Content-Type'] = 'application/json'
+
+        started = time.time()
+        start = time.perf_counter()
+        try:
+            response = self._send(method, self.prefix + path, body, headers)
+        except (OSError, ValueError, http.client.HTTPException) as exc:
+            self.close()
+            self.samples.append(Sample(name, 0, time.perf_counter() - start,
+                                       False, started))
+            raise RequestFailed(f'{name}: {exc!r}') from exc
+
+        ok = response.status in expect
+        self.samples.append(Sample(name, response.status,
+                                   time.perf_counter() - start, ok, started))
+        if not ok:
+            raise RequestFailed(
+                f'{name}: {response.status} {response.body[:200]!r}'
+            )
+
+        return response
+
+    def upload(self, path, field, filename, content, content_type,
+               name=None, expect=(200,)):
+        """Post a file as ``multipart/form-data``."""
+        boundary = uuid.uuid4().hex
+        body = b''.join([
+            f'--{boundary}\r\n'.encode(),
+            f'Content-Disposition: form-data; name="{field}"; '
+            f'filename="{filename}"\r\n'.encode(),
+            f'Content-Type: {content_type}\r\n\r\n'.encode(),
+            content,
+            f'\r\n--{boundary}--\r\n'.encode(),
+        ])
+        return self.request(
+            'POST', path, name=name, body=body, expect=expect,
+            headers={
+                'Content-Type': f'multipart/form-data; boundary={boundary}'
+            }
+        )
+
+    def _send(self, method, path, body, headers):
+        """Send a request, reconnecting once if the connection dropped."""
+        for attempt in range(2):
+            reused = self._connection is not None
+            if not reused:
+                self._connection = self.connection_class(
+                    self.netloc, timeout=self.timeout
+                )
+            try:
+                self._connection.request(method, path, body=body,
+                                         headers=headers)
+                response = self._connection.getresponse()
+                content = response.read()
+                break
+            except (http.client.RemoteDisconnected, BrokenPipeError,
+                    ConnectionResetError):
+                # Servers close idle keep-alive connections, the request
+                # is sent again on a new one.
+                self.close()
+                if attempt or not reused:
+                    raise
+
+        if response.will_close:
+            self.close()
+        data = None
+        if content and response.getheader('Content-Type', '').startswith(
+            'application/json'
+        ):
+            data = json.loads(content)
+
+        return Response(response.status, response.headers, content, data)
@@ -0,0 +1,102 @@
+"""
+Running virtual users concurrently for a given time.
+"""
+import logging
+import random
+import threading
+import time
+
+from loadtest import scenarios, stats
+from loadtest.client import Client, RequestFailed
+
+
+logger = logging.getLogger(__name__)
+
+
+class VirtualUser:
+    """A user of the API running weighted scenarios in a loop."""
+
+    def __init__(self, base_url, weights, seed, timeout=30):
+        self.client = Client(base_url, timeout=timeout)
+        self.rng = random.Random(seed)
+        self.names = list(weights)
+        self.weights = [weights[name] for name in self.names]
+        self.iterations = 0
+        self.failed = 0
+
+    def run(self, ready, clock):
+        """
+        Prepare the user, then run scenarios until the deadline.
+
+        The clock is started once all the users are prepared.
+        """
+        try:
+            scenarios.prepare(self)
+        except RequestFailed as exc:
+            logger.warning('Preparing a user failed: %s', exc)
+            self.failed += 1
+            self.client.close()
+            ready.wait()
+            return
+
+        ready.wait()
+        while time.time() < clock['deadline']:
+            name = self.rng.choices(self.names, self.weights)[0]
+            try:
+                scenarios.SCENARIOS[name](self)
+            except RequestFailed as exc:
+                logger.debug('Scenario %s failed: %s', name, exc)
+                self.failed += 1
+            self.iterations += 1
+
+        self.client.close()
+
+
+def run(base_url, users=10, duration=60, warmup=5, weights=None, seed=0,
+        timeout=30):
+    """
+    Run the virtual users and return the results.
+
+    Users are prepared, each with an account and a few recipes, then run
+    for ``warmup`` seconds, whose requests aren't counted, and
+    ``duration`` seconds more.
+    """
+    weights = weights or scenarios.DEFAULT_WEIGHTS
+    virtual_users = [
+        VirtualUser(base_url, weights, seed=seed + i, timeout=timeout)
+        for i in range(users)
+    ]
+    clock = {}
+
+    def start_clock():
+        clock['measured_from'] = time.time() + warmup
+        clock['deadline'] = clock['measured_from'] + duration
+
+    ready = threading.Barrier(users, action=start_clock)
+    threads = [
+        threading.Thread(target=user.run, args=(ready, clock),
+                         name=f'virtual-user-{i}')
+        for i, user in enumerate(virtual_users)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    samples = [
+        sample for user in virtual_users for sample in user.client.samples
+        if clock['measured_from'] <= sample.started < clock['deadline']
+    ]
+    return {
+        'config': {
+            'base_url': base_url,
+            'users': users,
+            'duration': duration,
+            'warmup': warmup,
+            'weights': weights,
+            'seed': seed,
+        },
+        'iterations': sum(user.iterations for user in virtual_users),
+        'failed_iterations': sum(user.failed for user in virtual_users),
+        **stats.summarize(samples, duration),
+    }
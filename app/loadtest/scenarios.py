@@ -0,0 +1,189 @@
+"""
+Scripted scenarios run by the virtual users.
+
+Each scenario is a function taking the virtual user and making the
+requests of one iteration with its client. A failed request ends the
+iteration, the next one starts afresh.
+"""
+import struct
+import urllib.parse
+import uuid
+import zlib
+
+
+TAG_NAMES = ['Vegan', 'Quick', 'Dessert', 'Spicy', 'Breakfast', 'Soup']
+INGREDIENT_NAMES = ['Salt', 'Egg', 'Flour', 'Tomato', 'Garlic', 'Basil',
+                    'Onion', 'Butter', 'Rice', 'Lemon']
+WORDS = ['lemon', 'garlic', 'roasted', 'creamy', 'quick', 'soup', 'pasta',
+         'salad', 'curry', 'bread']
+UPLOAD_BLOCK = 64 * 1024
+
+
+def make_png(rng, width=256, height=256):
+    """Return a PNG of random pixels, so it doesn't compress away."""
+    def chunk(kind, data):
+        return (struct.pack('>I', len(data)) + kind + data
+                + struct.pack('>I', zlib.crc32(kind + data)))
+
+    rows = b''.join(
+        b'\x00' + rng.randbytes(width * 3) for _ in range(height)
+    )
+    return b''.join([
+        b'\x89PNG\r\n\x1a\n',
+        chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0,
+                                   0)),
+        chunk(b'IDAT', zlib.compress(rows)),
+        chunk(b'IEND', b''),
+    ])
+
+
+def relative_path(client, url):
+    """Return the path of a link returned by the API for the client."""
+    parts = urllib.parse.urlsplit(url)
+    return f'{parts.path[len(client.prefix):]}?{parts.query}'
+
+
+def recipe_payload(rng):
+    """Return a recipe with a few tags and ingredients."""
+    return {
+        'title': ' '.join(rng.sample(WORDS, 3)).capitalize(),
+        'description': ' '.join(rng.choices(WORDS, k=30)),
+        'time_minutes': rng.randint(5, 120),
+        'price': f'{rng.randint(100, 5000) / 100:.2f}',
+        'link': 'https://example.com/recipe',
+        'tags': [{'name': name} for name in rng.sample(TAG_NAMES, 2)],
+        'ingredients': [
+            {'name': name} for name in rng.sample(INGREDIENT_NAMES, 4)
+        ],
+    }
+
+
+def sign_up(user):
+    """Create the account of a virtual user and log in with it."""
+    email = f'load-{uuid.uuid4().hex}@example.com'
+    password = uuid.uuid4().hex
+    user.client.token = None
+    user.client.request('POST', '/api/user/', json_data={
+        'email': email, 'password': password, 'name': 'Load test',
+    }, expect=(201,))
+    response = user.client.request('POST', '/api/user/token/', json_data={
+        'email': email, 'password': password,
+    })
+    user.client.token = response.data['token']
+
+
+def prepare(user):
+    """Sign up and create the recipes the lists are filtered on."""
+    sign_up(user)
+    for _ in range(5):
+        user.client.request('POST', '/api/recipes/',
+                            json_data=recipe_payload(user.rng),
+                            expect=(201,))
+
+
+def auth(user):
+    """Sign up a new account and read its profile."""
+    token = user.client.token
+    try:
+        sign_up(user)
+        user.client.request('GET', '/api/user/me/')
+    finally:
+        user.client.token = token
+
+
+def recipe_crud(user):
+    """Create, read, update and delete a recipe with nested objects."""
+    client = user.client
+    recipe = client.request('POST', '/api/recipes/',
+                            json_data=recipe_payload(user.rng),
+                            expect=(201,)).data
+    path = f'/api/recipes/{recipe["id"]}/'
+    name = '/api/recipes/{id}/'
+
+    client.request('GET', path, name=name)
+    client.request('PATCH', path, name=name, json_data={
+        'tags': [{'name': tag} for tag in user.rng.sample(TAG_NAMES, 3)],
+    })
+    client.request('PUT', path, name=name,
+                   json_data=recipe_payload(user.rng))
+    client.request('DELETE', path, name=name, expect=(204,))
+
+
+def filtered_lists(user):
+    """List recipes, tags and ingredients with the supported filters."""
+    client = user.client
+    tags = client.request('GET', '/api/tags/?assigned_only=1',
+                          name='/api/tags/?assigned_only').data['results']
+    ingredients = client.request(
+        'GET', '/api/ingredients/', name='/api/ingredients/'
+    ).data['results']
+    tag_ids = ','.join(
+        str(tag['id']) for tag in user.rng.sample(tags, min(2, len(tags)))
+    )
+    ingredient_ids = ','.join(
+        str(ingredient['id'])
+        for ingredient in user.rng.sample(ingredients,
+                                          min(2, len(ingredients)))
+    )
+
+    client.request('GET', '/api/recipes/')
+    page = client.request('GET', '/api/recipes/?page_size=2',
+                          name='/api/recipes/?page_size').data
+    if page['next']:
+        client.request('GET', relative_path(client, page['next']),
+                       name='/api/recipes/?cursor')
+    client.request('GET', f'/api/recipes/?tags={tag_ids}',
+                   name='/api/recipes/?tags')
+    client.request('GET', f'/api/recipes/?tags={tag_ids}&tags_mode=all',
+                   name='/api/recipes/?tags&tags_mode=all')
+    client.request('GET', f'/api/recipes/?ingredients={ingredient_ids}',
+                   name='/api/recipes/?ingredients')
+    client.request('GET', f'/api/recipes/?search={user.rng.choice(WORDS)}',
+                   name='/api/recipes/?search')
+    client.request('GET', '/api/recipes/?fields=id,title,price&expand=',
+                   name='/api/recipes/?fields')
+    client.request('GET', '/api/ingredients/autocomplete/?q=to',
+                   name='/api/ingredients/autocomplete/')
+
+
+def image_upload(user):
+    """Upload an image to a recipe at once and then in chunks."""
+    client = user.client
+    image = make_png(user.rng)
+    recipe = client.request('POST', '/api/recipes/',
+                            json_data=recipe_payload(user.rng),
+                            expect=(201,)).data
+    path = f'/api/recipes/{recipe["id"]}/'
+
+    client.upload(f'{path}upload-image/', 'image', 'image.png', image,
+                  'image/png', name='/api/recipes/{id}/upload-image/',
+                  expect=(202,))
+
+    upload = client.request('POST', '/api/image-uploads/', json_data={
+        'recipe': recipe['id'], 'size': len(image),
+    }, expect=(201,)).data
+    block = min(upload['chunk_size'], UPLOAD_BLOCK)
+    for offset in range(0, len(image), block):
+        chunk = image[offset:offset + block]
+        client.request(
+            'PATCH', f'/api/image-uploads/{upload["id"]}/',
+            name='/api/image-uploads/{id}/', body=chunk,
+            headers={
+                'Content-Type': 'application/offset+octet-stream',
+                'Upload-Offset': str(offset),
+            },
+            expect=(202,) if offset + len(chunk) == len(image) else (204,)
+        )
+
+    client.request('DELETE', path, name='/api/recipes/{id}/',
+                   expect=(204,))
+
+
+SCENARIOS = {
+    'auth': auth,
+    'crud': recipe_crud,
+    'lists': filtered_lists,
+    'upload': image_upload,
+}
+# How often each scenario runs relative to the others by default.
+DEFAULT_WEIGHTS = {'auth': 1, 'crud': 3, 'lists': 6, 'upload': 1}
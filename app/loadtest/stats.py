@@ -0,0 +1,117 @@
+"""
+Summaries of the recorded requests and comparisons between runs.
+"""
+import math
+from collections import defaultdict
+
+
+PERCENTILES = [50, 95, 99]
+
+
+def percentile(sorted_values, percent):
+    """Return the nearest-rank percentile of sorted values."""
+    if not sorted_values:
+        return None
+
+    rank = math.ceil(percent / 100 * len(sorted_values))
+    return sorted_values[max(rank, 1) - 1]
+
+
+def summarize(samples, seconds):
+    """
+    Return the statistics of each endpoint and of all the requests.
+
+    Latencies are in milliseconds, throughputs in requests per second
+    over the ``seconds`` measured.
+    """
+    by_name = defaultdict(list)
+    for sample in samples:
+        by_name[sample.name].append(sample)
+
+    endpoints = {
+        name: _summarize(by_name[name], seconds) for name in sorted(by_name)
+    }
+    return {'endpoints': endpoints, 'total': _summarize(samples, seconds)}
+
+
+def _summarize(samples, seconds):
+    """Return the statistics of a group of requests."""
+    latencies = sorted(sample.seconds * 1000 for sample in samples)
+    errors = sum(1 for sample in samples if not sample.ok)
+    statuses = defaultdict(int)
+    for sample in samples:
+        statuses[str(sample.status)] += 1
+
+    summary = {
+        'requests': len(samples),
+        'errors': errors,
+        'error_rate': errors / len(samples) if samples else 0.0,
+        'rps': len(samples) / seconds if seconds else 0.0,
+        'mean_ms': sum(latencies) / len(latencies) if latencies else None,
+        'max_ms': latencies[-1] if latencies else None,
+        'statuses': dict(sorted(statuses.items())),
+    }
+    for percent in PERCENTILES:
+        summary[f'p{percent}_ms'] = percentile(latencies, percent)
+
+    return summary
+
+
+def compare(baseline, current, tolerance=0.2, min_requests=20):
+    """
+    Return the regressions of ``current`` against ``baseline``.
+
+    An endpoint regressed when its p95 latency grew by more than
+    ``tolerance``, its error rate grew, or its throughput dropped by more
+    than ``tolerance``. Endpoints with fewer than ``min_requests`` in
+    either run are too noisy to compare.
+    """
+    regressions = []
+
+    for name, new in current['endpoints'].items():
+        old = baseline['endpoints'].get(name)
+        if old is None or min(old['requests'],
+                              new['requests']) < min_requests:
+            continue
+        if new['p95_ms'] > old['p95_ms'] * (1 + tolerance):
+            regressions.append(
+                f'{name}: p95 {old["p95_ms"]:.1f}ms -> '
+                f'{new["p95_ms"]:.1f}ms'
+            )
+        if new['error_rate'] > old['error_rate']:
+            regressions.append(
+                f'{name}: error rate {old["error_rate"]:.2%} -> '
+                f'{new["error_rate"]:.2%}'
+            )
+        if new['rps'] < old['rps'] * (1 - tolerance):
+            regressions.append(
+                f'{name}: {old["rps"]:.1f} -> {new["rps"]:.1f} requests/s'
+            )
+
+    return regressions
+
+
+def format_table(summary):
+    """Return the statistics as a table for the terminal."""
+    header = (
+        f'{"endpoint":<52} {"reqs":>7} {"rps":>8} {"p50":>8} {"p95":>8} '
+        f'{"p99":>8} {"errors":>7}'
+    )
+    lines = [header, '-' * len(header)]
+    rows = list(summary['endpoints'].items()) + [('TOTAL', summary['total'])]
+
+    for name, stats in rows:
+        if name == 'TOTAL':
+            lines.append('-' * len(header))
+        lines.append(
+            f'{name[:52]:<52} {stats["requests"]:>7} {stats["rps"]:>8.1f} '
+            f'{_ms(stats["p50_ms"])} {_ms(stats["p95_ms"])} '
+            f'{_ms(stats["p99_ms"])} {stats["error_rate"]:>7.2%}'
+        )
+
+    return '\n'.join(lines)
+
+
+def _ms(value):
+    """Format a latency for the table."""
+    return f'{"-":>8}' if value is None else f'{value:>6.1f}ms'
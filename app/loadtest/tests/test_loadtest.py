@@ -0,0 +1,118 @@
+"""
+Tests for the load testing harness.
+"""
+import shutil
+import tempfile
+
+from django.test import LiveServerTestCase, SimpleTestCase, override_settings
+
+from loadtest import runner, scenarios, stats
+from loadtest.client import Sample
+
+
+def make_samples(name, latencies, errors=0):
+    """Return samples of an endpoint with the latencies in ms."""
+    return [
+        Sample(name, 500 if i < errors else 200, latency / 1000,
+               i >= errors, 0)
+        for i, latency in enumerate(latencies)
+    ]
+
+
+class StatsTests(SimpleTestCase):
+    """Test summarizing and comparing runs."""
+
+    def test_percentile(self):
+        """Test the nearest-rank percentiles."""
+        values = list(range(1, 101))
+
+        self.assertEqual(stats.percentile(values, 50), 50)
+        self.assertEqual(stats.percentile(values, 99), 99)
+        self.assertEqual(stats.percentile([7], 95), 7)
+        self.assertIsNone(stats.percentile([], 50))
+
+    def test_summarize(self):
+        """Test the statistics of each endpoint and the total."""
+        samples = (make_samples('GET /a', range(1, 101), errors=5)
+                   + make_samples('GET /b', [10] * 100))
+
+        summary = stats.summarize(samples, seconds=10)
+
+        endpoint = summary['endpoints']['GET /a']
+        self.assertEqual(endpoint['requests'], 100)
+        self.assertEqual(endpoint['rps'], 10)
+        self.assertEqual(endpoint['error_rate'], 0.05)
+        self.assertEqual(endpoint['p95_ms'], 95)
+        self.assertEqual(endpoint['statuses'], {'200': 95, '500': 5})
+        self.assertEqual(summary['total']['requests'], 200)
+
+    def test_compare(self):
+        """Test slower or failing endpoints are reported."""
+        baseline = stats.summarize(
+            make_samples('GET /a', [10] * 100)
+            + make_samples('GET /b', [10] * 100), seconds=10
+        )
+        current = stats.summarize(
+            make_samples('GET /a', [10] * 90 + [20] * 10)
+            + make_samples('GET /b', [11] * 100, errors=1), seconds=10
+        )
+
+        regressions = stats.compare(baseline, current, tolerance=0.2)
+
+        self.assertEqual(len(regressions), 2)
+        self.assertIn('GET /a: p95', regressions[0])
+        self.assertIn('GET /b: error rate', regressions[1])
+        self.assertEqual(stats.compare(baseline, baseline), [])
+
+
+class LoadTestRunTests(LiveServerTestCase):
+    """Test the scenarios run against the API without errors."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        upload_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        self.addCleanup(shutil.rmtree, upload_dir, ignore_errors=True)
+        settings_override = override_settings(
+            MEDIA_ROOT=media_root, IMAGE_UPLOAD_TEMP_DIR=upload_dir
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_scenarios(self):
+        """Test every scenario runs and every request succeeds."""
+        user = runner.VirtualUser(self.live_server_url,
+                                  scenarios.DEFAULT_WEIGHTS, seed=0)
+        scenarios.prepare(user)
+
+        for name, scenario in scenarios.SCENARIOS.items():
+            with self.subTest(scenario=name):
+                scenario(user)
+
+        self.assertTrue(all(sample.ok for sample in user.client.samples))
+        names = {sample.name for sample in user.client.samples}
+        for name in ('POST /api/user/token/', 'PUT /api/recipes/{id}/',
+                     'GET /api/recipes/?cursor', 'GET /api/recipes/?search',
+                     'POST /api/recipes/{id}/upload-image/',
+                     'PATCH /api/image-uploads/{id}/'):
+            self.assertIn(name, names)
+
+    def test_run(self):
+        """Test the users run for the duration and are summarized."""
+        results = runner.run(self.live_server_url, users=2, duration=2,
+                             warmup=0, timeout=10)
+
+        self.assertEqual(results['failed_iterations'], 0)
+        self.assertEqual(results['total']['errors'], 0)
+        self.assertGreater(results['iterations'], 0)
+        self.assertEqual(results['config']['users'], 2)
+
+    def test_scenario_weights(self):
+        """Test only the chosen scenarios run."""
+        results = runner.run(self.live_server_url, users=1, duration=1,
+                             warmup=0, weights={'auth': 1})
+
+        self.assertEqual(set(results['endpoints']), {
+            'POST /api/user/', 'POST /api/user/token/', 'GET /api/user/me/'
+        })
+        self.assertIn('auth', scenarios.SCENARIOS)
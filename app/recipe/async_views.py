@@ -0,0 +1,67 @@
+"""
+Async views for reading recipes, tags and ingredients under ASGI.
+
+Django 4.0 has no async ORM interface, so the database work of each
+request runs through ``sync_to_async`` on a pool of threads sized to the
+database connection pool, ``ASYNC_VIEW_THREADS``. The event loop keeps
+accepting requests while they wait on the database.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import HttpResponseNotAllowed
+
+from recipe import views
+
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.ASYNC_VIEW_THREADS,
+    thread_name_prefix='async-views'
+)
+
+
+def database_sync_to_async(func):
+    """
+    Return an awaitable running ``func`` in a worker thread.
+
+    The connections of the worker thread are released before and after
+    the call, as the request signals only do it for the main thread.
+    """
+    def run(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return sync_to_async(run, thread_sensitive=False, executor=executor)
+
+
+def async_read_view(viewset, action):
+    """Return an async view serving a read action of a viewset."""
+    view = viewset.as_view({'get': action})
+
+    @database_sync_to_async
+    def render(request, *args, **kwargs):
+        """Run the sync view and render its response."""
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+
+    async def async_view(request, *args, **kwargs):
+        """Return the response of the view."""
+        if request.method not in ('GET', 'HEAD'):
+            return HttpResponseNotAllowed(['GET', 'HEAD'])
+
+        return await render(request, *args, **kwargs)
+
+    return async_view
+
+
+recipe_list = async_read_view(views.RecipeViewSet, 'list')
+recipe_detail = async_read_view(views.RecipeViewSet, 'retrieve')
+tag_list = async_read_view(views.TagViewSet, 'list')
+ingredient_list = async_read_view(views.IngredientViewSet, 'list')
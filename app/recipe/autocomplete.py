@@ -0,0 +1,38 @@
+"""
+Name suggestions for tags and ingredients.
+
+Names are matched with the trigram word similarity of ``pg_trgm``, so both
+prefixes and misspellings find them, using the GIN index on the user and
+name columns. Databases without the extension get prefix matches only.
+"""
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connections
+from django.db.models.functions import Lower
+
+
+_trigram_databases = {}
+
+
+def trigram_enabled(using='default'):
+    """Return whether ``pg_trgm`` is installed in the database."""
+    if using not in _trigram_databases:
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                "SELECT EXISTS (SELECT 1 FROM pg_extension "
+                "WHERE extname = 'pg_trgm')"
+            )
+            _trigram_databases[using] = cursor.fetchone()[0]
+
+    return _trigram_databases[using]
+
+
+def suggest(queryset, text, limit):
+    """Return the objects whose names best match ``text``."""
+    if trigram_enabled(queryset.db):
+        return queryset.filter(name__trigram_word_similar=text).annotate(
+            similarity=TrigramWordSimilarity(text, 'name')
+        ).order_by('-similarity', 'name', 'id')[:limit]
+
+    return queryset.annotate(lower_name=Lower('name')).filter(
+        lower_name__startswith=text.lower()
+    ).order_by('name', 'id')[:limit]
@@ -0,0 +1,162 @@
+"""
+Per-user cache of the recipe API list responses.
+
+Responses are stored under a key holding the version of the user's data.
+Any change to the user's recipes, tags or ingredients bumps the version,
+so stale entries are never read again and expire from the backend.
+"""
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from rest_framework import status
+from rest_framework.response import Response
+
+from core import metrics
+
+
+# Comma separated lists whose order doesn't change the response.
+LIST_PARAMS = ('tags', 'ingredients', 'fields', 'expand')
+
+
+class CacheStats:
+    """Hit and miss counters of the response cache in this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def hit(self):
+        """Count a response served from the cache."""
+        with self._lock:
+            self.hits += 1
+
+    def miss(self):
+        """Count a response built by the view."""
+        with self._lock:
+            self.misses += 1
+
+    def snapshot(self):
+        """Return the current counters."""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+    def reset(self):
+        """Reset the counters."""
+        with self._lock:
+            self.hits = self.misses = 0
+
+
+stats = CacheStats()
+
+
+def get_cache():
+    """Return the cache backend storing the responses."""
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def _version_key(user_id):
+    """Return the cache key of a user's data version."""
+    return f'recipe-api:version:{user_id}'
+
+
+def get_version(user_id):
+    """Return the version of a user's data."""
+    cache = get_cache()
+    version = cache.get(_version_key(user_id))
+
+    if version is None:
+        # Start from the clock rather than 1 so an evicted version can't
+        # resurrect responses cached under an earlier one.
+        version = time.time_ns()
+        if not cache.add(_version_key(user_id), version, timeout=None):
+            version = cache.get(_version_key(user_id), version)
+
+    return version
+
+
+def bump_version(user_id):
+    """Make all the cached responses of a user stale."""
+    get_cache().set(_version_key(user_id), time.time_ns(), timeout=None)
+
+
+def invalidate(user_id):
+    """
+    Invalidate the cached responses of a user.
+
+    The version is bumped again on commit, so a response cached by a
+    concurrent request before the transaction committed isn't served.
+    """
+    bump_version(user_id)
+    transaction.on_commit(lambda: bump_version(user_id))
+
+
+def normalize_params(query_params):
+    """Return the query string of the request in a canonical form."""
+    params = []
+
+    for key in sorted(query_params):
+        values = query_params.getlist(key)
+        if key in LIST_PARAMS:
+            values = [','.join(sorted({
+                value.strip()
+                for item in values for value in item.split(',')
+            }))]
+        params.extend((key, value) for value in sorted(values))
+
+    return '&'.join(f'{key}={value}' for key, value in params)
+
+
+def get_cache_key(request):
+    """Return the cache key of a list request."""
+    user_id = request.user.id
+    url = (
+        f'{request.get_host()}{request.path}?'
+        f'{normalize_params(request.query_params)}'
+    )
+    digest = hashlib.sha1(url.encode()).hexdigest()
+
+    return f'recipe-api:response:{user_id}:{get_version(user_id)}:{digest}'
+
+
+class CachedListMixin:
+    """
+    Serve list responses from the per-user response cache.
+
+    The ETag of the response is cached along with its data, so a
+    conditional request hitting the cache is answered without queries.
+    """
+
+    def list(self, request, *args, **kwargs):
+        """Return the cached list response or build and cache it."""
+        cache = get_cache()
+        key = get_cache_key(request)
+        entry = cache.get(key)
+
+        if entry is not None:
+            stats.hit()
+            metrics.registry.observe_cache('responses', hit=True)
+            etag = entry['etag']
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = Response(entry['data'])
+            if etag:
+                response['ETag'] = etag
+            response['X-Cache'] = 'HIT'
+            return response
+
+        stats.miss()
+        metrics.registry.observe_cache('responses', hit=False)
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, {
+                'data': response.data,
+                'etag': response.get('ETag'),
+            }, settings.RESPONSE_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+        return response
@@ -0,0 +1,214 @@
+"""
+Conditional request support for the recipe API.
+
+The validators are computed from the ``updated_at`` columns. A detail
+``304 Not Modified`` costs a single query for the modification time, and
+a list one the query of the page, but neither serializes anything.
+"""
+import hashlib
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.utils.translation import gettext_lazy as _
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class PreconditionFailed(APIException):
+    """The resource changed since the client fetched it."""
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = _('The resource was modified since it was fetched.')
+    default_code = 'precondition_failed'
+
+
+def make_etag(*parts):
+    """Return a strong ETag from the parts identifying a representation."""
+    value = ':'.join(str(part) for part in parts)
+    return f'"{hashlib.md5(value.encode()).hexdigest()}"'
+
+
+def get_object_etag(obj, *variant):
+    """
+    Return the ETag of an object.
+
+    ``variant`` tells apart representations of the object other than the
+    default one.
+    """
+    return make_etag(obj.pk, obj.updated_at.isoformat(), *variant)
+
+
+def set_validators(response, etag, last_modified=None):
+    """Set the validator headers on a response."""
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+
+
+class NotModified(Exception):
+    """Raised to answer a list request with the response it carries."""
+
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+
+class ConditionalListMixin:
+    """
+    Answer conditional list requests.
+
+    The list ETag covers the keys and modification times of the rows of
+    the page and its links, so it's built from the page fetched anyway
+    and costs no query of its own. No ``Last-Modified`` is sent for lists
+    since a deletion does not move the latest modification time.
+    """
+
+    def get_list_etag(self, request, page):
+        """Return the ETag of a page of the list for the request."""
+        rows = [
+            (row['id'], row['updated_at'])
+            if isinstance(row, dict) else (row.pk, row.updated_at)
+            for row in page
+        ]
+
+        return make_etag(
+            request.user.id,
+            request.get_full_path(),
+            self.paginator.get_next_link(),
+            self.paginator.get_previous_link(),
+            *(f'{pk}@{updated_at.isoformat()}' for pk, updated_at in rows)
+        )
+
+    def paginate_queryset(self, queryset):
+        """Return the page, unless the client's copy of it is current."""
+        page = super().paginate_queryset(queryset)
+        self._list_etag = None
+
+        if page is not None:
+            self._list_etag = self.get_list_etag(self.request, page)
+            response = get_conditional_response(self.request,
+                                                etag=self._list_etag)
+            if response is not None:
+                raise NotModified(response)
+
+        return page
+
+    def list(self, request, *args, **kwargs):
+        """Return the list, or 304 when the client's copy is current."""
+        try:
+            response = super().list(request, *args, **kwargs)
+        except NotModified as not_modified:
+            return not_modified.response
+
+        if response.status_code == status.HTTP_200_OK and self._list_etag:
+            set_validators(response, self._list_etag)
+        return response
+
+
+class ConditionalRetrieveMixin:
+    """
+    Answer conditional detail requests.
+
+    The modification time is only looked up on its own when the client
+    sent validators, other requests read it from the fetched object.
+    """
+
+    def retrieve(self, request, *args, **kwargs):
+        """Return the object, or 304 when the client's copy is current."""
+        if self._has_validators(request):
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            updated_at = self.get_queryset().filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            ).order_by().values_list('updated_at', flat=True).first()
+        else:
+            updated_at = None
+
+        if updated_at is not None:
+            etag = make_etag(self.kwargs[lookup_url_kwarg],
+                             updated_at.isoformat(),
+                             *self.get_etag_variant())
+            response = get_conditional_response(
+                request,
+                etag=etag,
+                last_modified=int(updated_at.timestamp())
+            )
+            if response is not None:
+                return response
+
+        response = super().retrieve(request, *args, **kwargs)
+        instance = self._conditional_instance
+        set_validators(response,
+                       get_object_etag(instance, *self.get_etag_variant()),
+                       instance.updated_at)
+        return response
+
+    def get_etag_variant(self):
+        """Return the parts telling the requested representation apart."""
+        return ()
+
+    def get_object(self):
+        """Return the object and keep it for the validator headers."""
+        self._conditional_instance = super().get_object()
+        return self._conditional_instance
+
+    @staticmethod
+    def _has_validators(request):
+        """Return whether the request carries the client's validators."""
+        return (
+            'HTTP_IF_NONE_MATCH' in request.META
+            or 'HTTP_IF_MODIFIED_SINCE' in request.META
+        )
+
+
+class ConditionalUpdateMixin:
+    """
+    Support ``If-Match`` on updates to avoid lost updates.
+
+    The ETag is checked against the object already loaded for the update,
+    and the write is guarded with an ``UPDATE ... WHERE updated_at = ...``
+    so a concurrent change committed in between is detected as well.
+    """
+
+    def get_object(self):
+        """Return the object, checking the precondition of the request."""
+        obj = super().get_object()
+
+        if self._has_precondition():
+            response = get_conditional_response(
+                self.request, etag=get_object_etag(obj)
+            )
+            if response is not None:
+                raise PreconditionFailed()
+
+        self._conditional_instance = obj
+        return obj
+
+    def perform_update(self, serializer):
+        """Save the object, failing if it changed since it was read."""
+        if not self._has_precondition():
+            return super().perform_update(serializer)
+
+        instance = serializer.instance
+        with transaction.atomic():
+            claimed = type(instance).objects.filter(
+                pk=instance.pk, updated_at=instance.updated_at
+            ).update(updated_at=timezone.now())
+            if not claimed:
+                raise PreconditionFailed()
+            super().perform_update(serializer)
+
+    def update(self, request, *args, **kwargs):
+        """Update the object and return its new validators."""
+        response = super().update(request, *args, **kwargs)
+        instance = self._conditional_instance
+        set_validators(response, get_object_etag(instance),
+                       instance.updated_at)
+        return response
+
+    def _has_precondition(self):
+        """Return whether the request is a conditional update."""
+        return (
+            self.request.method in ('PUT', 'PATCH')
+            and 'HTTP_IF_MATCH' in self.request.META
+        )
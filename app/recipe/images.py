@@ -0,0 +1,217 @@
+"""
+Background processing of recipe images.
+
+Uploads are stored as they are and queued. Workers claim queued recipes,
+decode the originals with bounded memory, strip their metadata and store
+resized progressive JPEG and WebP variants for the API to serve.
+"""
+import io
+import logging
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from core.models import Recipe
+from recipe import cache
+
+
+logger = logging.getLogger(__name__)
+
+Image.MAX_IMAGE_PIXELS = settings.IMAGE_MAX_PIXELS
+
+FORMATS = {
+    'jpeg': ('JPEG', 'jpg', {
+        'quality': 85, 'optimize': True, 'progressive': True
+    }),
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+}
+
+
+class ImageTooLarge(Exception):
+    """The image has more pixels than allowed."""
+
+
+def check_image(file):
+    """
+    Check a file holds an image of an allowed size and return its format.
+
+    Only the header is decoded and the structure of the file verified.
+    """
+    with Image.open(file) as image:
+        width, height = image.size
+        if width * height > settings.IMAGE_MAX_PIXELS:
+            raise ImageTooLarge(f'{width}x{height} exceeds the pixel limit.')
+        image.verify()
+        return image.format
+
+
+def open_image(file):
+    """
+    Return the decoded image of a file, upright and without metadata.
+
+    The size is checked from the header before any pixel is decoded, and
+    JPEGs are decoded at the smallest scale still covering the largest
+    variant.
+    """
+    image = Image.open(file)
+    width, height = image.size
+    if width * height > settings.IMAGE_MAX_PIXELS:
+        raise ImageTooLarge(f'{width}x{height} exceeds the pixel limit.')
+
+    largest = max(settings.IMAGE_VARIANTS.values())
+    image.draft('RGB', (largest, largest))
+    image = ImageOps.exif_transpose(image)
+
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        image = background
+    elif image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    # Converting copies the pixels without the EXIF data, but exif_transpose
+    # keeps the info of upright images, so drop it explicitly.
+    image.info = {}
+    return image
+
+
+def make_variants(image, base_name):
+    """Store the variants of an image and return their description."""
+    variants = {}
+
+    for name, size in sorted(settings.IMAGE_VARIANTS.items(),
+                             key=lambda item: -item[1]):
+        image = image.copy() if image.width > size or image.height > size \
+            else image
+        image.thumbnail((size, size), Image.LANCZOS)
+        variant = {'width': image.width, 'height': image.height}
+
+        for key, (image_format, extension, options) in FORMATS.items():
+            buffer = io.BytesIO()
+            image.save(buffer, image_format, **options)
+            variant[key] = default_storage.save(
+                f'{base_name}-{name}.{extension}',
+                ContentFile(buffer.getvalue())
+            )
+
+        variants[name] = variant
+
+    return variants
+
+
+def delete_variants(variants):
+    """Delete the stored files of image variants."""
+    for variant in variants.values():
+        for key in FORMATS:
+            if variant.get(key):
+                default_storage.delete(variant[key])
+
+
+def mark_pending(recipe):
+    """Queue the new image of a recipe for processing, without saving."""
+    recipe.image_status = Recipe.ImageStatus.PENDING
+    recipe.image_variants = {}
+    recipe.image_claimed_at = None
+
+
+def claim_recipes(limit):
+    """
+    Mark up to ``limit`` queued recipes as processing and return them.
+
+    Rows locked by other workers are skipped. Recipes claimed longer than
+    ``IMAGE_PROCESSING_TIMEOUT`` ago, by a worker that died, are claimed
+    again. The claim time is kept on the recipes returned, it tells the
+    current claim apart from a stale one.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.IMAGE_PROCESSING_TIMEOUT)
+
+    with transaction.atomic():
+        ids = list(
+            Recipe.objects.select_for_update(skip_locked=True).filter(
+                Q(image_status=Recipe.ImageStatus.PENDING)
+                | Q(image_status=Recipe.ImageStatus.PROCESSING,
+                    image_claimed_at__lt=stale)
+            ).order_by('id').values_list('id', flat=True)[:limit]
+        )
+        Recipe.objects.filter(id__in=ids).update(
+            image_status=Recipe.ImageStatus.PROCESSING,
+            image_claimed_at=now
+        )
+
+    return list(Recipe.objects.filter(id__in=ids).only(
+        'id', 'user_id', 'image', 'image_variants', 'image_claimed_at'
+    ))
+
+
+def process_recipe_image(recipe):
+    """Make the variants of the image of a claimed recipe."""
+    base_name = os.path.splitext(recipe.image.name)[0]
+    variants = {}
+
+    try:
+        with recipe.image.open('rb') as file:
+            variants = make_variants(open_image(file), base_name)
+        status = Recipe.ImageStatus.READY
+    except Exception:
+        logger.exception('Processing the image of recipe %s failed.',
+                         recipe.id)
+        delete_variants(variants)
+        variants = {}
+        status = Recipe.ImageStatus.FAILED
+
+    # Only record the result if the image wasn't replaced meanwhile, and
+    # the claim didn't go stale and pass to another worker.
+    updated = Recipe.objects.filter(
+        id=recipe.id,
+        image=recipe.image.name,
+        image_status=Recipe.ImageStatus.PROCESSING,
+        image_claimed_at=recipe.image_claimed_at
+    ).update(
+        image_status=status,
+        image_variants=variants,
+        image_claimed_at=None,
+        updated_at=timezone.now()
+    )
+
+    if updated:
+        delete_variants(recipe.image_variants)
+        cache.invalidate(recipe.user_id)
+    else:
+        delete_variants(variants)
+
+    return status if updated else None
+
+
+def _process_in_thread(recipe):
+    """Process an image from a worker thread, releasing its connection."""
+    try:
+        return process_recipe_image(recipe)
+    finally:
+        close_old_connections()
+
+
+def process_pending(limit, executor=None):
+    """
+    Process up to ``limit`` queued images and return how many were.
+
+    The images are processed on the threads of ``executor`` when given,
+    Pillow releases the GIL while decoding, resizing and encoding.
+    """
+    recipes = claim_recipes(limit)
+
+    if executor is None:
+        for recipe in recipes:
+            process_recipe_image(recipe)
+    else:
+        list(executor.map(_process_in_thread, recipes))
+
+    return len(recipes)
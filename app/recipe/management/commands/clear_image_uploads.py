@@ -0,0 +1,15 @@
+"""
+Django command to delete image uploads that were never completed.
+"""
+from django.core.management.base import BaseCommand
+
+from recipe import uploads
+
+
+class Command(BaseCommand):
+    """Django command to delete expired image uploads."""
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        count = uploads.delete_expired_uploads()
+        self.stdout.write(f'Deleted {count} expired uploads.')
@@ -0,0 +1,45 @@
+"""
+Django command to process uploaded recipe images in the background.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from recipe import images
+
+
+class Command(BaseCommand):
+    """Django command to make the variants of queued recipe images."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=settings.IMAGE_WORKERS,
+            help='Number of images processed at the same time.'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=2,
+            help='Seconds to wait when there is no image to process.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Process the queued images and exit.'
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        workers = options['workers']
+
+        with ThreadPoolExecutor(workers,
+                                thread_name_prefix='images') as executor:
+            while True:
+                processed = images.process_pending(workers, executor)
+                if processed:
+                    self.stdout.write(f'Processed {processed} images.')
+                elif options['once']:
+                    break
+                else:
+                    time.sleep(options['interval'])
+                close_old_connections()
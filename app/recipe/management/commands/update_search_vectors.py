@@ -0,0 +1,45 @@
+"""
+Django command to fill the search vectors of recipes in batches.
+"""
+from django.core.management.base import BaseCommand
+
+from core.models import Recipe
+
+
+class Command(BaseCommand):
+    """Django command to recompute the search vectors of recipes."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of recipes updated per query.'
+        )
+        parser.add_argument(
+            '--missing', action='store_true',
+            help='Only fill the recipes without a search vector.'
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        recipes = Recipe.objects.order_by('id')
+        if options['missing']:
+            recipes = recipes.filter(search_vector__isnull=True)
+        last_id = 0
+        total = 0
+
+        # Each batch is its own short transaction, seeking on the primary
+        # key so no batch rescans the rows already done.
+        while True:
+            ids = list(recipes.filter(id__gt=last_id).values_list(
+                'id', flat=True
+            )[:options['batch_size']])
+            if not ids:
+                break
+
+            total += Recipe.objects.filter(
+                id__in=ids
+            ).update_search_vector()
+            last_id = ids[-1]
+            self.stdout.write(f'Updated {total} recipes.')
+
+        self.stdout.write(self.style.SUCCESS(f'Updated {total} recipes.'))
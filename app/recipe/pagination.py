@@ -0,0 +1,261 @@
+"""
+Pagination for the recipe API.
+"""
+import base64
+import binascii
+import json
+from collections import OrderedDict, namedtuple
+
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.db.models import BooleanField, F, Func, Q, Value
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+Cursor = namedtuple('Cursor', ['position', 'reverse'])
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination seeking on the ordering of the queryset.
+
+    The cursor holds the ordering values of the row at the edge of the
+    page, so every page is fetched with a ``WHERE`` on the ordering
+    columns instead of ``OFFSET`` and without counting the rows. The last
+    ordering field must be unique, e.g. ``order_by('-name', '-id')``.
+    """
+    cursor_query_param = 'cursor'
+    cursor_query_description = _('The pagination cursor value.')
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    page_size_query_description = _('Number of results to return per page.')
+    max_page_size = 1000
+    invalid_cursor_message = _('Invalid cursor')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Return a single page of results for the request cursor."""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+        self.ordering_fields = [
+            self._get_field(queryset, field.lstrip('-'))
+            for field in self.ordering
+        ]
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+
+        if self.cursor is not None:
+            queryset = queryset.filter(
+                self._seek_filter(self.cursor.position, reverse)
+            )
+        if reverse:
+            queryset = queryset.order_by(*self._reverse_ordering())
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+
+        return self.page
+
+    def get_page_size(self, request):
+        """Return the page size requested by the client."""
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_ordering(self, queryset):
+        """Return the ordering fields the keyset is built on."""
+        ordering = tuple(queryset.query.order_by)
+
+        if not ordering or not all(isinstance(f, str) for f in ordering):
+            raise ImproperlyConfigured(
+                f'{self.__class__.__name__} requires a queryset ordered '
+                'by field names.'
+            )
+
+        return ordering
+
+    def get_next_link(self):
+        """Return the link to the next page, if any."""
+        if not self.has_next or not self.page:
+            return None
+
+        return self.encode_cursor(
+            Cursor(position=self._get_position(self.page[-1]), reverse=False)
+        )
+
+    def get_previous_link(self):
+        """Return the link to the previous page, if any."""
+        if not self.has_previous or not self.page:
+            return None
+
+        return self.encode_cursor(
+            Cursor(position=self._get_position(self.page[0]), reverse=True)
+        )
+
+    def decode_cursor(self, request):
+        """Return the cursor sent with the request."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            position = data['p']
+            if (
+                not isinstance(position, list)
+                or len(position) != len(self.ordering)
+                or None in position
+            ):
+                raise ValueError('Invalid cursor position.')
+            # Values of the wrong type would fail in the query instead.
+            position = tuple(
+                field.to_python(value)
+                for field, value in zip(self.ordering_fields, position)
+            )
+            return Cursor(position=position, reverse=bool(data['r']))
+        except (TypeError, KeyError, ValueError, ValidationError,
+                binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, cursor):
+        """Return the url of the page starting at the cursor."""
+        data = json.dumps(
+            {'p': list(cursor.position), 'r': int(cursor.reverse)},
+            separators=(',', ':')
+        )
+        encoded = base64.urlsafe_b64encode(data.encode()).decode()
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded
+        )
+
+    def get_paginated_response(self, data):
+        """Return the page wrapped with the cursor links."""
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        """Return the schema of a paginated response."""
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        """Return the query parameters used by the pagination."""
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': str(self.cursor_query_description),
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': str(self.page_size_query_description),
+                'schema': {'type': 'integer'},
+            },
+        ]
+
+    def _get_position(self, row):
+        """Return the ordering values of a row, an object or a dict."""
+        if isinstance(row, dict):
+            return [row[field.lstrip('-')] for field in self.ordering]
+
+        return [getattr(row, field.lstrip('-')) for field in self.ordering]
+
+    @staticmethod
+    def _get_field(queryset, name):
+        """Return the model field or annotation output field ordered on."""
+        annotation = queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        if name == 'pk':
+            return queryset.model._meta.pk
+
+        return queryset.model._meta.get_field(name)
+
+    def _reverse_ordering(self):
+        """Return the ordering used when paging backwards."""
+        return [
+            field[1:] if field.startswith('-') else f'-{field}'
+            for field in self.ordering
+        ]
+
+    def _seek_filter(self, position, reverse):
+        """
+        Return the filter selecting rows after the position.
+
+        When the fields are all ordered the same way, ``('-name', '-id')``
+        gives the row comparison ``(name, id) < (%s, %s)``, which bounds
+        the scan of an index on them. Mixed orderings give
+        ``a < %s OR (a = %s AND b > %s)``, bounded with a redundant
+        ``a <= %s`` for the same reason.
+        """
+        descending = [field.startswith('-') for field in self.ordering]
+        names = [field.lstrip('-') for field in self.ordering]
+        values = [
+            Value(value, output_field=field)
+            for value, field in zip(position, self.ordering_fields)
+        ]
+
+        if len(set(descending)) == 1:
+            operator = '<' if descending[0] != reverse else '>'
+            return RowComparison(
+                Row(*(F(name) for name in names)), Row(*values), operator
+            )
+
+        condition = Q()
+        for index, name in enumerate(names):
+            lookup = 'lt' if descending[index] != reverse else 'gt'
+            equal = {
+                previous: value
+                for previous, value in zip(names[:index], position)
+            }
+            condition |= Q(**equal, **{f'{name}__{lookup}': position[index]})
+
+        lookup = 'lte' if descending[0] != reverse else 'gte'
+        return Q(**{f'{names[0]}__{lookup}': position[0]}) & condition
+
+
+class Row(Func):
+    """A row constructor, e.g. ``(name, id)``."""
+    template = '(%(expressions)s)'
+
+
+class RowComparison(Func):
+    """The comparison of two rows, e.g. ``(name, id) < (%s, %s)``."""
+    template = '%(expressions)s'
+    output_field = BooleanField()
+
+    def __init__(self, lhs, rhs, operator):
+        super().__init__(lhs, rhs)
+        self.arg_joiner = f' {operator} '
@@ -0,0 +1,152 @@
+"""
+Recipe lists serialized straight from rows.
+
+``RecipeSerializer`` builds a model instance per recipe and resolves each
+of its fields, and of the nested tags and ingredients, through the
+serializer machinery. Lists are instead read with ``values()``, the links
+of the page fetched with one query per relation and grouped in one pass,
+and the dicts assembled with the representations of the serializer
+fields, so the output is the same.
+"""
+from collections import defaultdict
+from types import SimpleNamespace
+
+from rest_framework import serializers
+from rest_framework.relations import ManyRelatedField
+from rest_framework.response import Response
+
+from core.models import Recipe
+
+
+# Fields representing the values read from the database as they are.
+PLAIN_FIELDS = (
+    serializers.IntegerField,
+    serializers.CharField,
+    serializers.URLField,
+    serializers.ChoiceField,
+)
+# Markers of the fields not read from a column of the row.
+LINKS = object()
+OBJECT = object()
+
+
+def _is_relation(field):
+    """Return whether a field renders a to-many relation."""
+    return isinstance(field, (serializers.ListSerializer, ManyRelatedField))
+
+
+def _converter(field):
+    """Return the function representing values of a field, if needed."""
+    return None if type(field) in PLAIN_FIELDS else field.to_representation
+
+
+def values_queryset(serializer, queryset):
+    """Return ``queryset`` reading the columns of the fields as dicts."""
+    # The modification time is read for the validators of the list.
+    keys = ['id', 'updated_at']
+
+    for name, field in serializer.fields.items():
+        if not _is_relation(field):
+            keys.extend(serializer.field_columns.get(name, [field.source]))
+    keys.extend(
+        field.lstrip('-') for field in queryset.query.order_by
+        if isinstance(field, str)
+    )
+
+    return queryset.prefetch_related(None).values(*dict.fromkeys(keys))
+
+
+def _links(field, ids):
+    """Return the representations of the linked objects by recipe id."""
+    relation = Recipe._meta.get_field(field.source)
+    query_name = relation.related_query_name()
+    queryset = relation.related_model.objects.filter(
+        **{f'{query_name}__in': ids}
+    )
+    links = defaultdict(list)
+
+    if isinstance(field, ManyRelatedField):
+        for recipe_id, pk in queryset.values_list(query_name, 'pk'):
+            links[recipe_id].append(pk)
+        return links
+
+    readers = [
+        (child_name, child.source, _converter(child))
+        for child_name, child in field.child.fields.items()
+    ]
+    for recipe_id, *values in queryset.values_list(
+        query_name, *(source for _, source, _ in readers)
+    ):
+        links[recipe_id].append({
+            child_name: (
+                value if value is None or convert is None
+                else convert(value)
+            )
+            for (child_name, _, convert), value in zip(readers, values)
+        })
+
+    return links
+
+
+def serialize_rows(serializer, rows):
+    """
+    Return the representations of recipe rows.
+
+    Method fields are called with an object carrying the columns of the
+    row, as listed in ``field_columns``.
+    """
+    ids = [row['id'] for row in rows]
+    links = {}
+    readers = []
+
+    for name, field in serializer.fields.items():
+        if _is_relation(field):
+            links[name] = _links(field, ids) if ids else {}
+            readers.append((name, LINKS, None))
+        elif isinstance(field, serializers.SerializerMethodField):
+            readers.append((name, OBJECT, field.to_representation))
+        else:
+            readers.append((name, field.source, _converter(field)))
+
+    with_object = any(key is OBJECT for _, key, _ in readers)
+    result = []
+
+    for row in rows:
+        obj = SimpleNamespace(**row) if with_object else None
+        item = {}
+        for name, key, convert in readers:
+            if key is LINKS:
+                item[name] = links[name].get(row['id'], [])
+            elif key is OBJECT:
+                item[name] = convert(obj)
+            else:
+                value = row[key]
+                item[name] = (
+                    value if value is None or convert is None
+                    else convert(value)
+                )
+        result.append(item)
+
+    return result
+
+
+class ValuesListMixin:
+    """
+    List the objects from rows rather than model instances.
+
+    Goes right before the generic view, in place of its ``list``.
+    """
+
+    def list(self, request, *args, **kwargs):
+        """Return the list serialized from rows."""
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = self.get_serializer()
+        rows = values_queryset(serializer, queryset)
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(
+                serialize_rows(serializer, page)
+            )
+
+        return Response(serialize_rows(serializer, list(rows)))
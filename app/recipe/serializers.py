@@ -1,12 +1,61 @@
 """
 Serializers for recipe API.
 """
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Prefetch, Q, Value
+from django.db.models.functions import Lower
+from django.utils import timezone
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
-from core.models import Recipe, Tag, Ingredient
+from core.models import ImageUpload, Recipe, Tag, Ingredient
+from recipe import cache, images
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+# The image variants by name, with the URL of each format.
+IMAGES_SCHEMA = {
+    'type': 'object',
+    'additionalProperties': {
+        'type': 'object',
+        'properties': {
+            'width': {'type': 'integer'},
+            'height': {'type': 'integer'},
+            **{
+                key: {'type': 'string', 'format': 'uri'}
+                for key in images.FORMATS
+            },
+        },
+    },
+}
+
+
+class RecipeAttrSerializer(serializers.ModelSerializer):
+    """Base serializer for recipe attributes."""
+
+    def validate_name(self, value):
+        """Check the user has no other item of the name in any case."""
+        # Nested in a recipe, existing names are looked up instead.
+        if self.parent is not None:
+            return value
+
+        # Lowered like the unique constraint does, which iexact doesn't.
+        others = self.Meta.model.objects.annotate(
+            lower_name=Lower('name')
+        ).filter(user=self.context['request'].user,
+                 lower_name=Lower(Value(value)))
+        if self.instance is not None:
+            others = others.exclude(pk=self.instance.pk)
+        if others.exists():
+            raise serializers.ValidationError(
+                f'An item named {value!r} already exists.'
+            )
+
+        return value
+
+
+class IngredientSerializer(RecipeAttrSerializer):
     """Serializer for Ingredient model."""
 
     class Meta:
@@ -15,7 +64,7 @@ class IngredientSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(RecipeAttrSerializer):
     """Serializer for Tag model."""
 
     class Meta:
@@ -24,59 +73,265 @@ class TagSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
+class RecipeListSerializer(serializers.ListSerializer):
+    """Serializer for creating and updating many recipes at once."""
+
+    def _sync_related(self, field_name, recipes, values, created=False):
+        """
+        Set the tags or ingredients of many recipes with set-based queries.
+
+        ``values`` holds the payload items for each recipe, ``None``
+        leaves the links of that recipe untouched.
+        """
+        field = Recipe._meta.get_field(field_name)
+        through = field.remote_field.through
+        column = f'{field.m2m_reverse_field_name()}_id'
+        changed = [
+            (recipe, items)
+            for recipe, items in zip(recipes, values)
+            if items is not None
+        ]
+        if not changed:
+            return
+
+        objs = field.related_model.objects.get_or_create_by_names(
+            self.context['request'].user,
+            [item['name'] for _, items in changed for item in items]
+        )
+        removed = Q()
+        added = []
+        touched_recipes = set()
+        touched_objs = set()
+
+        for recipe, items in changed:
+            new_ids = {objs[item['name']].id for item in items}
+            current_ids = set() if created else {
+                obj.id for obj in getattr(recipe, field_name).all()
+            }
+            if current_ids - new_ids:
+                removed |= Q(recipe_id=recipe.id, **{
+                    f'{column}__in': current_ids - new_ids
+                })
+            added.extend(
+                through(recipe_id=recipe.id, **{column: obj_id})
+                for obj_id in new_ids - current_ids
+            )
+            if current_ids != new_ids:
+                touched_recipes.add(recipe.id)
+                touched_objs.update(current_ids ^ new_ids)
+
+        if removed:
+            through.objects.filter(removed).delete()
+        through.objects.bulk_create(added)
+
+        # Bulk writes send no m2m_changed signal, so bump the modification
+        # times of both sides here.
+        now = timezone.now()
+        if touched_recipes and not created:
+            Recipe.objects.filter(id__in=touched_recipes).update(
+                updated_at=now
+            )
+        if touched_objs:
+            field.related_model.objects.filter(id__in=touched_objs).update(
+                updated_at=now
+            )
+
+        for recipe in recipes:
+            getattr(recipe, '_prefetched_objects_cache', {}).pop(
+                field_name, None
+            )
+
+    @transaction.atomic
+    def create(self, validated_data):
+        """Create recipes in bulk."""
+        tags = [attrs.pop('tags', []) for attrs in validated_data]
+        ingredients = [
+            attrs.pop('ingredients', []) for attrs in validated_data
+        ]
+        recipes = Recipe.objects.bulk_create(
+            Recipe(**attrs) for attrs in validated_data
+        )
+        self._sync_related('tags', recipes, tags, created=True)
+        self._sync_related('ingredients', recipes, ingredients, created=True)
+        # Bulk writes send no signals, so compute the search vectors here.
+        Recipe.objects.filter(
+            id__in=[recipe.id for recipe in recipes]
+        ).update_search_vector()
+        cache.invalidate(self.context['request'].user.id)
+        return recipes
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        """Update recipes in bulk, ``instance`` is aligned with the data."""
+        missing = None if self.partial else []
+        tags = [attrs.pop('tags', missing) for attrs in validated_data]
+        ingredients = [
+            attrs.pop('ingredients', missing) for attrs in validated_data
+        ]
+        fields = set()
+        now = timezone.now()
+
+        for recipe, attrs in zip(instance, validated_data):
+            for attr, value in attrs.items():
+                setattr(recipe, attr, value)
+            recipe.updated_at = now
+            fields.update(attrs)
+
+        if fields:
+            Recipe.objects.bulk_update(instance, fields | {'updated_at'})
+        self._sync_related('tags', instance, tags)
+        self._sync_related('ingredients', instance, ingredients)
+        Recipe.objects.filter(
+            id__in=[recipe.id for recipe in instance]
+        ).update_search_vector()
+        cache.invalidate(self.context['request'].user.id)
+        return instance
+
+
 class RecipeSerializer(serializers.ModelSerializer):
-    """Serializer for the recipe model."""
+    """
+    Serializer for the recipe model.
+
+    The ``fields`` context entry restricts the output to the named fields
+    and the ``expand`` one to the nested fields rendered in full, the
+    others are rendered as lists of ids.
+    """
     tags = TagSerializer(many=True, required=False)
     ingredients = IngredientSerializer(many=True, required=False)
+    images = serializers.SerializerMethodField()
+    expandable_fields = ['tags', 'ingredients']
+    # Columns read by the fields not backed by one of the same name.
+    field_columns = {'images': ['image_variants']}
 
     class Meta:
         model = Recipe
         fields = [
             'id', 'title', 'time_minutes', 'price', 'link', 'tags',
-            'ingredients'
+            'ingredients', 'image_status', 'images'
         ]
-        read_only_fields = ['id']
+        read_only_fields = ['id', 'image_status']
+        list_serializer_class = RecipeListSerializer
+
+    def get_fields(self):
+        """Return the requested fields, with unexpanded ones as ids."""
+        fields = super().get_fields()
+        requested = self.context.get('fields')
+        expand = self.context.get('expand')
+
+        if requested is not None:
+            fields = {
+                name: field for name, field in fields.items()
+                if name in requested
+            }
+        if expand is not None:
+            for name in set(self.expandable_fields) - set(expand):
+                if name in fields:
+                    fields[name] = serializers.PrimaryKeyRelatedField(
+                        many=True, read_only=True
+                    )
+
+        return fields
+
+    def optimize_queryset(self, queryset):
+        """
+        Return ``queryset`` loading only what the fields read.
+
+        Relations are prefetched only when their field is rendered, with
+        just the ids when it isn't expanded.
+        """
+        columns = {'id', 'updated_at'}
+
+        for name, field in self.fields.items():
+            if name in self.expandable_fields:
+                model = Recipe._meta.get_field(name).related_model
+                if isinstance(field, serializers.ManyRelatedField):
+                    queryset = queryset.prefetch_related(Prefetch(
+                        name, queryset=model.objects.only('id')
+                    ))
+                else:
+                    queryset = queryset.prefetch_related(name)
+            else:
+                columns.update(self.field_columns.get(name, [field.source]))
+
+        return queryset.only(*columns)
 
-    def _get_or_create_tags(self, tags, instance):
+    @extend_schema_field(IMAGES_SCHEMA)
+    def get_images(self, recipe):
+        """Return the URLs of the processed image variants."""
+        request = self.context.get('request')
+        result = {}
+
+        for name, variant in recipe.image_variants.items():
+            result[name] = {
+                'width': variant['width'],
+                'height': variant['height'],
+            }
+            for key in images.FORMATS:
+                url = default_storage.url(variant[key])
+                result[name][key] = (
+                    request.build_absolute_uri(url) if request else url
+                )
+
+        return result
+
+    def _get_or_create_tags(self, tags):
         """Handle getting or creating tags."""
         auth_user = self.context['request'].user
+        tag_objs = Tag.objects.get_or_create_by_names(
+            auth_user, [tag['name'] for tag in tags]
+        )
+        return list(tag_objs.values())
 
-        for tag in tags:
-            tag_obj, _ = Tag.objects.get_or_create(
-                user=auth_user, **tag)
-            instance.tags.add(tag_obj)
-
-    def _get_or_create_ingredients(self, ingredients, instance):
+    def _get_or_create_ingredients(self, ingredients):
         """Handle getting or creating ingredients."""
         auth_user = self.context['request'].user
+        ingredient_objs = Ingredient.objects.get_or_create_by_names(
+            auth_user, [ingredient['name'] for ingredient in ingredients]
+        )
+        return list(ingredient_objs.values())
 
-        for ingredient in ingredients:
-            ingredient_obj, _ = Ingredient.objects.get_or_create(
-                user=auth_user, **ingredient
-            )
-            instance.ingredients.add(ingredient_obj)
+    @staticmethod
+    def _set_related(manager, objs):
+        """
+        Link only the added objects and unlink only the removed ones.
+
+        The current links are read from the prefetch cache when the
+        instance was fetched with ``prefetch_related``.
+        """
+        current_ids = {obj.id for obj in manager.all()}
+        new_objs = {obj.id: obj for obj in objs}
 
+        manager.remove(*(current_ids - new_objs.keys()))
+        manager.add(*(
+            obj for obj_id, obj in new_objs.items()
+            if obj_id not in current_ids
+        ))
+
+    @transaction.atomic
     def create(self, validated_data):
         """Create a recipe."""
         tags = validated_data.pop('tags', [])
         ingredients = validated_data.pop('ingredients', [])
         recipe = Recipe.objects.create(**validated_data)
-        self._get_or_create_tags(tags, recipe)
-        self._get_or_create_ingredients(ingredients, recipe)
+        recipe.tags.add(*self._get_or_create_tags(tags))
+        recipe.ingredients.add(*self._get_or_create_ingredients(ingredients))
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         """Update a recipe."""
-        tags = validated_data.pop('tags', [])
-        ingredients = validated_data.pop('ingredients', [])
+        missing = None if self.partial else []
+        tags = validated_data.pop('tags', missing)
+        ingredients = validated_data.pop('ingredients', missing)
 
         if tags is not None:
-            instance.tags.clear()
-            self._get_or_create_tags(tags, instance)
+            self._set_related(instance.tags, self._get_or_create_tags(tags))
 
         if ingredients is not None:
-            instance.ingredients.clear()
-            self._get_or_create_ingredients(ingredients, instance)
+            self._set_related(
+                instance.ingredients,
+                self._get_or_create_ingredients(ingredients)
+            )
 
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
@@ -97,6 +352,48 @@ class RecipeImageSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Recipe
-        fields = ['id', 'image']
-        read_only_fields = ['id']
+        fields = ['id', 'image', 'image_status']
+        read_only_fields = ['id', 'image_status']
         extra_kwargs = {'image': {'required': 'True'}}
+
+    def update(self, instance, validated_data):
+        """Store the image as it is and queue it for processing."""
+        old_variants = instance.image_variants
+        images.mark_pending(instance)
+        instance = super().update(instance, validated_data)
+        transaction.on_commit(lambda: images.delete_variants(old_variants))
+        return instance
+
+
+class ImageUploadSerializer(serializers.ModelSerializer):
+    """Serializer for chunked image uploads."""
+    chunk_size = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ImageUpload
+        fields = ['id', 'recipe', 'size', 'offset', 'chunk_size',
+                  'created_at']
+        read_only_fields = ['id', 'offset', 'created_at']
+
+    def get_fields(self):
+        """Only accept the recipes of the authenticated user."""
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is not None and 'recipe' in fields:
+            fields['recipe'].queryset = Recipe.objects.filter(
+                user=request.user
+            )
+        return fields
+
+    def get_chunk_size(self, upload) -> int:
+        """Return the largest number of bytes accepted in one request."""
+        return settings.IMAGE_UPLOAD_CHUNK_SIZE
+
+    def validate_size(self, value):
+        """Check the size of the image is allowed."""
+        if not 0 < value <= settings.IMAGE_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(
+                f'Ensure this value is between 1 and '
+                f'{settings.IMAGE_UPLOAD_MAX_SIZE}.'
+            )
+        return value
@@ -0,0 +1,27 @@
+"""
+Signal handlers for the recipe app.
+"""
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from core.models import Recipe, Tag, Ingredient
+from recipe import cache
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_user_cache(sender, instance, **kwargs):
+    """Invalidate the cached responses of the owner of the object."""
+    cache.invalidate(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def invalidate_user_cache_on_links(sender, instance, action, **kwargs):
+    """Invalidate the cached responses when recipe links change."""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        cache.invalidate(instance.user_id)
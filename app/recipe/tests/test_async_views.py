@@ -0,0 +1,106 @@
+"""
+Tests for the async recipe API views.
+"""
+from decimal import Decimal
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, TransactionTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+from recipe import cache
+
+
+User = get_user_model()
+RECIPES_URL = reverse('recipe-async:recipe-list')
+TAGS_URL = reverse('recipe-async:tag-list')
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        'title': 'Sample recipe',
+        'time_minutes': 10,
+        'price': Decimal('5.00'),
+    }
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class AsyncRecipeApiTests(TransactionTestCase):
+    """
+    Test the async views.
+
+    The views query the database from worker threads, which only see
+    committed data.
+    """
+
+    def setUp(self):
+        cache.get_cache().clear()
+        self.user = User.objects.create_user('user@example.com', 'pass123')
+        token = Token.objects.create(user=self.user)
+        # The async client of Django 4.0 takes plain header names.
+        self.headers = {'authorization': f'Token {token.key}'}
+        self.client = AsyncClient()
+
+    async def test_auth_required(self):
+        """Test auth is required to list recipes."""
+        response = await self.client.get(RECIPES_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_read_only(self):
+        """Test the async views don't accept writes."""
+        response = await self.client.post(RECIPES_URL, {}, **self.headers)
+
+        self.assertEqual(response.status_code,
+                         status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    def test_list_matches_sync_view(self):
+        """Test the async list returns what the sync list returns."""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        create_recipe(self.user, title='Curry').tags.add(tag)
+        create_recipe(self.user, title='Soup')
+        other_user = User.objects.create_user('other@example.com', 'pass')
+        create_recipe(other_user)
+        api_client = APIClient()
+        api_client.force_authenticate(self.user)
+
+        response = self._get(RECIPES_URL)
+        expected = api_client.get(reverse('recipe:recipe-list'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['results'],
+                         expected.json()['results'])
+
+    def test_detail(self):
+        """Test getting a recipe."""
+        recipe = create_recipe(self.user, description='Slow cooked.')
+
+        response = self._get(
+            reverse('recipe-async:recipe-detail', args=[recipe.id])
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['description'], 'Slow cooked.')
+        self.assertIn('ETag', response)
+
+    def test_tag_list(self):
+        """Test listing tags."""
+        Tag.objects.create(user=self.user, name='Vegan')
+
+        response = self._get(TAGS_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['results'][0]['name'], 'Vegan')
+
+    def _get(self, url):
+        """Make a GET request with the async client from a sync test."""
+        async def get():
+            return await self.client.get(url, **self.headers)
+
+        return async_to_sync(get)()
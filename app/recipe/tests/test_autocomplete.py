@@ -0,0 +1,109 @@
+"""
+Tests for the tag and ingredient name autocomplete.
+"""
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Tag
+from recipe import autocomplete
+
+
+TAGS_URL = reverse('recipe:tag-autocomplete')
+INGREDIENTS_URL = reverse('recipe:ingredient-autocomplete')
+
+
+class AutocompleteApiTests(TestCase):
+    """Test suggesting tag and ingredient names."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('user@example.com',
+                                                         'pass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def names(self, url, text, **params):
+        """Return the names suggested for a text."""
+        response = self.client.get(url, {'q': text, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['name'] for item in response.data]
+
+    def test_prefix(self):
+        """Test names starting with the text are suggested."""
+        for name in ('Tomato', 'Tomatillo', 'Potato', 'Tofu'):
+            Ingredient.objects.create(user=self.user, name=name)
+
+        self.assertCountEqual(self.names(INGREDIENTS_URL, 'tom'),
+                              ['Tomato', 'Tomatillo'])
+
+    def test_limited_to_user(self):
+        """Test only the names of the user are suggested."""
+        other_user = get_user_model().objects.create_user('other@example.com',
+                                                          'pass123')
+        Tag.objects.create(user=other_user, name='Vegan')
+        Tag.objects.create(user=self.user, name='Vegetarian')
+
+        self.assertEqual(self.names(TAGS_URL, 'veg'), ['Vegetarian'])
+
+    def test_limit(self):
+        """Test the number of suggestions is limited."""
+        for i in range(5):
+            Tag.objects.create(user=self.user, name=f'Quick {i}')
+
+        self.assertEqual(len(self.names(TAGS_URL, 'quick', limit=3)), 3)
+
+    def test_text_required(self):
+        """Test the text to complete is required."""
+        response = self.client.get(TAGS_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_misspelling(self):
+        """Test misspelled names are suggested, closest first."""
+        if not autocomplete.trigram_enabled(connection.alias):
+            self.skipTest('pg_trgm is not installed.')
+        for name in ('Tomato', 'Tomatillo', 'Potato'):
+            Ingredient.objects.create(user=self.user, name=name)
+
+        self.assertEqual(self.names(INGREDIENTS_URL, 'tomatoe')[0], 'Tomato')
+
+
+class AutocompleteIndexTests(TestCase):
+    """Test suggestions are served by the trigram index of the names."""
+
+    @classmethod
+    def setUpTestData(cls):
+        users = [
+            get_user_model().objects.create_user(f'user{i}@example.com',
+                                                 'pass123')
+            for i in range(3)
+        ]
+        cls.user = users[0]
+        for user in users:
+            Ingredient.objects.bulk_create(
+                Ingredient(user=user, name=f'{word} {i}')
+                for word in ('Tomato', 'Potato', 'Onion', 'Garlic', 'Basil')
+                for i in range(200)
+            )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE core_ingredient')
+
+    def test_trigram_index_used(self):
+        """Test suggesting names scans the user and name trigram index."""
+        if not autocomplete.trigram_enabled(connection.alias):
+            self.skipTest('pg_trgm is not installed.')
+        queryset = autocomplete.suggest(
+            Ingredient.objects.filter(user=self.user), 'garl', 10
+        )
+
+        with connection.cursor() as cursor:
+            # The seeded table is small enough for a sequential scan to
+            # win, rule it out as it would be on a production dataset.
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = queryset.explain()
+
+        self.assertIn('core_ingredient_name_trgm_idx', plan)
+        self.assertEqual(len(queryset), 10)
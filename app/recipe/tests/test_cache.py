@@ -0,0 +1,149 @@
+"""
+Tests for the recipe API response cache.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.http import QueryDict
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+from recipe import cache
+
+
+User = get_user_model()
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+BULK_URL = reverse('recipe:recipe-bulk')
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        'title': 'Sample recipe',
+        'time_minutes': 10,
+        'price': Decimal('5.00'),
+    }
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class NormalizeParamsTests(TestCase):
+    """Test normalizing the query parameters of cache keys."""
+
+    def test_id_lists_are_sorted(self):
+        """Test equivalent id lists have the same key."""
+        first = cache.normalize_params(QueryDict('tags=2,1&assigned_only=0'))
+        second = cache.normalize_params(QueryDict('assigned_only=0&tags=1,2'))
+
+        self.assertEqual(first, second)
+
+    def test_different_filters(self):
+        """Test different filters have different keys."""
+        first = cache.normalize_params(QueryDict('tags=1'))
+        second = cache.normalize_params(QueryDict('ingredients=1'))
+
+        self.assertNotEqual(first, second)
+
+
+class ResponseCacheTests(TestCase):
+    """Test caching list responses."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user('user@example.com', 'pass123')
+        self.client.force_authenticate(self.user)
+        cache.stats.reset()
+
+    def test_list_served_from_cache(self):
+        """Test a repeated list request is served without queries."""
+        create_recipe(self.user)
+        first = self.client.get(RECIPES_URL)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(RECIPES_URL)
+
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(cache.stats.snapshot(), {'hits': 1, 'misses': 1})
+
+    def test_equivalent_filters_share_entry(self):
+        """Test the order of filtered ids does not matter."""
+        self.client.get(RECIPES_URL, {'tags': '1,2'})
+        response = self.client.get(RECIPES_URL, {'tags': '2,1'})
+
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+    def test_create_invalidates(self):
+        """Test creating a recipe invalidates the list."""
+        self.client.get(RECIPES_URL)
+        self.client.post(RECIPES_URL, {
+            'title': 'New recipe',
+            'time_minutes': 5,
+            'price': '1.00'
+        })
+
+        response = self.client.get(RECIPES_URL)
+
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_tag_rename_invalidates_recipes(self):
+        """Test renaming a tag invalidates the nested tag names."""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        create_recipe(self.user).tags.add(tag)
+        self.client.get(RECIPES_URL)
+
+        self.client.patch(reverse('recipe:tag-detail', args=[tag.id]),
+                          {'name': 'Vegetarian'})
+        response = self.client.get(RECIPES_URL)
+
+        tags = response.data['results'][0]['tags']
+        self.assertEqual(tags[0]['name'], 'Vegetarian')
+
+    def test_links_invalidate_tags(self):
+        """Test linking a tag invalidates the assigned tags."""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        recipe = create_recipe(self.user)
+        self.client.get(TAGS_URL, {'assigned_only': 1})
+
+        recipe.tags.add(tag)
+        response = self.client.get(TAGS_URL, {'assigned_only': 1})
+
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_bulk_create_invalidates(self):
+        """Test creating recipes in bulk invalidates the list."""
+        self.client.get(RECIPES_URL)
+        self.client.post(BULK_URL, [{
+            'title': 'Bulk recipe',
+            'time_minutes': 5,
+            'price': '1.00'
+        }], format='json')
+
+        response = self.client.get(RECIPES_URL)
+
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_other_users_changes_keep_cache(self):
+        """Test changes of another user keep the cached response."""
+        other_user = User.objects.create_user('other@example.com', 'pass')
+        self.client.get(RECIPES_URL)
+
+        create_recipe(other_user)
+        response = self.client.get(RECIPES_URL)
+
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+    def test_errors_not_cached(self):
+        """Test failed responses are not cached."""
+        self.client.get(RECIPES_URL, {'cursor': 'invalid'})
+        response = self.client.get(RECIPES_URL, {'cursor': 'invalid'})
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(cache.stats.snapshot()['hits'], 0)
@@ -0,0 +1,188 @@
+"""
+Tests for conditional requests on the recipe API.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+from recipe import cache
+
+
+User = get_user_model()
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+def detail_url(recipe_id):
+    """Create and return a recipe detail URL."""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        'title': 'Sample recipe',
+        'time_minutes': 10,
+        'price': Decimal('5.00'),
+    }
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class ConditionalRequestTests(TestCase):
+    """Test ETag and Last-Modified handling."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user('user@example.com', 'pass123')
+        self.client.force_authenticate(self.user)
+        cache.get_cache().clear()
+
+    def test_list_not_modified(self):
+        """Test a current list is answered with 304."""
+        create_recipe(self.user)
+        etag = self.client.get(RECIPES_URL)['ETag']
+        cache.get_cache().clear()
+
+        response = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+
+    def test_cached_list_not_modified_without_queries(self):
+        """Test a cached list answers If-None-Match without queries."""
+        create_recipe(self.user)
+        etag = self.client.get(RECIPES_URL)['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+    def test_list_not_modified_from_page(self):
+        """Test a list 304 only runs the query of the page."""
+        create_recipe(self.user)
+        etag = self.client.get(RECIPES_URL)['ETag']
+        cache.get_cache().clear()
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(len(context.captured_queries), 1)
+        self.assertNotIn('COUNT(', context.captured_queries[0]['sql'])
+
+    def test_list_etag_covers_page(self):
+        """Test changes to other pages keep the ETag of a page."""
+        older = create_recipe(self.user, title='Older')
+        newer = create_recipe(self.user, title='Newer')
+        params = {'page_size': 1}
+        etag = self.client.get(RECIPES_URL, params)['ETag']
+
+        older.title = 'Changed'
+        older.save()
+        cache.get_cache().clear()
+        response = self.client.get(RECIPES_URL, params,
+                                   HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        newer.title = 'Changed'
+        newer.save()
+        response = self.client.get(RECIPES_URL, params,
+                                   HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_list_etag_changes_on_delete(self):
+        """Test deleting a recipe changes the list ETag."""
+        recipe = create_recipe(self.user)
+        create_recipe(self.user)
+        etag = self.client.get(RECIPES_URL)['ETag']
+
+        recipe.delete()
+        response = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_detail_not_modified(self):
+        """Test a current recipe is answered with 304."""
+        recipe = create_recipe(self.user)
+        first = self.client.get(detail_url(recipe.id))
+
+        with self.assertNumQueries(1):
+            by_etag = self.client.get(
+                detail_url(recipe.id), HTTP_IF_NONE_MATCH=first['ETag']
+            )
+        by_date = self.client.get(
+            detail_url(recipe.id),
+            HTTP_IF_MODIFIED_SINCE=first['Last-Modified']
+        )
+
+        self.assertEqual(by_etag.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(by_date.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_tag_rename_changes_recipe_etag(self):
+        """Test renaming a tag changes the ETag of its recipes."""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        recipe = create_recipe(self.user)
+        recipe.tags.add(tag)
+        etag = self.client.get(detail_url(recipe.id))['ETag']
+
+        tag.name = 'Vegetarian'
+        tag.save()
+        response = self.client.get(detail_url(recipe.id),
+                                   HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['tags'][0]['name'], 'Vegetarian')
+
+    def test_linking_changes_tag_list_etag(self):
+        """Test linking a tag changes the ETag of the tag list."""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        recipe = create_recipe(self.user)
+        etag = self.client.get(TAGS_URL)['ETag']
+
+        recipe.tags.add(tag)
+        response = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_update_if_match(self):
+        """Test an update with a current ETag succeeds."""
+        recipe = create_recipe(self.user)
+        etag = self.client.get(detail_url(recipe.id))['ETag']
+
+        response = self.client.patch(detail_url(recipe.id),
+                                     {'title': 'New title'},
+                                     HTTP_IF_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'New title')
+        self.assertEqual(
+            self.client.get(detail_url(recipe.id))['ETag'], response['ETag']
+        )
+
+    def test_update_stale_if_match(self):
+        """Test an update with a stale ETag is rejected."""
+        recipe = create_recipe(self.user, title='Original')
+        etag = self.client.get(detail_url(recipe.id))['ETag']
+        self.client.patch(detail_url(recipe.id), {'time_minutes': 20})
+
+        response = self.client.patch(detail_url(recipe.id),
+                                     {'title': 'Lost update'},
+                                     HTTP_IF_MATCH=etag)
+
+        self.assertEqual(response.status_code,
+                         status.HTTP_412_PRECONDITION_FAILED)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'Original')
@@ -0,0 +1,211 @@
+"""
+Tests for the background processing of recipe images.
+"""
+import io
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+from recipe import images
+
+
+def create_image_file(size=(2000, 1000), image_format='JPEG', **options):
+    """Return the content of a sample image."""
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'orange').save(buffer, image_format, **options)
+    return ContentFile(buffer.getvalue(), name='sample.jpg')
+
+
+class ImageTestMixin:
+    """Store the media files of a test in a temporary directory."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = get_user_model().objects.create_user('user@example.com',
+                                                         'pass123')
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title='Sample recipe',
+            time_minutes=10,
+            price=Decimal('5.00'),
+        )
+
+    def queue_image(self, image_file):
+        """Store an image on the recipe and queue it for processing."""
+        self.recipe.image.save(image_file.name, image_file, save=False)
+        self.recipe.image_status = Recipe.ImageStatus.PENDING
+        self.recipe.save()
+
+
+class ImageProcessingTests(ImageTestMixin, TestCase):
+    """Test making the variants of uploaded images."""
+
+    def test_variants_made(self):
+        """Test a queued image is resized and re-encoded."""
+        self.queue_image(create_image_file())
+
+        processed = images.process_pending(limit=10)
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(processed, 1)
+        self.assertEqual(self.recipe.image_status, Recipe.ImageStatus.READY)
+        self.assertEqual(set(self.recipe.image_variants),
+                         {'thumbnail', 'medium', 'large'})
+        medium = self.recipe.image_variants['medium']
+        self.assertEqual((medium['width'], medium['height']), (800, 400))
+        with default_storage.open(medium['jpeg']) as file:
+            jpeg = Image.open(file)
+            self.assertEqual(jpeg.format, 'JPEG')
+            self.assertTrue(jpeg.info.get('progressive'))
+        with default_storage.open(medium['webp']) as file:
+            self.assertEqual(Image.open(file).format, 'WEBP')
+
+    def test_small_image_not_enlarged(self):
+        """Test images smaller than a variant keep their size."""
+        self.queue_image(create_image_file(size=(100, 50)))
+
+        images.process_pending(limit=10)
+
+        self.recipe.refresh_from_db()
+        large = self.recipe.image_variants['large']
+        self.assertEqual((large['width'], large['height']), (100, 50))
+
+    def test_exif_orientation_applied_and_stripped(self):
+        """Test the image is turned upright and loses its metadata."""
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        exif[0x010f] = 'Camera maker'
+        image_file = create_image_file(size=(300, 100), exif=exif)
+
+        image = images.open_image(image_file)
+
+        self.assertEqual(image.size, (100, 300))
+        self.assertNotIn('exif', image.info)
+
+    @override_settings(IMAGE_MAX_PIXELS=1000)
+    def test_decompression_bomb_rejected(self):
+        """Test images with too many pixels fail without being decoded."""
+        self.queue_image(create_image_file(size=(100, 100)))
+
+        with self.assertLogs('recipe.images', 'ERROR'):
+            images.process_pending(limit=10)
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_status, Recipe.ImageStatus.FAILED)
+        self.assertEqual(self.recipe.image_variants, {})
+
+    def test_invalid_image_fails(self):
+        """Test a file that isn't an image is marked as failed."""
+        self.queue_image(ContentFile(b'notanimage', name='sample.jpg'))
+
+        with self.assertLogs('recipe.images', 'ERROR'):
+            images.process_pending(limit=10)
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_status, Recipe.ImageStatus.FAILED)
+
+    def test_replaced_image_result_discarded(self):
+        """Test variants of an image replaced while processing are dropped."""
+        self.queue_image(create_image_file())
+        recipe = images.claim_recipes(limit=10)[0]
+        self.queue_image(create_image_file(size=(10, 10)))
+
+        result = images.process_recipe_image(recipe)
+
+        self.recipe.refresh_from_db()
+        self.assertIsNone(result)
+        self.assertEqual(self.recipe.image_status,
+                         Recipe.ImageStatus.PENDING)
+        self.assertFalse([
+            name for name in default_storage.listdir('uploads/recipe')[1]
+            if '-thumbnail.' in name
+        ])
+
+    def test_stale_claim_result_discarded(self):
+        """Test a worker whose claim went stale drops its variants."""
+        self.queue_image(create_image_file())
+        stale = images.claim_recipes(limit=10)[0]
+        Recipe.objects.filter(id=self.recipe.id).update(
+            image_claimed_at=timezone.now() - timedelta(hours=1)
+        )
+        current = images.claim_recipes(limit=10)[0]
+
+        self.assertIsNone(images.process_recipe_image(stale))
+        self.assertEqual(images.process_recipe_image(current),
+                         Recipe.ImageStatus.READY)
+
+        self.recipe.refresh_from_db()
+        stored = {
+            name for name in default_storage.listdir('uploads/recipe')[1]
+            if '-thumbnail.' in name
+        }
+        self.assertEqual(stored, {
+            self.recipe.image_variants['thumbnail'][key].rsplit('/', 1)[-1]
+            for key in images.FORMATS
+        })
+
+    def test_claimed_recipes_skipped_until_stale(self):
+        """Test recipes claimed by a live worker aren't claimed again."""
+        self.queue_image(create_image_file())
+        images.claim_recipes(limit=10)
+
+        self.assertEqual(images.claim_recipes(limit=10), [])
+
+        Recipe.objects.filter(id=self.recipe.id).update(
+            image_claimed_at=timezone.now() - timedelta(hours=1)
+        )
+        self.assertEqual(
+            [recipe.id for recipe in images.claim_recipes(limit=10)],
+            [self.recipe.id]
+        )
+
+
+class ProcessImagesCommandTests(ImageTestMixin, TransactionTestCase):
+    """
+    Test the command processing images.
+
+    The images are processed from worker threads, which only see
+    committed data.
+    """
+
+    def test_upload_queues_and_command_processes(self):
+        """Test an uploaded image is served in variants once processed."""
+        client = APIClient()
+        client.force_authenticate(self.user)
+        detail_url = reverse('recipe:recipe-detail', args=[self.recipe.id])
+        image_file = create_image_file()
+
+        response = client.post(
+            reverse('recipe:recipe-upload-image', args=[self.recipe.id]),
+            {'image': image_file},
+            format='multipart'
+        )
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(client.get(detail_url).data['images'], {})
+
+        call_command('process_images', once=True, stdout=io.StringIO())
+
+        response = client.get(detail_url)
+        self.assertEqual(response.data['image_status'], 'ready')
+        thumbnail = response.data['images']['thumbnail']
+        self.assertEqual(thumbnail['width'], 200)
+        self.assertTrue(thumbnail['webp'].startswith('http://testserver/'))
+        self.assertTrue(thumbnail['jpeg'].endswith('-thumbnail.jpg'))
@@ -58,7 +58,7 @@ class PrivateIngredientsApiTests(TestCase):
         serializer = IngredientSerializer(ingredients, many=True)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
 
     def test_ingredients_limited_to_user(self):
         """Test list of ingredients is limited to authenticated user."""
@@ -70,9 +70,10 @@ class PrivateIngredientsApiTests(TestCase):
         response = self.client.get(INGREDIENTS_URL)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertIn(ingredient_serializer.data, response.data)
-        self.assertNotIn(other_ingredient_serializer.data, response.data)
-        self.assertEqual(response.data[0]['id'], ingredient.id)
+        self.assertIn(ingredient_serializer.data, response.data['results'])
+        self.assertNotIn(other_ingredient_serializer.data,
+                         response.data['results'])
+        self.assertEqual(response.data['results'][0]['id'], ingredient.id)
 
     def test_update_ingredient(self):
         """Test update ingredient is successful."""
@@ -85,6 +86,32 @@ class PrivateIngredientsApiTests(TestCase):
         ingredient.refresh_from_db()
         self.assertEqual(ingredient.name, payload['name'])
 
+    def test_rename_to_existing_name(self):
+        """Test renaming to another ingredient's name in any case fails."""
+        Ingredient.objects.create(user=self.user, name='salt')
+        ingredient = Ingredient.objects.create(user=self.user, name='Other')
+        other_user = create_user('other@example.com')
+        Ingredient.objects.create(user=other_user, name='Pepper')
+
+        for method in ('patch', 'put'):
+            with self.subTest(method=method):
+                response = getattr(self.client, method)(
+                    detail_url(ingredient.id), {'name': 'Salt'}
+                )
+
+                self.assertEqual(response.status_code,
+                                 status.HTTP_400_BAD_REQUEST)
+                self.assertIn('name', response.data)
+        ingredient.refresh_from_db()
+        self.assertEqual(ingredient.name, 'Other')
+
+        response = self.client.patch(detail_url(ingredient.id),
+                                     {'name': 'OTHER'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.patch(detail_url(ingredient.id),
+                                     {'name': 'Pepper'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
     def test_delete_ingredient(self):
         """Test deleting an ingredient."""
         ingredient = Ingredient.objects.create(user=self.user, name='Lettuce')
@@ -109,8 +136,8 @@ class PrivateIngredientsApiTests(TestCase):
         response = self.client.get(INGREDIENTS_URL, {'assigned_only': 1})
         s1 = IngredientSerializer(in1)
         s2 = IngredientSerializer(in2)
-        self.assertIn(s1.data, response.data)
-        self.assertNotIn(s2.data, response.data)
+        self.assertIn(s1.data, response.data['results'])
+        self.assertNotIn(s2.data, response.data['results'])
 
     def test_filtered_ingredients_unique(self):
         """Test filtered ingredients returns a unique list."""
@@ -132,4 +159,4 @@ class PrivateIngredientsApiTests(TestCase):
         recipe2.ingredients.add(ing)
         response = self.client.get(INGREDIENTS_URL, {'assigned_only': 1})
 
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
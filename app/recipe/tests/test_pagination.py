@@ -0,0 +1,266 @@
+"""
+Tests for keyset pagination of the recipe API.
+"""
+import base64
+import json
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from core.models import Recipe, Tag, Ingredient
+from recipe.pagination import KeysetPagination
+
+
+User = get_user_model()
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        'title': 'Sample recipe',
+        'time_minutes': 10,
+        'price': Decimal('5.00'),
+    }
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class KeysetPaginationTests(TestCase):
+    """Test paginating the recipe API."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user('user@example.com', 'pass123')
+        self.client.force_authenticate(self.user)
+
+    def _walk(self, url, params, key='next'):
+        """Follow the page links and return the ids of every page."""
+        pages = []
+        response = self.client.get(url, params)
+
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pages.append([item['id'] for item in response.data['results']])
+            if not response.data[key]:
+                return pages, response
+            response = self.client.get(response.data[key])
+
+    def test_page_size(self):
+        """Test the page size limits the results."""
+        for i in range(5):
+            create_recipe(self.user, title=f'Recipe {i}')
+
+        response = self.client.get(RECIPES_URL, {'page_size': 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNotNone(response.data['next'])
+        self.assertIsNone(response.data['previous'])
+
+    def test_walk_recipes_forward_and_backward(self):
+        """Test following next and previous links visits every recipe."""
+        recipes = [create_recipe(self.user) for _ in range(7)]
+        expected = [recipe.id for recipe in reversed(recipes)]
+
+        pages, last = self._walk(RECIPES_URL, {'page_size': 3})
+
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual(sum(pages, []), expected)
+
+        back_pages = [[item['id'] for item in last.data['results']]]
+        response = last
+        while response.data['previous']:
+            response = self.client.get(response.data['previous'])
+            back_pages.insert(
+                0, [item['id'] for item in response.data['results']]
+            )
+
+        self.assertEqual(back_pages, pages)
+
+    def test_walk_tags_ordered_by_name(self):
+        """Test paging tags keeps the name ordering."""
+        names = ['Breakfast', 'Dinner', 'Lunch', 'Snack', 'Vegan']
+        tags = {
+            name: Tag.objects.create(user=self.user, name=name)
+            for name in names
+        }
+
+        pages, _ = self._walk(TAGS_URL, {'page_size': 2})
+
+        expected = [tags[name].id for name in sorted(names, reverse=True)]
+        self.assertEqual(sum(pages, []), expected)
+
+    def test_pages_with_filters(self):
+        """Test the filters are kept on the following pages."""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        tagged = []
+        for i in range(5):
+            recipe = create_recipe(self.user)
+            if i % 2:
+                create_recipe(self.user)
+            recipe.tags.add(tag)
+            tagged.append(recipe.id)
+
+        pages, _ = self._walk(RECIPES_URL, {'page_size': 2, 'tags': tag.id})
+
+        self.assertEqual(sum(pages, []), tagged[::-1])
+
+    def test_pages_assigned_only(self):
+        """Test paging ingredients assigned to recipes."""
+        recipe = create_recipe(self.user)
+        assigned = []
+        for i in range(4):
+            ingredient = Ingredient.objects.create(
+                user=self.user, name=f'Ingredient {i}'
+            )
+            Ingredient.objects.create(user=self.user, name=f'Unused {i}')
+            recipe.ingredients.add(ingredient)
+            assigned.append(ingredient.id)
+
+        pages, _ = self._walk(
+            INGREDIENTS_URL, {'page_size': 3, 'assigned_only': 1}
+        )
+
+        self.assertEqual(sum(pages, []), assigned[::-1])
+
+    def test_no_offset_or_count(self):
+        """Test pages are fetched without OFFSET and COUNT."""
+        for _ in range(5):
+            create_recipe(self.user)
+        response = self.client.get(RECIPES_URL, {'page_size': 2})
+
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(response.data['next'])
+
+        page_queries = [
+            query for query in context.captured_queries
+            if 'LIMIT' in query['sql']
+        ]
+        self.assertTrue(page_queries)
+        for query in page_queries:
+            with self.subTest(sql=query['sql']):
+                self.assertNotIn('OFFSET', query['sql'])
+                self.assertNotIn('COUNT(', query['sql'])
+
+    def test_invalid_cursor(self):
+        """Test an invalid cursor returns an error."""
+        response = self.client.get(RECIPES_URL, {'cursor': 'invalid'})
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_tampered_cursor(self):
+        """Test a cursor with values of the wrong type returns an error."""
+        create_recipe(self.user)
+        cursors = [
+            {'p': ['abc'], 'r': 0},
+            {'p': [None], 'r': 0},
+            {'p': [[1]], 'r': 0},
+            {'p': 1, 'r': 0},
+            {'p': [1, 2], 'r': 0},
+        ]
+
+        for cursor in cursors:
+            with self.subTest(cursor=cursor):
+                encoded = base64.urlsafe_b64encode(
+                    json.dumps(cursor).encode()
+                ).decode()
+
+                response = self.client.get(RECIPES_URL, {'cursor': encoded})
+
+                self.assertEqual(response.status_code,
+                                 status.HTTP_404_NOT_FOUND)
+
+    def test_tampered_search_cursor(self):
+        """Test a cursor of a search ordered on its rank is checked."""
+        create_recipe(self.user, title='Spicy curry')
+        encoded = base64.urlsafe_b64encode(
+            json.dumps({'p': ['abc', 'x'], 'r': 0}).encode()
+        ).decode()
+
+        response = self.client.get(RECIPES_URL,
+                                   {'search': 'curry', 'cursor': encoded})
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class KeysetSeekTests(TestCase):
+    """Test the seek filter of the pagination."""
+
+    @classmethod
+    def setUpTestData(cls):
+        users = [
+            User.objects.create_user(f'user{i}@example.com', 'pass123')
+            for i in range(3)
+        ]
+        cls.user = users[0]
+        for user in users:
+            Ingredient.objects.bulk_create(
+                Ingredient(user=user, name=f'Ingredient {i:04}')
+                for i in range(500)
+            )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE core_ingredient')
+
+    def paginate(self, queryset, cursor=None, page_size=10):
+        """Return the paginator and page of a request with the cursor."""
+        params = {'page_size': page_size}
+        if cursor is not None:
+            params['cursor'] = base64.urlsafe_b64encode(
+                json.dumps(cursor).encode()
+            ).decode()
+        request = Request(APIRequestFactory().get('/', params))
+        paginator = KeysetPagination()
+        return paginator, paginator.paginate_queryset(queryset, request)
+
+    def test_deep_cursor_bounds_index_scan(self):
+        """Test a deep cursor seeks in the index instead of filtering."""
+        queryset = Ingredient.objects.filter(
+            user=self.user
+        ).order_by('-name', '-id')
+        middle = queryset[250]
+        paginator, page = self.paginate(
+            queryset, {'p': [middle.name, middle.id], 'r': 0}
+        )
+        self.assertEqual(page[0].name, 'Ingredient 0248')
+
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = queryset.filter(
+            paginator._seek_filter(paginator.cursor.position, False)
+        )[:11].explain()
+
+        index_cond = [line for line in plan.splitlines()
+                      if 'Index Cond' in line]
+        self.assertEqual(len(index_cond), 1, plan)
+        self.assertIn('name', index_cond[0])
+        self.assertIn('id', index_cond[0])
+        self.assertNotIn('Rows Removed by Filter', plan)
+
+    def test_mixed_ordering(self):
+        """Test pages ordered on fields in both directions."""
+        for i in range(100):
+            create_recipe(self.user, title=f'Recipe {i % 7}')
+        queryset = Recipe.objects.filter(
+            user=self.user
+        ).order_by('title', '-id')
+        expected = list(queryset.values_list('id', flat=True))
+
+        ids, cursor = [], None
+        while True:
+            paginator, page = self.paginate(queryset, cursor, page_size=9)
+            ids.extend(obj.id for obj in page)
+            if not paginator.has_next:
+                break
+            cursor = {'p': paginator._get_position(page[-1]), 'r': 0}
+
+        self.assertEqual(ids, expected)
@@ -7,7 +7,9 @@ from decimal import Decimal
 
 from PIL import Image
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
@@ -15,7 +17,8 @@ from rest_framework.test import APIClient
 from core.models import Recipe, Tag, Ingredient
 from recipe.serializers import (
     RecipeSerializer,
-    RecipeDetailSerializer
+    RecipeDetailSerializer,
+    TagSerializer
 )
 
 
@@ -84,7 +87,7 @@ class PrivateRecipeUrlsTest(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
 
     def test_recipe_list_limited_to_user(self):
         """Test list of recipes is limited to authenticated user."""
@@ -97,7 +100,7 @@ class PrivateRecipeUrlsTest(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
 
     def test_get_recipe_detail(self):
         """Test get recipe detail."""
@@ -399,9 +402,9 @@ class PrivateRecipeUrlsTest(TestCase):
         s1 = RecipeSerializer(r1)
         s2 = RecipeSerializer(r2)
         s3 = RecipeSerializer(r3)
-        self.assertIn(s1.data, response.data)
-        self.assertIn(s2.data, response.data)
-        self.assertNotIn(s3.data, response.data)
+        self.assertIn(s1.data, response.data['results'])
+        self.assertIn(s2.data, response.data['results'])
+        self.assertNotIn(s3.data, response.data['results'])
 
     def test_filtering_by_ingredients(self):
         """Test filtering recipes by ingredients."""
@@ -418,9 +421,384 @@ class PrivateRecipeUrlsTest(TestCase):
         s1 = RecipeSerializer(r1)
         s2 = RecipeSerializer(r2)
         s3 = RecipeSerializer(r3)
-        self.assertIn(s1.data, response.data)
-        self.assertIn(s2.data, response.data)
-        self.assertNotIn(s3.data, response.data)
+        self.assertIn(s1.data, response.data['results'])
+        self.assertIn(s2.data, response.data['results'])
+        self.assertNotIn(s3.data, response.data['results'])
+
+    def test_filter_by_tags_unique(self):
+        """Test recipes matching many tags are listed once."""
+        recipe = create_recipe(user=self.user)
+        tag1 = Tag.objects.create(user=self.user, name='Vegan')
+        tag2 = Tag.objects.create(user=self.user, name='Quick')
+        recipe.tags.add(tag1, tag2)
+        params = {'tags': f'{tag1.id},{tag2.id}'}
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(RECIPES_URL, params)
+
+        self.assertEqual([r['id'] for r in response.data['results']],
+                         [recipe.id])
+        self.assertFalse([
+            query for query in context.captured_queries
+            if 'DISTINCT' in query['sql']
+        ])
+
+    def test_filter_by_all_tags(self):
+        """Test filtering recipes having all of the tags."""
+        tag1 = Tag.objects.create(user=self.user, name='Vegan')
+        tag2 = Tag.objects.create(user=self.user, name='Quick')
+        tag3 = Tag.objects.create(user=self.user, name='Spicy')
+        r1 = create_recipe(user=self.user, title='Salad')
+        r1.tags.add(tag1, tag2)
+        r2 = create_recipe(user=self.user, title='Curry')
+        r2.tags.add(tag1, tag2, tag3)
+        r3 = create_recipe(user=self.user, title='Soup')
+        r3.tags.add(tag1, tag3)
+        params = {'tags': f'{tag1.id},{tag2.id}', 'tags_mode': 'all'}
+
+        response = self.client.get(RECIPES_URL, params)
+
+        self.assertEqual([r['id'] for r in response.data['results']],
+                         [r2.id, r1.id])
+
+    def test_filter_by_tags_invalid_mode(self):
+        """Test an unknown tags mode is rejected."""
+        response = self.client.get(RECIPES_URL, {'tags_mode': 'some'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class RecipeQueryCountTests(TestCase):
+    """Test the number of queries made by recipe endpoints."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com',
+                                password='testpass123')
+        self.client.force_authenticate(self.user)
+
+    def _create_recipes(self, count):
+        """Create recipes with a tag and an ingredient each."""
+        for i in range(count):
+            recipe = create_recipe(user=self.user, title=f'Recipe {i}')
+            recipe.tags.add(
+                Tag.objects.create(user=self.user, name=f'Tag {recipe.id}')
+            )
+            recipe.ingredients.add(Ingredient.objects.create(
+                user=self.user, name=f'Ing {recipe.id}'
+            ))
+
+    def _count_queries(self, method, url, *args, **kwargs):
+        """Call the API and return the response with the query count."""
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(self.client, method)(url, *args, **kwargs)
+
+        return response, len(context.captured_queries)
+
+    def test_list_query_count_is_constant(self):
+        """Test listing recipes does not make queries per recipe."""
+        self._create_recipes(2)
+        response, small_count = self._count_queries('get', RECIPES_URL)
+        self.assertEqual(len(response.data['results']), 2)
+
+        self._create_recipes(20)
+        response, large_count = self._count_queries('get', RECIPES_URL)
+        self.assertEqual(len(response.data['results']), 22)
+
+        self.assertEqual(small_count, large_count)
+        # The page and one prefetch per relation.
+        self.assertEqual(large_count, 3)
+
+    def test_detail_query_count(self):
+        """Test retrieving a recipe with tags and ingredients."""
+        self._create_recipes(1)
+        recipe = Recipe.objects.get(user=self.user)
+        recipe.tags.add(*Tag.objects.bulk_create(
+            Tag(user=self.user, name=f'Extra {i}') for i in range(10)
+        ))
+
+        response, count = self._count_queries('get', detail_url(recipe.id))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['tags']), 11)
+        self.assertEqual(count, 3)
+
+    def test_delete_skips_relations(self):
+        """Test deleting a recipe doesn't fetch its tags or ingredients."""
+        self._create_recipes(1)
+        recipe = Recipe.objects.get(user=self.user)
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.delete(detail_url(recipe.id))
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        for query in context.captured_queries:
+            with self.subTest(sql=query['sql']):
+                self.assertFalse(
+                    query['sql'].startswith('SELECT')
+                    and ('FROM "core_tag"' in query['sql']
+                         or 'FROM "core_ingredient"' in query['sql'])
+                )
+
+    def _recipe_payload(self, count, prefix='New'):
+        """Return a recipe payload with ``count`` tags and ingredients."""
+        return {
+            'title': 'Ratatouille',
+            'time_minutes': 45,
+            'price': Decimal('7.50'),
+            'tags': [{'name': f'{prefix} tag {i}'} for i in range(count)],
+            'ingredients': [
+                {'name': f'{prefix} ingredient {i}'} for i in range(count)
+            ],
+        }
+
+    def test_create_query_count_is_constant(self):
+        """Test creating a recipe does not make queries per tag."""
+        Tag.objects.create(user=self.user, name='Large tag 0')
+
+        response, small_count = self._count_queries(
+            'post', RECIPES_URL, self._recipe_payload(2, 'Small'),
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response, large_count = self._count_queries(
+            'post', RECIPES_URL, self._recipe_payload(30, 'Large'),
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['tags']), 30)
+        self.assertEqual(len(response.data['ingredients']), 30)
+
+        self.assertEqual(small_count, large_count)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 32)
+
+    def test_update_query_count_is_constant(self):
+        """Test updating a recipe does not make queries per ingredient."""
+        self._create_recipes(2)
+        small, large = Recipe.objects.filter(user=self.user)
+
+        response, small_count = self._count_queries(
+            'put', detail_url(small.id), self._recipe_payload(2, 'Small'),
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response, large_count = self._count_queries(
+            'put', detail_url(large.id), self._recipe_payload(30, 'Large'),
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(large.ingredients.count(), 30)
+
+        self.assertEqual(small_count, large_count)
+
+    def test_partial_update_skips_relations(self):
+        """Test a partial update without tags leaves the links alone."""
+        self._create_recipes(1)
+        recipe = Recipe.objects.get(user=self.user)
+        tag = recipe.tags.get()
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.patch(
+                detail_url(recipe.id), {'title': 'Renamed'}, format='json'
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(recipe.tags.all()), [tag])
+        for query in context.captured_queries:
+            with self.subTest(sql=query['sql']):
+                self.assertFalse(
+                    query['sql'].startswith(('DELETE', 'INSERT'))
+                )
+
+    def test_update_only_changes_modified_links(self):
+        """Test unchanged links are kept when the tags are replaced."""
+        recipe = create_recipe(user=self.user)
+        breakfast = Tag.objects.create(user=self.user, name='Breakfast')
+        lunch = Tag.objects.create(user=self.user, name='Lunch')
+        recipe.tags.add(breakfast, lunch)
+        through = Recipe.tags.through
+        kept_link = through.objects.get(recipe=recipe, tag=lunch)
+
+        payload = {'tags': [{'name': 'Lunch'}, {'name': 'Dinner'}]}
+        response = self.client.patch(detail_url(recipe.id), payload,
+                                     format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        links = through.objects.filter(recipe=recipe)
+        self.assertEqual(
+            sorted(links.values_list('tag__name', flat=True)),
+            ['Dinner', 'Lunch']
+        )
+        self.assertTrue(links.filter(id=kept_link.id).exists())
+
+    def test_update_with_same_tags_writes_nothing(self):
+        """Test resending the current tags does not rewrite the links."""
+        self._create_recipes(1)
+        recipe = Recipe.objects.get(user=self.user)
+        payload = {
+            'tags': [{'name': recipe.tags.get().name}],
+            'ingredients': [{'name': recipe.ingredients.get().name}],
+        }
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.patch(detail_url(recipe.id), payload,
+                                         format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for query in context.captured_queries:
+            with self.subTest(sql=query['sql']):
+                self.assertFalse(
+                    query['sql'].startswith(('DELETE', 'INSERT'))
+                )
+
+    def test_full_update_without_tags_clears_them(self):
+        """Test a full update without tags removes the recipe tags."""
+        self._create_recipes(1)
+        recipe = Recipe.objects.get(user=self.user)
+        payload = {
+            'title': 'Plain recipe',
+            'time_minutes': 5,
+            'price': Decimal('1.00'),
+        }
+
+        response = self.client.put(detail_url(recipe.id), payload,
+                                   format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(recipe.tags.exists())
+        self.assertFalse(recipe.ingredients.exists())
+
+    def test_duplicate_names_in_payload(self):
+        """Test repeated tag names are assigned once."""
+        payload = self._recipe_payload(1)
+        payload['tags'] = [{'name': 'Vegan'}, {'name': 'Vegan'}]
+
+        response = self.client.post(RECIPES_URL, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['tags']), 1)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 1)
+
+    def test_update_response_reflects_new_tags(self):
+        """Test prefetched tags are refreshed after an update."""
+        self._create_recipes(1)
+        recipe = Recipe.objects.get(user=self.user)
+        payload = {'tags': [{'name': 'Brunch'}]}
+
+        response = self.client.patch(detail_url(recipe.id), payload,
+                                     format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([tag['name'] for tag in response.data['tags']],
+                         ['Brunch'])
+
+
+class SparseFieldsetTests(TestCase):
+    """Test narrowing recipe responses with fields and expand."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com',
+                                password='testpass123')
+        self.client.force_authenticate(self.user)
+        self.recipe = create_recipe(user=self.user)
+        self.tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.ingredient = Ingredient.objects.create(user=self.user,
+                                                    name='Salt')
+        self.recipe.tags.add(self.tag)
+        self.recipe.ingredients.add(self.ingredient)
+
+    def _get(self, url, params):
+        """Call the API and return the response with the queries."""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, [query['sql'] for query in context.captured_queries]
+
+    def test_list_fields(self):
+        """Test only the requested fields are selected and returned."""
+        response, queries = self._get(RECIPES_URL,
+                                      {'fields': 'title,id,price'})
+
+        self.assertEqual(response.data['results'], [{
+            'id': self.recipe.id,
+            'title': self.recipe.title,
+            'price': '5.25',
+        }])
+        # The page, without prefetching the relations.
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"link"', queries[-1])
+        self.assertNotIn('"image_variants"', queries[-1])
+
+    def test_detail_fields(self):
+        """Test detail only fields can be requested on the detail."""
+        response, _ = self._get(detail_url(self.recipe.id),
+                                {'fields': 'id,description'})
+
+        self.assertEqual(response.data, {
+            'id': self.recipe.id,
+            'description': self.recipe.description,
+        })
+
+    def test_list_excludes_detail_fields(self):
+        """Test detail only fields can't be requested on the list."""
+        response = self.client.get(RECIPES_URL, {'fields': 'description'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_not_expanded(self):
+        """Test nested fields not expanded are returned as ids."""
+        response, queries = self._get(RECIPES_URL, {'expand': ''})
+
+        result = response.data['results'][0]
+        self.assertEqual(result['tags'], [self.tag.id])
+        self.assertEqual(result['ingredients'], [self.ingredient.id])
+        self.assertFalse([sql for sql in queries if '"name"' in sql])
+
+    def test_expand_some(self):
+        """Test only the listed nested fields are expanded."""
+        response, _ = self._get(detail_url(self.recipe.id),
+                                {'expand': 'tags'})
+
+        self.assertEqual(response.data['tags'],
+                         TagSerializer([self.tag], many=True).data)
+        self.assertEqual(response.data['ingredients'], [self.ingredient.id])
+
+    def test_unknown_names(self):
+        """Test unknown fields are rejected."""
+        for params in ({'fields': 'id,secret'}, {'expand': 'user'}):
+            with self.subTest(params=params):
+                response = self.client.get(RECIPES_URL, params)
+
+                self.assertEqual(response.status_code,
+                                 status.HTTP_400_BAD_REQUEST)
+
+    def test_detail_etag_per_fields(self):
+        """Test a narrowed detail doesn't match the ETag of the full one."""
+        url = detail_url(self.recipe.id)
+        etag = self.client.get(url)['ETag']
+
+        response = self.client.get(url, {'fields': 'id'},
+                                   HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'id': self.recipe.id})
+        response = self.client.get(url, {'fields': 'id'},
+                                   HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_writes_ignore_fields(self):
+        """Test updates return the full recipe whatever the fields."""
+        response = self.client.patch(
+            f'{detail_url(self.recipe.id)}?fields=id', {'title': 'New'}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['title'], 'New')
+        self.assertIn('tags', response.data)
 
 
 class ImageUploadTests(TestCase):
@@ -449,8 +827,9 @@ class ImageUploadTests(TestCase):
             response = self.client.post(url, payload, format='multipart')
 
         self.recipe.refresh_from_db()
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
         self.assertIn('image', response.data)
+        self.assertEqual(response.data['image_status'], 'pending')
         self.assertTrue(os.path.exists(self.recipe.image.path))
 
     def test_upload_image_bad_request(self):
@@ -0,0 +1,202 @@
+"""
+Tests for the bulk recipe API.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+
+User = get_user_model()
+BULK_URL = reverse('recipe:recipe-bulk')
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        'title': 'Sample recipe',
+        'time_minutes': 10,
+        'price': Decimal('5.00'),
+    }
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+def recipe_payload(index, **params):
+    """Return the payload of a recipe with tags and ingredients."""
+    payload = {
+        'title': f'Recipe {index}',
+        'time_minutes': 20,
+        'price': '4.50',
+        'description': 'Bulk created recipe.',
+        'tags': [{'name': 'Dinner'}, {'name': f'Tag {index}'}],
+        'ingredients': [{'name': 'Salt'}, {'name': f'Ingredient {index}'}],
+    }
+    payload.update(params)
+    return payload
+
+
+class PublicBulkApiTests(TestCase):
+    """Test unauthenticated bulk requests."""
+
+    def test_auth_required(self):
+        """Test auth is required for bulk operations."""
+        response = APIClient().post(BULK_URL, [], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateBulkApiTests(TestCase):
+    """Test authenticated bulk requests."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user('user@example.com', 'pass123')
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_create(self):
+        """Test creating recipes with tags and ingredients in bulk."""
+        Tag.objects.create(user=self.user, name='Dinner')
+        payload = [recipe_payload(i) for i in range(3)]
+
+        response = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 3)
+        for item, sent in zip(response.data, payload):
+            with self.subTest(item=item):
+                self.assertEqual(item['status'], status.HTTP_201_CREATED)
+                recipe = Recipe.objects.get(id=item['id'], user=self.user)
+                self.assertEqual(recipe.title, sent['title'])
+                self.assertEqual(item['data']['description'],
+                                 sent['description'])
+                self.assertEqual(
+                    sorted(recipe.tags.values_list('name', flat=True)),
+                    sorted(tag['name'] for tag in sent['tags'])
+                )
+                self.assertEqual(recipe.ingredients.count(), 2)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 4)
+        self.assertEqual(
+            Ingredient.objects.filter(user=self.user).count(), 4
+        )
+
+    def test_bulk_create_query_count_is_constant(self):
+        """Test the number of queries does not depend on the batch size."""
+        with CaptureQueriesContext(connection) as small:
+            self.client.post(
+                BULK_URL, [recipe_payload(i) for i in range(2)],
+                format='json'
+            )
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.post(
+                BULK_URL, [recipe_payload(i) for i in range(2, 50)],
+                format='json'
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(small.captured_queries),
+                         len(large.captured_queries))
+
+    def test_bulk_create_invalid_item(self):
+        """Test an invalid item rejects the whole batch."""
+        payload = [recipe_payload(1), recipe_payload(2, time_minutes='x')]
+
+        response = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0]['status'],
+                         status.HTTP_424_FAILED_DEPENDENCY)
+        self.assertEqual(response.data[1]['status'],
+                         status.HTTP_400_BAD_REQUEST)
+        self.assertIn('time_minutes', response.data[1]['errors'])
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_bulk_requires_list(self):
+        """Test the payload must be a list."""
+        response = self.client.post(BULK_URL, recipe_payload(1),
+                                    format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_bulk_update(self):
+        """Test partially updating recipes in bulk."""
+        breakfast = Tag.objects.create(user=self.user, name='Breakfast')
+        lunch = Tag.objects.create(user=self.user, name='Lunch')
+        recipe1 = create_recipe(self.user, title='Porridge')
+        recipe1.tags.add(breakfast, lunch)
+        recipe2 = create_recipe(self.user, title='Soup')
+        recipe2.tags.add(lunch)
+        untouched = create_recipe(self.user, title='Pie')
+        payload = [
+            {'id': recipe1.id, 'tags': [{'name': 'Lunch'}]},
+            {'id': recipe2.id, 'title': 'Tomato Soup'},
+        ]
+
+        response = self.client.patch(BULK_URL, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in response.data],
+                         [recipe1.id, recipe2.id])
+        self.assertEqual(response.data[0]['data']['tags'][0]['name'],
+                         'Lunch')
+        recipe1.refresh_from_db()
+        recipe2.refresh_from_db()
+        untouched.refresh_from_db()
+        self.assertEqual(recipe1.title, 'Porridge')
+        self.assertEqual(list(recipe1.tags.all()), [lunch])
+        self.assertEqual(recipe2.title, 'Tomato Soup')
+        self.assertEqual(list(recipe2.tags.all()), [lunch])
+        self.assertEqual(untouched.title, 'Pie')
+
+    def test_bulk_update_other_users_recipe(self):
+        """Test recipes of other users cannot be updated."""
+        other_user = User.objects.create_user('other@example.com', 'pass')
+        recipe = create_recipe(self.user, title='Mine')
+        other_recipe = create_recipe(other_user, title='Theirs')
+        payload = [
+            {'id': recipe.id, 'title': 'Changed'},
+            {'id': other_recipe.id, 'title': 'Changed'},
+        ]
+
+        response = self.client.patch(BULK_URL, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[1]['status'],
+                         status.HTTP_404_NOT_FOUND)
+        recipe.refresh_from_db()
+        other_recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'Mine')
+        self.assertEqual(other_recipe.title, 'Theirs')
+
+    def test_bulk_delete(self):
+        """Test deleting recipes in bulk."""
+        recipes = [create_recipe(self.user) for _ in range(3)]
+        ids = [recipe.id for recipe in recipes[:2]]
+
+        response = self.client.delete(BULK_URL, ids, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in response.data], ids)
+        self.assertEqual(list(Recipe.objects.values_list('id', flat=True)),
+                         [recipes[2].id])
+
+    def test_bulk_delete_missing_recipe(self):
+        """Test nothing is deleted when a recipe does not exist."""
+        other_user = User.objects.create_user('other@example.com', 'pass')
+        recipe = create_recipe(self.user)
+        other_recipe = create_recipe(other_user)
+
+        response = self.client.delete(
+            BULK_URL, [recipe.id, other_recipe.id], format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Recipe.objects.count(), 2)
@@ -0,0 +1,113 @@
+"""
+Tests the recipe lists served from rows match the serializer output.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe, Tag
+from recipe.serializers import RecipeSerializer
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+class RowsParityTests(TestCase):
+    """Test listed recipes are rendered exactly like the serializer does."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user('user@example.com',
+                                                         'pass123')
+        self.client.force_authenticate(self.user)
+
+        tags = [
+            Tag.objects.create(user=self.user, name=name)
+            for name in ('Vegan', 'Quick', 'Dessert')
+        ]
+        ingredients = [
+            Ingredient.objects.create(user=self.user, name=name)
+            for name in ('Salt', 'Crème fraîche', 'Egg', '食パン')
+        ]
+        recipes = [
+            Recipe.objects.create(user=self.user, title='Crème brûlée',
+                                  time_minutes=45, price=Decimal('7.50'),
+                                  link='https://example.com/creme'),
+            Recipe.objects.create(user=self.user, title='Toast',
+                                  time_minutes=0, price=Decimal('0.05')),
+            Recipe.objects.create(
+                user=self.user, title='Curry', time_minutes=90,
+                price=Decimal('999.99'),
+                image_status=Recipe.ImageStatus.READY,
+                image_variants={'small': {
+                    'width': 320, 'height': 240,
+                    'jpeg': 'uploads/recipe/curry-small.jpg',
+                    'webp': 'uploads/recipe/curry-small.webp',
+                }}
+            ),
+            Recipe.objects.create(user=self.user, title='Plain',
+                                  time_minutes=5, price=Decimal('3')),
+        ]
+        recipes[0].tags.add(*tags)
+        recipes[0].ingredients.add(*ingredients)
+        recipes[1].tags.add(tags[1])
+        recipes[2].ingredients.add(ingredients[0], ingredients[3])
+        other_user = get_user_model().objects.create_user(
+            'other@example.com', 'pass123'
+        )
+        Recipe.objects.create(user=other_user, title='Other',
+                              time_minutes=5, price=Decimal('1.00'))
+
+    def assertParity(self, params=None, context=None):
+        """Assert the list renders like the serializer for the params."""
+        response = self.client.get(RECIPES_URL, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        recipes = Recipe.objects.filter(user=self.user).prefetch_related(
+            'tags', 'ingredients'
+        ).order_by('-id')
+        expected = RecipeSerializer(recipes, many=True, context={
+            'request': response.wsgi_request, **(context or {})
+        }).data
+
+        self.assertEqual(JSONRenderer().render(response.data['results']),
+                         JSONRenderer().render(expected))
+
+    def test_full(self):
+        """Test the full representation matches."""
+        self.assertParity()
+
+    def test_not_expanded(self):
+        """Test nested fields rendered as ids match."""
+        self.assertParity({'expand': ''}, {'expand': set()})
+
+    def test_expand_some(self):
+        """Test partly expanded nested fields match."""
+        self.assertParity({'expand': 'ingredients'},
+                          {'expand': {'ingredients'}})
+
+    def test_fields(self):
+        """Test narrowed representations match."""
+        fields = {'images', 'price', 'tags', 'title'}
+
+        self.assertParity({'fields': ','.join(fields)}, {'fields': fields})
+
+    def test_search_pages(self):
+        """Test paging through ranked results from rows."""
+        url = f'{RECIPES_URL}?search=plain+OR+curry+OR+toast&page_size=1'
+        titles = []
+
+        # Bounded, so a cursor that doesn't move fails instead of looping.
+        for _ in range(5):
+            response = self.client.get(url)
+            titles.extend(item['title'] for item in response.data['results'])
+            url = response.data['next']
+            if url is None:
+                break
+
+        self.assertCountEqual(titles, ['Plain', 'Curry', 'Toast'])
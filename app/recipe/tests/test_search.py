@@ -0,0 +1,155 @@
+"""
+Tests for searching recipes.
+"""
+import io
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+BULK_URL = reverse('recipe:recipe-bulk')
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        'title': 'Sample recipe',
+        'time_minutes': 10,
+        'price': Decimal('5.00'),
+    }
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class RecipeSearchApiTests(TestCase):
+    """Test the search parameter of the recipe list."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('user@example.com',
+                                                         'pass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def search(self, query, **params):
+        """Return the ids of the recipes found for a query."""
+        response = self.client.get(RECIPES_URL, {'search': query, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [recipe['id'] for recipe in response.data['results']]
+
+    def test_search_fields(self):
+        """Test titles, descriptions, tags and ingredients are searched."""
+        by_title = create_recipe(self.user, title='Lemon cake')
+        by_description = create_recipe(self.user,
+                                       description='Zest two lemons.')
+        by_tag = create_recipe(self.user)
+        by_tag.tags.add(Tag.objects.create(user=self.user, name='Lemons'))
+        by_ingredient = create_recipe(self.user)
+        by_ingredient.ingredients.add(
+            Ingredient.objects.create(user=self.user, name='Lemon juice')
+        )
+        create_recipe(self.user, title='Chocolate cake')
+
+        self.assertCountEqual(
+            self.search('lemon'),
+            [by_title.id, by_description.id, by_tag.id, by_ingredient.id]
+        )
+
+    def test_ranked_by_relevance(self):
+        """Test title matches rank above description matches."""
+        by_description = create_recipe(self.user, title='Cake',
+                                       description='With basil leaves.')
+        by_title = create_recipe(self.user, title='Basil pesto')
+        by_tag = create_recipe(self.user, title='Pasta')
+        by_tag.tags.add(Tag.objects.create(user=self.user, name='Basil'))
+
+        self.assertEqual(self.search('basil'),
+                         [by_title.id, by_tag.id, by_description.id])
+
+    def test_websearch_syntax(self):
+        """Test quoted phrases and excluded words."""
+        r1 = create_recipe(self.user, title='Green curry paste')
+        create_recipe(self.user, title='Red curry paste')
+        create_recipe(self.user, title='Curry green beans')
+
+        self.assertEqual(self.search('"green curry" -red'), [r1.id])
+
+    def test_search_limited_to_user(self):
+        """Test only the recipes of the user are found."""
+        other_user = get_user_model().objects.create_user('other@example.com',
+                                                          'pass123')
+        create_recipe(other_user, title='Lemon cake')
+
+        self.assertEqual(self.search('lemon'), [])
+
+    def test_search_paginated(self):
+        """Test ranked results are paged with the cursor."""
+        expected = [
+            create_recipe(self.user, title='Soup ' + 'soup ' * i).id
+            for i in range(5)
+        ][::-1]
+        found = []
+        response = self.client.get(RECIPES_URL,
+                                   {'search': 'soup', 'page_size': 2})
+
+        while True:
+            found.extend(recipe['id'] for recipe in response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+
+        self.assertEqual(found, expected)
+
+    def test_vector_follows_changes(self):
+        """Test edits, renames and unlinks are reflected in the results."""
+        recipe = create_recipe(self.user, title='Stew')
+        tag = Tag.objects.create(user=self.user, name='Winter')
+        tag.recipe_set.add(recipe)
+        self.assertEqual(self.search('winter'), [recipe.id])
+
+        tag.name = 'Autumn'
+        tag.save()
+        self.assertEqual(self.search('winter'), [])
+        self.assertEqual(self.search('autumn'), [recipe.id])
+
+        tag.recipe_set.clear()
+        self.assertEqual(self.search('autumn'), [])
+
+        recipe.tags.add(tag)
+        tag.delete()
+        self.assertEqual(self.search('autumn'), [])
+
+        self.client.patch(reverse('recipe:recipe-detail', args=[recipe.id]),
+                          {'title': 'Goulash'})
+        self.assertEqual(self.search('goulash'), [recipe.id])
+
+    def test_bulk_writes_searchable(self):
+        """Test recipes created and updated in bulk are found."""
+        response = self.client.post(BULK_URL, [
+            {'title': 'Pancakes', 'time_minutes': 10, 'price': '2.00',
+             'tags': [{'name': 'Breakfast'}]},
+        ], format='json')
+        recipe_id = response.data[0]['id']
+        self.assertEqual(self.search('breakfast'), [recipe_id])
+
+        self.client.patch(BULK_URL, [
+            {'id': recipe_id, 'ingredients': [{'name': 'Maple syrup'}]},
+        ], format='json')
+        self.assertEqual(self.search('syrup'), [recipe_id])
+
+    def test_backfill_command(self):
+        """Test the command fills the search vectors of existing rows."""
+        recipe = create_recipe(self.user, title='Risotto')
+        Recipe.objects.update(search_vector=None)
+
+        call_command('update_search_vectors', missing=True, batch_size=1,
+                     stdout=io.StringIO())
+
+        self.assertEqual(self.search('risotto'), [recipe.id])
@@ -57,7 +57,7 @@ class PrivateTagsApiTests(TestCase):
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         serializer = TagSerializer(tags, many=True)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
 
     def test_tag_limited_to_user(self):
         """Test list of tags is limited to authenticated user."""
@@ -67,9 +67,9 @@ class PrivateTagsApiTests(TestCase):
 
         response = self.client.get(TAGS_URL)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['name'], tag.name)
-        self.assertEqual(response.data[0]['id'], tag.id)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['name'], tag.name)
+        self.assertEqual(response.data['results'][0]['id'], tag.id)
 
     def test_update_tag(self):
         """Test updating a tag."""
@@ -82,6 +82,32 @@ class PrivateTagsApiTests(TestCase):
         tag.refresh_from_db()
         self.assertEqual(tag.name, payload['name'])
 
+    def test_rename_to_existing_name(self):
+        """Test renaming to another tag's name in any case fails."""
+        Tag.objects.create(user=self.user, name='vegan')
+        tag = Tag.objects.create(user=self.user, name='Other')
+        other_user = create_user('other@example.com')
+        Tag.objects.create(user=other_user, name='Pepper')
+
+        for method in ('patch', 'put'):
+            with self.subTest(method=method):
+                response = getattr(self.client, method)(
+                    detail_url(tag.id), {'name': 'Vegan'}
+                )
+
+                self.assertEqual(response.status_code,
+                                 status.HTTP_400_BAD_REQUEST)
+                self.assertIn('name', response.data)
+        tag.refresh_from_db()
+        self.assertEqual(tag.name, 'Other')
+
+        response = self.client.patch(detail_url(tag.id),
+                                     {'name': 'OTHER'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.patch(detail_url(tag.id),
+                                     {'name': 'Pepper'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
     def test_delete_tag(self):
         """Test deleting a tag."""
         tag = Tag.objects.create(user=self.user, name='Breakfast')
@@ -108,8 +134,8 @@ class PrivateTagsApiTests(TestCase):
 
         s1 = TagSerializer(tag1)
         s2 = TagSerializer(tag2)
-        self.assertIn(s1.data, response.data)
-        self.assertNotIn(s2.data, response.data)
+        self.assertIn(s1.data, response.data['results'])
+        self.assertNotIn(s2.data, response.data['results'])
 
     def test_filtered_tags_unique(self):
         """Test filtered tags returns a unique list."""
@@ -131,4 +157,4 @@ class PrivateTagsApiTests(TestCase):
         recipe2.tags.add(tag)
 
         response = self.client.get(TAGS_URL, {'assigned_only': 1})
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
@@ -0,0 +1,233 @@
+"""
+Tests for the chunked image upload API.
+"""
+import io
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import ImageUpload, Recipe
+from recipe import uploads
+
+
+UPLOADS_URL = reverse('recipe:imageupload-list')
+CHUNK_CONTENT_TYPE = 'application/offset+octet-stream'
+
+
+def upload_url(upload_id):
+    """Create and return an upload detail URL."""
+    return reverse('recipe:imageupload-detail', args=[upload_id])
+
+
+def create_image_content(size=(300, 200)):
+    """Return the bytes of a sample JPEG image."""
+    buffer = io.BytesIO()
+    Image.effect_noise(size, 40).convert('RGB').save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+class RecordingStream(io.BytesIO):
+    """Stream remembering the sizes it was read with."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.reads = []
+
+    def read(self, size=-1):
+        self.reads.append(size)
+        return super().read(size)
+
+
+@override_settings(IMAGE_UPLOAD_CHUNK_SIZE=1024)
+class ImageUploadApiTests(TestCase):
+    """Test uploading recipe images in chunks."""
+
+    def setUp(self):
+        for setting in ('MEDIA_ROOT', 'IMAGE_UPLOAD_TEMP_DIR'):
+            directory = tempfile.mkdtemp()
+            self.addCleanup(shutil.rmtree, directory)
+            settings_override = override_settings(**{setting: directory})
+            settings_override.enable()
+            self.addCleanup(settings_override.disable)
+
+        self.user = get_user_model().objects.create_user('user@example.com',
+                                                         'pass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title='Sample recipe',
+            time_minutes=10,
+            price=Decimal('5.00'),
+        )
+
+    def create_upload(self, size):
+        """Create an upload through the API and return its data."""
+        response = self.client.post(UPLOADS_URL,
+                                    {'recipe': self.recipe.id, 'size': size})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data
+
+    def send_chunk(self, upload_id, offset, chunk):
+        """Send a chunk of an upload."""
+        return self.client.patch(upload_url(upload_id), chunk,
+                                 content_type=CHUNK_CONTENT_TYPE,
+                                 HTTP_UPLOAD_OFFSET=str(offset))
+
+    def test_create_upload(self):
+        """Test creating an upload returns where to start."""
+        data = self.create_upload(5000)
+
+        self.assertEqual(data['offset'], 0)
+        self.assertEqual(data['chunk_size'], 1024)
+        upload = ImageUpload.objects.get(id=data['id'])
+        self.assertTrue(os.path.exists(upload.path))
+
+    @override_settings(IMAGE_UPLOAD_MAX_SIZE=1000)
+    def test_create_upload_too_large(self):
+        """Test uploads larger than allowed are refused."""
+        response = self.client.post(UPLOADS_URL,
+                                    {'recipe': self.recipe.id, 'size': 1001})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_create_upload_other_users_recipe(self):
+        """Test uploading to the recipe of another user is refused."""
+        other_user = get_user_model().objects.create_user('other@example.com',
+                                                          'pass123')
+        self.client.force_authenticate(other_user)
+
+        response = self.client.post(UPLOADS_URL,
+                                    {'recipe': self.recipe.id, 'size': 10})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_upload_in_chunks(self):
+        """Test the image is stored once the last chunk is received."""
+        content = create_image_content()
+        upload_id = self.create_upload(len(content))['id']
+
+        for offset in range(0, len(content) - 1024, 1024):
+            response = self.send_chunk(upload_id, offset,
+                                       content[offset:offset + 1024])
+            self.assertEqual(response.status_code,
+                             status.HTTP_204_NO_CONTENT)
+            self.assertEqual(int(response['Upload-Offset']), offset + 1024)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.send_chunk(upload_id, offset + 1024,
+                                       content[offset + 1024:])
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['image_status'], 'pending')
+        with self.recipe.image.open('rb') as file:
+            self.assertEqual(file.read(), content)
+        self.assertFalse(ImageUpload.objects.exists())
+        self.assertEqual(os.listdir(settings.IMAGE_UPLOAD_TEMP_DIR), [])
+
+    def test_resume_after_interrupted_chunk(self):
+        """Test an interrupted chunk is resumed from the bytes received."""
+        content = create_image_content()
+        upload_id = self.create_upload(len(content))['id']
+        upload = ImageUpload.objects.get(id=upload_id)
+
+        uploads.write_chunk(upload, 0, io.BytesIO(content[:600]), 1024)
+        response = self.client.head(upload_url(upload_id))
+        offset = int(response['Upload-Offset'])
+        while offset < len(content):
+            response = self.send_chunk(upload_id, offset,
+                                       content[offset:offset + 1024])
+            offset += len(content[offset:offset + 1024])
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        with self.recipe.image.open('rb') as file:
+            self.assertEqual(file.read(), content)
+
+    def test_chunk_streamed_in_blocks(self):
+        """Test chunks are read from the request a block at a time."""
+        upload = uploads.create_upload(self.user, self.recipe, 200_000)
+        stream = RecordingStream(b'x' * 200_000)
+
+        uploads.write_chunk(upload, 0, stream, 200_000)
+
+        self.assertEqual(upload.offset, 200_000)
+        self.assertLessEqual(max(stream.reads), uploads.BLOCK_SIZE)
+
+    def test_wrong_offset_conflict(self):
+        """Test a chunk not starting at the upload offset is refused."""
+        upload_id = self.create_upload(2000)['id']
+
+        response = self.send_chunk(upload_id, 1024, b'x' * 100)
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response['Upload-Offset'], '0')
+
+    def test_chunk_too_large(self):
+        """Test chunks larger than the chunk size are refused."""
+        upload_id = self.create_upload(2000)['id']
+
+        response = self.send_chunk(upload_id, 0, b'x' * 1025)
+
+        self.assertEqual(response.status_code,
+                         status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    def test_chunk_content_type_required(self):
+        """Test chunks must be sent as raw bytes."""
+        upload_id = self.create_upload(2000)['id']
+
+        response = self.client.patch(upload_url(upload_id), {'x': 1},
+                                     format='json', HTTP_UPLOAD_OFFSET='0')
+
+        self.assertEqual(response.status_code,
+                         status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+    def test_invalid_image_refused(self):
+        """Test a completed upload that isn't an image is refused."""
+        upload_id = self.create_upload(100)['id']
+
+        response = self.send_chunk(upload_id, 0, b'x' * 100)
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(self.recipe.image)
+        self.assertFalse(ImageUpload.objects.exists())
+
+    def test_other_users_upload_not_found(self):
+        """Test uploads of other users can't be read or written."""
+        upload_id = self.create_upload(100)['id']
+        other_user = get_user_model().objects.create_user('other@example.com',
+                                                          'pass123')
+        self.client.force_authenticate(other_user)
+
+        response = self.send_chunk(upload_id, 0, b'x' * 100)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_clear_expired_uploads(self):
+        """Test the command deletes uploads not completed in time."""
+        expired = uploads.create_upload(self.user, self.recipe, 100)
+        ImageUpload.objects.filter(id=expired.id).update(
+            created_at=timezone.now() - timedelta(days=2)
+        )
+        current = uploads.create_upload(self.user, self.recipe, 100)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('clear_image_uploads', stdout=io.StringIO())
+
+        self.assertEqual(list(ImageUpload.objects.all()), [current])
+        self.assertFalse(os.path.exists(expired.path))
+        self.assertTrue(os.path.exists(current.path))
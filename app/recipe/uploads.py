@@ -0,0 +1,140 @@
+"""
+Resumable chunked uploads of recipe images.
+
+The client creates an upload with the size of the image, then sends the
+image in chunks of at most ``IMAGE_UPLOAD_CHUNK_SIZE`` bytes, each with
+the offset it starts at. Chunks are streamed from the request to a
+temporary file a block at a time, so the memory used by a request doesn't
+depend on the size of the image. A client that lost its connection reads
+the offset of the upload and carries on from there. Once the last chunk
+is received the file is checked and stored as the image of the recipe.
+"""
+import fcntl
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import ImageUpload
+from recipe import images
+
+
+BLOCK_SIZE = 64 * 1024
+
+
+class UploadConflict(Exception):
+    """The chunk doesn't start at the offset of the upload."""
+
+
+class InvalidImage(Exception):
+    """The uploaded file isn't an image of an allowed size."""
+
+
+def create_upload(user, recipe, size):
+    """Create an upload and its empty temporary file."""
+    os.makedirs(settings.IMAGE_UPLOAD_TEMP_DIR, exist_ok=True)
+    upload = ImageUpload.objects.create(user=user, recipe=recipe, size=size)
+    open(upload.path, 'xb').close()
+    return upload
+
+
+def delete_upload(upload):
+    """Delete an upload and its temporary file."""
+    path = upload.path
+    upload.delete()
+    transaction.on_commit(lambda: _remove(path))
+
+
+def _remove(path):
+    """Remove a file if it still exists."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def write_chunk(upload, offset, stream, length):
+    """
+    Append ``length`` bytes read from ``stream`` to an upload at ``offset``.
+
+    The temporary file is locked while writing, so a client retrying a
+    chunk still being received gets a conflict instead of interleaving
+    writes. The offset reached is saved even when the client disconnects
+    before the end of the chunk, so the upload can be resumed from there.
+    """
+    with open(upload.path, 'r+b') as file:
+        try:
+            fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadConflict('A chunk of this upload is being received.')
+
+        upload.refresh_from_db(fields=['offset'])
+        if offset != upload.offset:
+            raise UploadConflict(f'The upload is at offset {upload.offset}.')
+
+        file.seek(offset)
+        try:
+            while length:
+                block = stream.read(min(BLOCK_SIZE, length))
+                if not block:
+                    break
+                file.write(block)
+                length -= len(block)
+        finally:
+            file.flush()
+            os.fsync(file.fileno())
+            upload.offset = file.tell()
+            ImageUpload.objects.filter(id=upload.id).update(
+                offset=upload.offset
+            )
+
+    return upload
+
+
+def complete_upload(upload):
+    """
+    Store a fully received upload as the image of its recipe.
+
+    Raises ``InvalidImage`` for files that aren't images of an allowed
+    size. The upload is deleted either way.
+    """
+    recipe = upload.recipe
+
+    with open(upload.path, 'rb') as file:
+        try:
+            image_format = images.check_image(file)
+        except Exception as exc:
+            delete_upload(upload)
+            raise InvalidImage(str(exc)) from exc
+
+        file.seek(0)
+        with transaction.atomic():
+            old_variants = recipe.image_variants
+            recipe.image.save(f'{upload.id}.{image_format.lower()}',
+                              File(file), save=False)
+            images.mark_pending(recipe)
+            recipe.save()
+            delete_upload(upload)
+            transaction.on_commit(
+                lambda: images.delete_variants(old_variants)
+            )
+
+    return recipe
+
+
+def delete_expired_uploads():
+    """Delete the uploads not completed in time and return their number."""
+    expired = ImageUpload.objects.filter(
+        created_at__lt=timezone.now()
+        - timedelta(seconds=settings.IMAGE_UPLOAD_EXPIRY)
+    )
+    count = 0
+
+    for upload in expired.iterator():
+        delete_upload(upload)
+        count += 1
+
+    return count
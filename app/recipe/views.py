@@ -1,6 +1,10 @@
 """
 Views for the recipe app.
 """
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import Count, Exists, F, FloatField, OuterRef
+from django.db.models.functions import Cast
 from drf_spectacular.utils import (
     extend_schema_view,
     extend_schema,
@@ -9,35 +13,89 @@ from drf_spectacular.utils import (
 )
 from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import IntegerField, ListField
 from rest_framework.response import Response
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 
-from core.models import Recipe, Tag, Ingredient
-from recipe import serializers
+from core.authentication import CachedTokenAuthentication
+from core.models import ImageUpload, Recipe, Tag, Ingredient
+from recipe import autocomplete, serializers, uploads
+from recipe.cache import CachedListMixin
+from recipe.conditional import (
+    ConditionalListMixin,
+    ConditionalRetrieveMixin,
+    ConditionalUpdateMixin
+)
+from recipe.rows import ValuesListMixin
+
+
+SPARSE_PARAMETERS = [
+    OpenApiParameter(
+        'fields',
+        OpenApiTypes.STR,
+        description='Comma separated list of the fields to return.'
+    ),
+    OpenApiParameter(
+        'expand',
+        OpenApiTypes.STR,
+        description=(
+            'Comma separated list of the nested fields to return in full, '
+            'tags and ingredients by default. The others are returned as '
+            'lists of ids.'
+        )
+    ),
+]
 
 
 @extend_schema_view(
     list=extend_schema(
-        parameters=[
+        parameters=SPARSE_PARAMETERS + [
+            OpenApiParameter(
+                'search',
+                OpenApiTypes.STR,
+                description=(
+                    'Words to search in the titles, tags, ingredients and '
+                    'descriptions. Results are ordered by relevance.'
+                )
+            ),
             OpenApiParameter(
                 'tags',
                 OpenApiTypes.STR,
                 description='Comma separated list of tag IDs to filter.'
             ),
+            OpenApiParameter(
+                'tags_mode',
+                OpenApiTypes.STR,
+                enum=['any', 'all'],
+                description=(
+                    'Whether recipes need any (default) or all of the tags.'
+                )
+            ),
             OpenApiParameter(
                 'ingredients',
                 OpenApiTypes.STR,
                 description='Comma separated list of ingredient IDs to filter.'
             )
         ]
-    )
+    ),
+    retrieve=extend_schema(parameters=SPARSE_PARAMETERS)
 )
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(CachedListMixin,
+                    ConditionalListMixin,
+                    ConditionalRetrieveMixin,
+                    ConditionalUpdateMixin,
+                    ValuesListMixin,
+                    viewsets.ModelViewSet):
     """View for manage recipe APIs."""
     queryset = Recipe.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    bulk_max_items = 1000
+    # Actions whose responses can be narrowed with ``fields`` and ``expand``.
+    sparse_actions = ('list', 'retrieve')
+    # Other actions reading the tags and ingredients of the object.
+    related_actions = ('update', 'partial_update')
 
     @staticmethod
     def _params_to_ints(qs: str):
@@ -54,20 +112,70 @@ class RecipeViewSet(viewsets.ModelViewSet):
         """
         Retrieve only recipes of authenticated user.
         """
+        search = self.request.query_params.get('search', '').strip()
         tags = self.request.query_params.get('tags')
+        tags_mode = self.request.query_params.get('tags_mode', 'any')
         ingredients = self.request.query_params.get('ingredients')
         queryset = self.queryset
 
+        if tags_mode not in ('any', 'all'):
+            raise ValidationError({'tags_mode': ['Expected any or all.']})
         if tags:
             tag_ids = self._params_to_ints(tags)
-            queryset = queryset.filter(tags__id__in=tag_ids)
+            if tags_mode == 'all':
+                queryset = queryset.filter(
+                    id__in=self._with_all(Recipe.tags.through, 'tag_id',
+                                          tag_ids)
+                )
+            else:
+                queryset = queryset.filter(
+                    self._with_any(Recipe.tags.through, 'tag_id', tag_ids)
+                )
         if ingredients:
             ingredient_ids = self._params_to_ints(ingredients)
-            queryset = queryset.filter(ingredients__id__in=ingredient_ids)
+            queryset = queryset.filter(
+                self._with_any(Recipe.ingredients.through, 'ingredient_id',
+                               ingredient_ids)
+            )
 
-        return queryset.filter(
-            user=self.request.user
-        ).order_by('-id').distinct()
+        queryset = queryset.filter(user=self.request.user)
+        if self.action in self.sparse_actions:
+            queryset = self.get_serializer().optimize_queryset(queryset)
+        elif self.action in self.related_actions:
+            queryset = queryset.prefetch_related('tags', 'ingredients')
+
+        if search:
+            query = SearchQuery(search, search_type='websearch',
+                                config=settings.SEARCH_CONFIG)
+            # ts_rank returns a real, cast so the rank in the cursor
+            # compares equal to the one of its row.
+            return queryset.filter(search_vector=query).annotate(
+                rank=Cast(SearchRank(F('search_vector'), query),
+                          FloatField())
+            ).order_by('-rank', '-id')
+
+        return queryset.order_by('-id')
+
+    @staticmethod
+    def _with_any(through, column, ids):
+        """
+        Return a semi-join matching recipes linked to any of the ids.
+
+        Unlike joining the links, ``EXISTS`` yields each recipe once, so
+        the rows don't need to be deduplicated with ``DISTINCT``.
+        """
+        return Exists(through.objects.filter(
+            recipe_id=OuterRef('pk'), **{f'{column}__in': ids}
+        ))
+
+    @staticmethod
+    def _with_all(through, column, ids):
+        """Return the ids of the recipes linked to all of the ids."""
+        return through.objects.filter(
+            **{f'{column}__in': ids}
+        ).values('recipe_id').annotate(
+            matches=Count(column)
+        ).filter(matches=len(set(ids))).values('recipe_id')
 
     def get_serializer_class(self):
         """Return serializer class for request."""
@@ -78,22 +186,211 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
         return serializers.RecipeDetailSerializer
 
+    def get_serializer_context(self):
+        """Add the fields requested with ``fields`` and ``expand``."""
+        context = super().get_serializer_context()
+
+        if self.action in self.sparse_actions:
+            context['fields'] = self._names_param(
+                'fields', self.get_serializer_class().Meta.fields
+            ) or None
+            context['expand'] = self._names_param(
+                'expand', serializers.RecipeSerializer.expandable_fields
+            )
+
+        return context
+
+    def _names_param(self, name, choices):
+        """
+        Return the set of names listed in a query parameter.
+
+        ``None`` is returned when the parameter is missing.
+        """
+        values = self.request.query_params.getlist(name)
+        if not values:
+            return None
+
+        names = {
+            value.strip() for item in values for value in item.split(',')
+        } - {''}
+        unknown = names - set(choices)
+        if unknown:
+            raise ValidationError(
+                {name: [f'Unknown fields: {", ".join(sorted(unknown))}.']}
+            )
+
+        return names
+
+    def get_etag_variant(self):
+        """Tell apart the detail responses narrowed by the request."""
+        context = self.get_serializer_context()
+        return tuple(
+            f'{name}={",".join(sorted(context[name]))}'
+            for name in ('fields', 'expand')
+            if context[name] is not None
+        )
+
     def perform_create(self, serializer):
         """Create a new recipe for a user."""
         serializer.save(user=self.request.user)
 
     @action(methods=['POST'], detail=True, url_path='upload-image')
     def upload_image(self, request, pk=None):
-        """Upload an image to recipe."""
+        """
+        Upload an image to recipe.
+
+        The image is stored as it is and its variants are made in the
+        background, ``image_status`` tells when they are ready.
+        """
         recipe = self.get_object()
         serializer = self.get_serializer(recipe, data=request.data)
 
         if serializer.is_valid():
             serializer.save()
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @extend_schema(
+        request=serializers.RecipeDetailSerializer(many=True),
+        responses={
+            200: OpenApiTypes.OBJECT,
+            201: OpenApiTypes.OBJECT,
+            400: OpenApiTypes.OBJECT
+        },
+        description=(
+            'POST a list of recipes to create them, PATCH a list of '
+            'recipes with their ids to update them or DELETE a list of '
+            'ids. Items are applied in one transaction: if any of them '
+            'fails, none is applied.'
+        )
+    )
+    @action(methods=['POST', 'PATCH', 'DELETE'], detail=False)
+    def bulk(self, request):
+        """Create, update or delete many recipes at once."""
+        if not isinstance(request.data, list):
+            raise ValidationError(
+                {'non_field_errors': ['Expected a list of items.']}
+            )
+        if len(request.data) > self.bulk_max_items:
+            raise ValidationError({'non_field_errors': [
+                f'Ensure there are no more than {self.bulk_max_items} '
+                'items.'
+            ]})
+
+        if request.method == 'POST':
+            return self._bulk_create(request.data)
+        elif request.method == 'PATCH':
+            return self._bulk_update(request.data)
+
+        return self._bulk_destroy(request.data)
+
+    def _bulk_create(self, data):
+        """Create the recipes in the request."""
+        serializer = self.get_serializer(data=data, many=True)
+
+        if not serializer.is_valid():
+            return self._bulk_error_response(serializer.errors)
+
+        recipes = serializer.save(user=self.request.user)
+        return self._bulk_response(recipes, status.HTTP_201_CREATED)
+
+    def _bulk_update(self, data):
+        """Update the recipes in the request, matched by their ids."""
+        ids = [self._item_id(item) for item in data]
+        recipes = self.queryset.filter(
+            user=self.request.user
+        ).prefetch_related('tags', 'ingredients').in_bulk(
+            [recipe_id for recipe_id in ids if recipe_id]
+        )
+        errors = [
+            {} if recipe_id in recipes else {'detail': 'Not found.'}
+            for recipe_id in ids
+        ]
+        if any(errors):
+            return self._bulk_error_response(errors, status.HTTP_404_NOT_FOUND)
+        if len(set(ids)) != len(ids):
+            raise ValidationError({'non_field_errors': ['Duplicate ids.']})
+
+        serializer = self.get_serializer(
+            [recipes[recipe_id] for recipe_id in ids],
+            data=data,
+            many=True,
+            partial=True
+        )
+
+        if not serializer.is_valid():
+            return self._bulk_error_response(serializer.errors)
+
+        recipes = serializer.save()
+        return self._bulk_response(recipes, status.HTTP_200_OK)
+
+    def _bulk_destroy(self, data):
+        """Delete the recipes with the ids in the request."""
+        ids = ListField(child=IntegerField()).run_validation(data)
+        queryset = self.queryset.filter(user=self.request.user, id__in=ids)
+        existing = set(queryset.values_list('id', flat=True))
+        errors = [
+            {} if recipe_id in existing else {'detail': 'Not found.'}
+            for recipe_id in ids
+        ]
+        if any(errors):
+            return self._bulk_error_response(errors, status.HTTP_404_NOT_FOUND)
+
+        queryset.delete()
+        return Response(
+            [
+                {'status': status.HTTP_204_NO_CONTENT, 'id': recipe_id}
+                for recipe_id in ids
+            ],
+            status=status.HTTP_200_OK
+        )
+
+    @staticmethod
+    def _item_id(item):
+        """Return the id of an item of a bulk update."""
+        try:
+            return int(item['id'])
+        except (TypeError, KeyError, ValueError):
+            return None
+
+    def _bulk_response(self, recipes, status_code):
+        """Return the per-item results of a bulk operation."""
+        ids = [recipe.id for recipe in recipes]
+        recipes = self.queryset.prefetch_related(
+            'tags', 'ingredients'
+        ).in_bulk(ids)
+        serializer = self.get_serializer(
+            [recipes[recipe_id] for recipe_id in ids], many=True
+        )
+
+        return Response(
+            [
+                {'status': status_code, 'id': item['id'], 'data': item}
+                for item in serializer.data
+            ],
+            status=status_code
+        )
+
+    @staticmethod
+    def _bulk_error_response(errors,
+                             error_status=status.HTTP_400_BAD_REQUEST):
+        """Return the per-item errors of a rejected bulk operation."""
+        if not isinstance(errors, list):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(
+            [
+                {'status': error_status, 'errors': error}
+                if error else {'status': status.HTTP_424_FAILED_DEPENDENCY}
+                for error in errors
+            ],
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+
+AUTOCOMPLETE_MAX = 50
+
 
 @extend_schema_view(
     list=extend_schema(
@@ -107,12 +404,15 @@ class RecipeViewSet(viewsets.ModelViewSet):
         ]
     )
 )
-class BaseRecipeAttrViewSet(mixins.ListModelMixin,
+class BaseRecipeAttrViewSet(CachedListMixin,
+                            ConditionalListMixin,
+                            ConditionalUpdateMixin,
+                            mixins.ListModelMixin,
                             mixins.UpdateModelMixin,
                             mixins.DestroyModelMixin,
                             viewsets.GenericViewSet):
     """Base viewset for recipe attributes."""
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
@@ -123,11 +423,49 @@ class BaseRecipeAttrViewSet(mixins.ListModelMixin,
         queryset = self.queryset
 
         if assigned_only:
-            queryset = queryset.filter(recipe__isnull=False)
+            relation = queryset.model._meta.get_field('recipe')
+            queryset = queryset.filter(Exists(
+                relation.through.objects.filter(**{
+                    relation.field.m2m_reverse_field_name(): OuterRef('pk')
+                })
+            ))
 
         return queryset.filter(
             user=self.request.user
-        ).order_by('-name').distinct()
+        ).order_by('-name', '-id')
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'q',
+                OpenApiTypes.STR,
+                required=True,
+                description='Start or misspelling of the name.'
+            ),
+            OpenApiParameter(
+                'limit',
+                OpenApiTypes.INT,
+                description=(
+                    f'Number of suggestions, at most {AUTOCOMPLETE_MAX}.'
+                )
+            )
+        ]
+    )
+    @action(methods=['GET'], detail=False)
+    def autocomplete(self, request):
+        """Suggest the names best matching the text typed so far."""
+        text = request.query_params.get('q', '').strip()
+        if not text:
+            raise ValidationError({'q': ['This parameter is required.']})
+        limit = IntegerField(
+            min_value=1, max_value=AUTOCOMPLETE_MAX
+        ).run_validation(request.query_params.get('limit', 10))
+
+        objs = autocomplete.suggest(
+            self.queryset.filter(user=request.user), text, limit
+        )
+        serializer = self.get_serializer(objs, many=True)
+        return Response(serializer.data)
 
 
 class TagViewSet(BaseRecipeAttrViewSet):
@@ -140,3 +478,114 @@ class IngredientViewSet(BaseRecipeAttrViewSet):
     """Manage ingredients in the database."""
     serializer_class = serializers.IngredientSerializer
     queryset = Ingredient.objects.all()
+
+
+@extend_schema_view(
+    partial_update=extend_schema(
+        request={'application/offset+octet-stream': OpenApiTypes.BINARY},
+        parameters=[
+            OpenApiParameter(
+                'Upload-Offset',
+                OpenApiTypes.INT,
+                OpenApiParameter.HEADER,
+                required=True,
+                description='Offset of the first byte of the chunk.'
+            )
+        ],
+        responses={
+            202: serializers.RecipeImageSerializer,
+            204: None,
+            409: OpenApiTypes.OBJECT,
+        },
+        description=(
+            'Send the next chunk of the image, at most chunk_size bytes. '
+            'The response to the last chunk holds the recipe image.'
+        )
+    )
+)
+class ImageUploadViewSet(mixins.CreateModelMixin,
+                         mixins.RetrieveModelMixin,
+                         mixins.DestroyModelMixin,
+                         viewsets.GenericViewSet):
+    """Upload recipe images in resumable chunks."""
+    serializer_class = serializers.ImageUploadSerializer
+    queryset = ImageUpload.objects.select_related('recipe')
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    http_method_names = ['get', 'head', 'post', 'patch', 'delete', 'options']
+    content_type = 'application/offset+octet-stream'
+
+    def get_queryset(self):
+        """Retrieve only uploads of authenticated user."""
+        return self.queryset.filter(user=self.request.user)
+
+    def perform_create(self, serializer):
+        """Create an upload and its temporary file."""
+        serializer.instance = uploads.create_upload(
+            self.request.user,
+            serializer.validated_data['recipe'],
+            serializer.validated_data['size']
+        )
+
+    def perform_destroy(self, instance):
+        """Cancel an upload."""
+        uploads.delete_upload(instance)
+
+    def retrieve(self, request, *args, **kwargs):
+        """Return the upload and the offset to resume it from."""
+        response = super().retrieve(request, *args, **kwargs)
+        response['Upload-Offset'] = response.data['offset']
+        return response
+
+    def partial_update(self, request, *args, **kwargs):
+        """Stream a chunk of the image to the upload."""
+        upload = self.get_object()
+
+        if request.content_type != self.content_type:
+            return Response(
+                {'detail': f'Chunks must be sent as {self.content_type}.'},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+            )
+        try:
+            offset = int(request.headers['Upload-Offset'])
+            length = int(request.headers['Content-Length'])
+        except (KeyError, ValueError):
+            raise ValidationError({
+                'detail': 'Upload-Offset and Content-Length are required.'
+            })
+        if length > settings.IMAGE_UPLOAD_CHUNK_SIZE:
+            return Response(
+                {'detail': 'Chunks must be at most '
+                           f'{settings.IMAGE_UPLOAD_CHUNK_SIZE} bytes.'},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+        if offset + length > upload.size:
+            raise ValidationError(
+                {'detail': 'The chunk ends past the size of the upload.'}
+            )
+
+        try:
+            uploads.write_chunk(upload, offset, request.stream, length)
+        except uploads.UploadConflict as exc:
+            return Response(
+                {'detail': str(exc)},
+                status=status.HTTP_409_CONFLICT,
+                headers={'Upload-Offset': upload.offset}
+            )
+
+        if upload.offset < upload.size:
+            return Response(status=status.HTTP_204_NO_CONTENT,
+                            headers={'Upload-Offset': upload.offset})
+
+        try:
+            recipe = uploads.complete_upload(upload)
+        except uploads.InvalidImage:
+            raise ValidationError({'image': [
+                'Upload a valid image. The file you uploaded was either '
+                'not an image, a corrupted image or a too large image.'
+            ]})
+
+        serializer = serializers.RecipeImageSerializer(
+            recipe, context=self.get_serializer_context()
+        )
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
@@ -1,3 +1,10 @@
+# JSON when asked with ?format=json or, without a format, by Accept.
+map "$arg_format:$http_accept" $schema_file {
+  default      openapi.yaml;
+  "~^json:"    openapi.json;
+  "~^:.*json"  openapi.json;
+}
+
 server {
   listen ${LISTEN_PORT};
 
@@ -5,9 +12,52 @@ server {
       alias /vol/static;
   }
 
+  # The schema written by the generate_schema command, the app only
+  # serves it until the file exists.
+  location = /api/schema/ {
+      root       /vol/static/static/schema;
+      try_files  /$schema_file @app;
+      types {
+          application/vnd.oai.openapi      yaml;
+          application/vnd.oai.openapi+json json;
+      }
+  }
+
+  # Scraped from the private networks only, on top of METRICS_TOKEN.
+  location = /api/metrics {
+      allow      127.0.0.1;
+      allow      10.0.0.0/8;
+      allow      172.16.0.0/12;
+      allow      192.168.0.0/16;
+      deny       all;
+      uwsgi_pass ${APP_HOST}:${APP_PORT};
+      include    /etc/nginx/uwsgi_params;
+  }
+
+  location /api/async/ {
+      proxy_pass           http://${ASGI_HOST}:${ASGI_PORT};
+      proxy_set_header     Host $host;
+      proxy_set_header     X-Forwarded-For $proxy_add_x_forwarded_for;
+      proxy_set_header     X-Forwarded-Proto $scheme;
+  }
+
+  # Chunks of image uploads are buffered here before being passed on,
+  # so slow clients don't hold an app worker.
+  location /api/image-uploads/ {
+      uwsgi_pass              ${APP_HOST}:${APP_PORT};
+      include                 /etc/nginx/uwsgi_params;
+      uwsgi_request_buffering on;
+      client_max_body_size    1M;
+  }
+
   location / {
       uwsgi_pass           ${APP_HOST}:${APP_PORT};
       include              /etc/nginx/uwsgi_params;
       client_max_body_size 10M;
   }
+
+  location @app {
+      uwsgi_pass           ${APP_HOST}:${APP_PORT};
+      include              /etc/nginx/uwsgi_params;
+  }
 }
\ No newline at end of file
@@ -10,6 +10,11 @@ fi
 
 export host=\$host
 export request_uri=\$request_uri
+export scheme=\$scheme
+export proxy_add_x_forwarded_for=\$proxy_add_x_forwarded_for
+export arg_format=\$arg_format
+export http_accept=\$http_accept
+export schema_file=\$schema_file
 
 echo "Checking for fullchain.pem"
 if [! -f "/etc/letsencrypt/live/${DOMAIN}/fullchain.pem" ]; then
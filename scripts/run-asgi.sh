@@ -0,0 +1,14 @@
+#!/bin/sh
+
+set -e
+
+python manage.py wait_for_db
+
+# Counters of the previous run's workers aren't carried over, the ones
+# of the other servers sharing the directory are left alone.
+if [ -n "$METRICS_DIR" ]; then
+    rm -f "$METRICS_DIR/$(hostname)"-*.json "$METRICS_DIR/$(hostname)"-*.tmp
+fi
+
+uvicorn app.asgi:application --host 0.0.0.0 --port 9001 \
+    --workers "${ASGI_WORKERS:-4}" --no-access-log
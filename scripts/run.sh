@@ -3,7 +3,14 @@
 set -e
 
 python manage.py wait_for_db
+
+# Counters of the previous run's workers aren't carried over, the ones
+# of the other servers sharing the directory are left alone.
+if [ -n "$METRICS_DIR" ]; then
+    rm -f "$METRICS_DIR/$(hostname)"-*.json "$METRICS_DIR/$(hostname)"-*.tmp
+fi
 python manage.py collectstatic --noinput
+python manage.py generate_schema
 python manage.py migrate
 
 uwsgi --socket :9000 --workers 4 --master --enable-threads --module app.wsgi